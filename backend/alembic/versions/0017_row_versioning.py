@@ -0,0 +1,37 @@
+"""enable row versioning (READ_COMMITTED_SNAPSHOT + ALLOW_SNAPSHOT_ISOLATION)
+
+Revision ID: 0017_row_versioning
+Revises: 0016_bank_account_ordering
+Create Date: 2026-10-19 00:00:00.000000
+
+Report routes read under SNAPSHOT isolation so long stats aggregations no
+longer take shared locks on `transactions`. ALTER DATABASE cannot run inside a
+transaction, hence the autocommit block. `WITH ROLLBACK IMMEDIATE` ends other
+open sessions on the database, so run this during a quiet window.
+"""
+
+from alembic import op
+
+
+revision = "0017_row_versioning"
+down_revision = "0016_bank_account_ordering"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "mssql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("ALTER DATABASE CURRENT SET ALLOW_SNAPSHOT_ISOLATION ON")
+        op.execute("ALTER DATABASE CURRENT SET READ_COMMITTED_SNAPSHOT ON WITH ROLLBACK IMMEDIATE")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "mssql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("ALTER DATABASE CURRENT SET READ_COMMITTED_SNAPSHOT OFF WITH ROLLBACK IMMEDIATE")
+        op.execute("ALTER DATABASE CURRENT SET ALLOW_SNAPSHOT_ISOLATION OFF")
@@ -0,0 +1,33 @@
+"""transaction audit outbox
+
+Revision ID: 0018_transaction_audit_outbox
+Revises: 0017_row_versioning
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0018_transaction_audit_outbox"
+down_revision = "0017_row_versioning"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transaction_audit_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=False),
+            nullable=False,
+            server_default=sa.text("SYSUTCDATETIME()"),
+        ),
+        sa.Column("payload", sa.UnicodeText(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("transaction_audit_outbox")
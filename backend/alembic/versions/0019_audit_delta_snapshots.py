@@ -0,0 +1,166 @@
+"""delta-encoded audit snapshots
+
+Revision ID: 0019_audit_delta_snapshots
+Revises: 0018_transaction_audit_outbox
+Create Date: 2026-10-19 00:00:00.000000
+
+Adds transaction_audit_logs.is_delta and compacts existing update rows into
+field diffs. Rows are processed a chunk of transactions at a time and written
+in autocommit mode, so the log never holds the whole table. An update row is
+only compacted when an earlier row of the same transaction holds a full
+snapshot to rebuild it from.
+
+Entering the autocommit block commits the column add, while alembic_version is
+only bumped after the backfill, so an interrupted run leaves the column in
+place at the previous revision. A rerun therefore skips the column add when the
+column exists and then skips already compacted rows.
+"""
+
+from __future__ import annotations
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0019_audit_delta_snapshots"
+down_revision = "0018_transaction_audit_outbox"
+branch_labels = None
+depends_on = None
+
+
+CHUNK_TRANSACTIONS = 500
+
+audit_logs = sa.table(
+    "transaction_audit_logs",
+    sa.column("id", sa.Integer()),
+    sa.column("created_at", sa.DateTime()),
+    sa.column("action", sa.String()),
+    sa.column("transaction_id", sa.Integer()),
+    sa.column("before_json", sa.UnicodeText()),
+    sa.column("after_json", sa.UnicodeText()),
+    sa.column("is_delta", sa.Boolean()),
+)
+
+
+def _loads(value: str | None) -> dict | None:
+    if value is None:
+        return None
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _dumps(value: dict) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _transaction_chunks(bind, *, is_delta: bool):
+    last_id = 0
+    while True:
+        ids = bind.execute(
+            sa.select(audit_logs.c.transaction_id)
+            .where(
+                audit_logs.c.action == "update",
+                audit_logs.c.is_delta == is_delta,
+                audit_logs.c.transaction_id > last_id,
+            )
+            .group_by(audit_logs.c.transaction_id)
+            .order_by(audit_logs.c.transaction_id.asc())
+            .limit(CHUNK_TRANSACTIONS)
+        ).scalars().all()
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def _history(bind, tx_ids: list[int]):
+    return bind.execute(
+        sa.select(
+            audit_logs.c.id,
+            audit_logs.c.transaction_id,
+            audit_logs.c.before_json,
+            audit_logs.c.after_json,
+            audit_logs.c.is_delta,
+        )
+        .where(audit_logs.c.transaction_id.in_(tx_ids))
+        .order_by(audit_logs.c.transaction_id, audit_logs.c.created_at, audit_logs.c.id)
+    ).all()
+
+
+def _apply(bind, updates: list[dict]) -> None:
+    if not updates:
+        return
+    bind.execute(
+        audit_logs.update()
+        .where(audit_logs.c.id == sa.bindparam("row_id"))
+        .values(
+            before_json=sa.bindparam("new_before"),
+            after_json=sa.bindparam("new_after"),
+            is_delta=sa.bindparam("new_is_delta"),
+        ),
+        updates,
+    )
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("transaction_audit_logs")}
+    if "is_delta" not in columns:
+        op.add_column(
+            "transaction_audit_logs",
+            sa.Column("is_delta", sa.Boolean(), nullable=False, server_default=sa.text("0")),
+        )
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for tx_ids in _transaction_chunks(bind, is_delta=False):
+            updates = []
+            latest: dict[int, dict | None] = {}
+            for row in _history(bind, tx_ids):
+                before = _loads(row.before_json)
+                after = _loads(row.after_json)
+                if row.is_delta:
+                    after = {**(latest.get(row.transaction_id) or {}), **(after or {})}
+                elif before is not None and after is not None and latest.get(row.transaction_id) is not None:
+                    changed = [k for k in after if before.get(k) != after[k]]
+                    changed += [k for k in before if k not in after]
+                    updates.append(
+                        {
+                            "row_id": row.id,
+                            "new_before": _dumps({k: before.get(k) for k in changed}),
+                            "new_after": _dumps({k: after.get(k) for k in changed}),
+                            "new_is_delta": True,
+                        }
+                    )
+                latest[row.transaction_id] = after
+            _apply(bind, updates)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for tx_ids in _transaction_chunks(bind, is_delta=True):
+            updates = []
+            latest: dict[int, dict | None] = {}
+            for row in _history(bind, tx_ids):
+                before = _loads(row.before_json)
+                after = _loads(row.after_json)
+                if row.is_delta:
+                    after = {**(latest.get(row.transaction_id) or {}), **(after or {})}
+                    before = {**after, **(before or {})}
+                    updates.append(
+                        {
+                            "row_id": row.id,
+                            "new_before": _dumps(before),
+                            "new_after": _dumps(after),
+                            "new_is_delta": False,
+                        }
+                    )
+                latest[row.transaction_id] = after
+            _apply(bind, updates)
+
+    op.drop_column("transaction_audit_logs", "is_delta", mssql_drop_default=True)
@@ -0,0 +1,49 @@
+"""composite indexes for audit log keyset pagination
+
+Revision ID: 0020_audit_log_keyset_indexes
+Revises: 0019_audit_delta_snapshots
+Create Date: 2026-10-19 00:00:00.000000
+
+The single-column target/transaction/actor indexes are left-prefixes of the new
+composite ones, so they are dropped to keep audit inserts cheap.
+"""
+
+from alembic import op
+
+
+revision = "0020_audit_log_keyset_indexes"
+down_revision = "0019_audit_delta_snapshots"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transaction_audit_logs_target_created_id",
+        "transaction_audit_logs",
+        ["target_user_id", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_transaction_audit_logs_transaction_created",
+        "transaction_audit_logs",
+        ["transaction_id", "created_at"],
+    )
+    op.create_index(
+        "ix_transaction_audit_logs_actor_created",
+        "transaction_audit_logs",
+        ["actor_user_id", "created_at"],
+    )
+
+    op.drop_index("ix_transaction_audit_logs_target_user_id", table_name="transaction_audit_logs")
+    op.drop_index("ix_transaction_audit_logs_transaction_id", table_name="transaction_audit_logs")
+    op.drop_index("ix_transaction_audit_logs_actor_user_id", table_name="transaction_audit_logs")
+
+
+def downgrade() -> None:
+    op.create_index("ix_transaction_audit_logs_actor_user_id", "transaction_audit_logs", ["actor_user_id"])
+    op.create_index("ix_transaction_audit_logs_transaction_id", "transaction_audit_logs", ["transaction_id"])
+    op.create_index("ix_transaction_audit_logs_target_user_id", "transaction_audit_logs", ["target_user_id"])
+
+    op.drop_index("ix_transaction_audit_logs_actor_created", table_name="transaction_audit_logs")
+    op.drop_index("ix_transaction_audit_logs_transaction_created", table_name="transaction_audit_logs")
+    op.drop_index("ix_transaction_audit_logs_target_created_id", table_name="transaction_audit_logs")
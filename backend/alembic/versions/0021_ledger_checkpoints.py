@@ -0,0 +1,37 @@
+"""ledger checkpoints for point-in-time reconstruction
+
+Revision ID: 0021_ledger_checkpoints
+Revises: 0020_audit_log_keyset_indexes
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0021_ledger_checkpoints"
+down_revision = "0020_audit_log_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_checkpoints",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("as_of", sa.DateTime(timezone=False), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=False),
+            nullable=False,
+            server_default=sa.text("SYSUTCDATETIME()"),
+        ),
+        sa.Column("payload", sa.UnicodeText(), nullable=False),
+    )
+    op.create_index("ix_ledger_checkpoints_user_as_of", "ledger_checkpoints", ["user_id", "as_of"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ledger_checkpoints_user_as_of", table_name="ledger_checkpoints")
+    op.drop_table("ledger_checkpoints")
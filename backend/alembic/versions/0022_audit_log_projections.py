@@ -0,0 +1,157 @@
+"""indexed projection columns on transaction audit logs
+
+Revision ID: 0022_audit_log_projections
+Revises: 0021_ledger_checkpoints
+Create Date: 2026-10-19 00:00:00.000000
+
+Adds amount_cents / category_id / bank_account_id / note_prefix, taken from the
+resulting snapshot of each row (the deleted one for deletes), and backfills
+them a chunk of transactions at a time in autocommit mode. Delta rows are
+replayed on top of the transaction's earlier rows to get the full state.
+
+Entering the autocommit block commits the column and index DDL, while
+alembic_version is only bumped after the backfill, so an interrupted run leaves
+them in place at the previous revision. A rerun therefore creates only the
+missing columns and indexes, and the backfill only touches rows whose
+amount_cents is still NULL.
+"""
+
+from __future__ import annotations
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0022_audit_log_projections"
+down_revision = "0021_ledger_checkpoints"
+branch_labels = None
+depends_on = None
+
+
+CHUNK_TRANSACTIONS = 500
+NOTE_PREFIX_LENGTH = 32
+
+_INDEXES = (
+    ("ix_transaction_audit_logs_amount_created", ["amount_cents", "created_at"]),
+    ("ix_transaction_audit_logs_category_created", ["category_id", "created_at"]),
+    ("ix_transaction_audit_logs_bank_account_created", ["bank_account_id", "created_at"]),
+    ("ix_transaction_audit_logs_note_prefix_created", ["note_prefix", "created_at"]),
+)
+
+audit_logs = sa.table(
+    "transaction_audit_logs",
+    sa.column("id", sa.Integer()),
+    sa.column("created_at", sa.DateTime()),
+    sa.column("transaction_id", sa.Integer()),
+    sa.column("before_json", sa.UnicodeText()),
+    sa.column("after_json", sa.UnicodeText()),
+    sa.column("is_delta", sa.Boolean()),
+    sa.column("amount_cents", sa.Integer()),
+    sa.column("category_id", sa.Integer()),
+    sa.column("bank_account_id", sa.Integer()),
+    sa.column("note_prefix", sa.Unicode(NOTE_PREFIX_LENGTH)),
+)
+
+
+def _loads(value: str | None) -> dict | None:
+    if value is None:
+        return None
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _int_or_none(value) -> int | None:
+    return int(value) if value is not None else None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing_columns = {c["name"] for c in inspector.get_columns("transaction_audit_logs")}
+    existing_indexes = {i["name"] for i in inspector.get_indexes("transaction_audit_logs")}
+    for column in (
+        sa.Column("amount_cents", sa.Integer(), nullable=True),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("bank_account_id", sa.Integer(), nullable=True),
+        sa.Column("note_prefix", sa.Unicode(NOTE_PREFIX_LENGTH), nullable=True),
+    ):
+        if column.name not in existing_columns:
+            op.add_column("transaction_audit_logs", column)
+    for name, columns in _INDEXES:
+        if name not in existing_indexes:
+            op.create_index(name, "transaction_audit_logs", columns)
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            tx_ids = bind.execute(
+                sa.select(audit_logs.c.transaction_id)
+                .where(audit_logs.c.amount_cents.is_(None), audit_logs.c.transaction_id > last_id)
+                .group_by(audit_logs.c.transaction_id)
+                .order_by(audit_logs.c.transaction_id.asc())
+                .limit(CHUNK_TRANSACTIONS)
+            ).scalars().all()
+            if not tx_ids:
+                break
+            last_id = tx_ids[-1]
+
+            history = bind.execute(
+                sa.select(
+                    audit_logs.c.id,
+                    audit_logs.c.transaction_id,
+                    audit_logs.c.before_json,
+                    audit_logs.c.after_json,
+                    audit_logs.c.is_delta,
+                    audit_logs.c.amount_cents,
+                )
+                .where(audit_logs.c.transaction_id.in_(tx_ids))
+                .order_by(audit_logs.c.transaction_id, audit_logs.c.created_at, audit_logs.c.id)
+            ).all()
+
+            updates = []
+            latest: dict[int, dict | None] = {}
+            for row in history:
+                before = _loads(row.before_json)
+                after = _loads(row.after_json)
+                if row.is_delta:
+                    after = {**(latest.get(row.transaction_id) or {}), **(after or {})}
+                latest[row.transaction_id] = after
+                if row.amount_cents is not None:
+                    continue
+                snapshot = (after if after is not None else before) or {}
+                note = snapshot.get("note")
+                updates.append(
+                    {
+                        "row_id": row.id,
+                        "p_amount": _int_or_none(snapshot.get("amountCents")),
+                        "p_category": _int_or_none(snapshot.get("categoryId")),
+                        "p_bank_account": _int_or_none(snapshot.get("bankAccountId")),
+                        "p_note": str(note)[:NOTE_PREFIX_LENGTH] if note else None,
+                    }
+                )
+            if updates:
+                bind.execute(
+                    audit_logs.update()
+                    .where(audit_logs.c.id == sa.bindparam("row_id"))
+                    .values(
+                        amount_cents=sa.bindparam("p_amount"),
+                        category_id=sa.bindparam("p_category"),
+                        bank_account_id=sa.bindparam("p_bank_account"),
+                        note_prefix=sa.bindparam("p_note"),
+                    ),
+                    updates,
+                )
+
+
+def downgrade() -> None:
+    for name, _ in reversed(_INDEXES):
+        op.drop_index(name, table_name="transaction_audit_logs")
+    op.drop_column("transaction_audit_logs", "note_prefix")
+    op.drop_column("transaction_audit_logs", "bank_account_id")
+    op.drop_column("transaction_audit_logs", "category_id")
+    op.drop_column("transaction_audit_logs", "amount_cents")
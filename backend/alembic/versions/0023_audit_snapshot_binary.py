@@ -0,0 +1,31 @@
+"""compact binary columns for audit snapshots
+
+Revision ID: 0023_audit_snapshot_binary
+Revises: 0022_audit_log_projections
+Create Date: 2026-10-19 00:00:00.000000
+
+New rows use them when IBOOKS_AUDIT_SNAPSHOT_ENCODING=binary; existing rows can
+be converted with `python -m scripts.encode_audit_snapshots`.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0023_audit_snapshot_binary"
+down_revision = "0022_audit_log_projections"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("transaction_audit_logs", sa.Column("before_bin", sa.LargeBinary(), nullable=True))
+    op.add_column("transaction_audit_logs", sa.Column("after_bin", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    # Convert binary rows back first: python -m scripts.encode_audit_snapshots --to json
+    op.drop_column("transaction_audit_logs", "after_bin")
+    op.drop_column("transaction_audit_logs", "before_bin")
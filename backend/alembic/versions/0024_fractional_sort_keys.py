@@ -0,0 +1,151 @@
+"""fractional sort keys for categories and bank accounts
+
+Revision ID: 0024_fractional_sort_keys
+Revises: 0023_audit_snapshot_binary
+Create Date: 2026-10-19 00:00:00.000000
+
+Replaces the integer sort_order columns with lexicographic sort_key strings (see
+app/core/rank.py), so moving an item rewrites only that item. Existing rows get
+evenly spaced keys in their current order: categories per (user, type, parent),
+bank accounts per user with pinned accounts first.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0024_fractional_sort_keys"
+down_revision = "0023_audit_snapshot_binary"
+branch_labels = None
+depends_on = None
+
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+categories = sa.table(
+    "categories",
+    sa.column("id", sa.Integer()),
+    sa.column("user_id", sa.Integer()),
+    sa.column("type", sa.String()),
+    sa.column("parent_id", sa.Integer()),
+    sa.column("sort_order", sa.Integer()),
+    sa.column("sort_key", sa.String()),
+)
+
+bank_accounts = sa.table(
+    "bank_accounts",
+    sa.column("id", sa.Integer()),
+    sa.column("user_id", sa.Integer()),
+    sa.column("is_pinned", sa.Boolean()),
+    sa.column("sort_order", sa.Integer()),
+    sa.column("sort_key", sa.String()),
+)
+
+
+def _even_keys(n: int) -> list[str]:
+    # Fixed-width base-36 fractions i/(n+1), trailing zero digits dropped.
+    width = 1
+    while len(DIGITS) ** width < 2 * (n + 1):
+        width += 1
+    keys = []
+    for i in range(1, n + 1):
+        value = i * len(DIGITS) ** width // (n + 1)
+        digits = ""
+        for _ in range(width):
+            value, digit = divmod(value, len(DIGITS))
+            digits = DIGITS[digit] + digits
+        keys.append(digits.rstrip("0"))
+    return keys
+
+
+def _assign_keys(bind, table, rows, scope) -> None:
+    groups: dict[tuple, list[int]] = {}
+    for row in rows:
+        groups.setdefault(scope(row), []).append(row.id)
+    updates = [
+        {"row_id": row_id, "new_key": key}
+        for ids in groups.values()
+        for row_id, key in zip(ids, _even_keys(len(ids)))
+    ]
+    if updates:
+        bind.execute(
+            table.update().where(table.c.id == sa.bindparam("row_id")).values(sort_key=sa.bindparam("new_key")),
+            updates,
+        )
+
+
+def _assign_orders(bind, table, rows, scope, step: int) -> None:
+    counters: dict[tuple, int] = {}
+    updates = []
+    for row in rows:
+        index = counters.get(scope(row), 0)
+        counters[scope(row)] = index + 1
+        updates.append({"row_id": row.id, "new_order": index * step})
+    if updates:
+        bind.execute(
+            table.update().where(table.c.id == sa.bindparam("row_id")).values(sort_order=sa.bindparam("new_order")),
+            updates,
+        )
+
+
+def upgrade() -> None:
+    op.add_column("categories", sa.Column("sort_key", sa.String(64), nullable=True))
+    op.add_column("bank_accounts", sa.Column("sort_key", sa.String(64), nullable=True))
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(categories.c.id, categories.c.user_id, categories.c.type, categories.c.parent_id).order_by(
+            categories.c.sort_order.asc(), categories.c.id.asc()
+        )
+    ).all()
+    _assign_keys(bind, categories, rows, lambda r: (r.user_id, r.type, r.parent_id))
+
+    rows = bind.execute(
+        sa.select(bank_accounts.c.id, bank_accounts.c.user_id).order_by(
+            bank_accounts.c.is_pinned.desc(), bank_accounts.c.sort_order.asc(), bank_accounts.c.id.desc()
+        )
+    ).all()
+    _assign_keys(bind, bank_accounts, rows, lambda r: (r.user_id,))
+
+    op.alter_column("categories", "sort_key", existing_type=sa.String(64), nullable=False, existing_nullable=True)
+    op.alter_column("bank_accounts", "sort_key", existing_type=sa.String(64), nullable=False, existing_nullable=True)
+    op.create_index("ix_categories_user_parent_sort_key", "categories", ["user_id", "parent_id", "sort_key"])
+    op.create_index("ix_bank_accounts_user_pinned_sort_key", "bank_accounts", ["user_id", "is_pinned", "sort_key"])
+
+    op.drop_index("ix_bank_accounts_sort_order", table_name="bank_accounts")
+    op.drop_column("bank_accounts", "sort_order", mssql_drop_default=True)
+    op.drop_column("categories", "sort_order", mssql_drop_default=True)
+
+
+def downgrade() -> None:
+    op.add_column(
+        "categories",
+        sa.Column("sort_order", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.add_column(
+        "bank_accounts",
+        sa.Column("sort_order", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.create_index("ix_bank_accounts_sort_order", "bank_accounts", ["sort_order"], unique=False)
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(categories.c.id, categories.c.user_id, categories.c.type, categories.c.parent_id).order_by(
+            categories.c.sort_key.asc(), categories.c.id.asc()
+        )
+    ).all()
+    _assign_orders(bind, categories, rows, lambda r: (r.user_id, r.type, r.parent_id), step=10)
+
+    rows = bind.execute(
+        sa.select(bank_accounts.c.id, bank_accounts.c.user_id).order_by(
+            bank_accounts.c.is_pinned.desc(), bank_accounts.c.sort_key.asc(), bank_accounts.c.id.desc()
+        )
+    ).all()
+    _assign_orders(bind, bank_accounts, rows, lambda r: (r.user_id,), step=1)
+
+    op.drop_index("ix_bank_accounts_user_pinned_sort_key", table_name="bank_accounts")
+    op.drop_index("ix_categories_user_parent_sort_key", table_name="categories")
+    op.drop_column("bank_accounts", "sort_key")
+    op.drop_column("categories", "sort_key")
@@ -0,0 +1,44 @@
+"""bank account balance checkpoints
+
+Revision ID: 0025_bank_account_balance_checkpoints
+Revises: 0024_fractional_sort_keys
+Create Date: 2026-10-19 00:00:00.000000
+
+Monthly per-account sums of transaction effects anchor the balance history series
+(app/core/balance_history.py). Rows are filled lazily on first read, so nothing is
+backfilled here. The (account, occurred_at) indexes bound each history scan to a range.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0025_bank_account_balance_checkpoints"
+down_revision = "0024_fractional_sort_keys"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bank_account_balance_checkpoints",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("bank_account_id", sa.Integer(), sa.ForeignKey("bank_accounts.id"), nullable=False),
+        sa.Column("as_of", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("ledger_cents", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=False),
+            nullable=False,
+            server_default=sa.text("SYSUTCDATETIME()"),
+        ),
+        sa.UniqueConstraint("bank_account_id", "as_of", name="uq_bank_account_balance_checkpoints_account_as_of"),
+    )
+    op.create_index("ix_transactions_bank_account_occurred", "transactions", ["bank_account_id", "occurred_at"])
+    op.create_index("ix_transactions_to_bank_account_occurred", "transactions", ["to_bank_account_id", "occurred_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_to_bank_account_occurred", table_name="transactions")
+    op.drop_index("ix_transactions_bank_account_occurred", table_name="transactions")
+    op.drop_table("bank_account_balance_checkpoints")
@@ -0,0 +1,92 @@
+"""bank account opening balance for reconciliation
+
+Revision ID: 0026_bank_account_opening_balance
+Revises: 0025_bank_account_balance_checkpoints
+Create Date: 2026-10-19 00:00:00.000000
+
+opening_balance_cents holds the part of balance_cents that transactions do not
+explain (the opening balance plus manual edits), so scripts/reconcile_balances.py can
+tell drift from deliberate changes. Existing accounts are assumed correct today: the
+column is backfilled as balance_cents minus the ledger's effects on the account.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0026_bank_account_opening_balance"
+down_revision = "0025_bank_account_balance_checkpoints"
+branch_labels = None
+depends_on = None
+
+
+bank_accounts = sa.table(
+    "bank_accounts",
+    sa.column("id", sa.Integer()),
+    sa.column("balance_cents", sa.Integer()),
+    sa.column("opening_balance_cents", sa.Integer()),
+)
+
+transactions = sa.table(
+    "transactions",
+    sa.column("type", sa.String()),
+    sa.column("amount_cents", sa.Integer()),
+    sa.column("funding_source", sa.String()),
+    sa.column("bank_account_id", sa.Integer()),
+    sa.column("to_bank_account_id", sa.Integer()),
+)
+
+
+def _ledger_effects(bind) -> dict[int, int]:
+    t = transactions
+    effects: dict[int, int] = {}
+    outgoing = bind.execute(
+        sa.select(
+            t.c.bank_account_id,
+            sa.func.sum(
+                sa.case(
+                    (t.c.type == "transfer", -t.c.amount_cents),
+                    (t.c.funding_source != "bank", 0),
+                    (t.c.type == "expense", -t.c.amount_cents),
+                    (t.c.type.in_(("income", "refund")), t.c.amount_cents),
+                    else_=0,
+                )
+            ),
+        )
+        .where(t.c.bank_account_id.is_not(None))
+        .group_by(t.c.bank_account_id)
+    ).all()
+    incoming = bind.execute(
+        sa.select(t.c.to_bank_account_id, sa.func.sum(t.c.amount_cents))
+        .where(t.c.type == "transfer", t.c.to_bank_account_id.is_not(None))
+        .group_by(t.c.to_bank_account_id)
+    ).all()
+    for account_id, total in (*outgoing, *incoming):
+        effects[int(account_id)] = effects.get(int(account_id), 0) + int(total or 0)
+    return effects
+
+
+def upgrade() -> None:
+    op.add_column(
+        "bank_accounts",
+        sa.Column("opening_balance_cents", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+
+    bind = op.get_bind()
+    effects = _ledger_effects(bind)
+    rows = bind.execute(sa.select(bank_accounts.c.id, bank_accounts.c.balance_cents)).all()
+    updates = [
+        {"row_id": row.id, "opening": int(row.balance_cents or 0) - effects.get(int(row.id), 0)}
+        for row in rows
+    ]
+    if updates:
+        bind.execute(
+            bank_accounts.update()
+            .where(bank_accounts.c.id == sa.bindparam("row_id"))
+            .values(opening_balance_cents=sa.bindparam("opening")),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("bank_accounts", "opening_balance_cents", mssql_drop_default=True)
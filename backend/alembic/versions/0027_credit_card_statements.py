@@ -0,0 +1,46 @@
+"""credit card statement cache
+
+Revision ID: 0027_credit_card_statements
+Revises: 0026_bank_account_opening_balance
+Create Date: 2026-10-19 00:00:00.000000
+
+Totals of closed billing cycles, written on first read by the cycles endpoint and
+dropped when a transaction inside or before a cycle changes.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0027_credit_card_statements"
+down_revision = "0026_bank_account_opening_balance"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "credit_card_statements",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("bank_account_id", sa.Integer(), sa.ForeignKey("bank_accounts.id"), nullable=False),
+        sa.Column("cycle_start", sa.Date(), nullable=False),
+        sa.Column("statement_date", sa.Date(), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("closes_at", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("previous_balance_cents", sa.Integer(), nullable=False),
+        sa.Column("charges_cents", sa.Integer(), nullable=False),
+        sa.Column("credits_cents", sa.Integer(), nullable=False),
+        sa.Column("payments_cents", sa.Integer(), nullable=False),
+        sa.Column("statement_balance_cents", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=False),
+            nullable=False,
+            server_default=sa.text("SYSUTCDATETIME()"),
+        ),
+        sa.UniqueConstraint("bank_account_id", "statement_date", name="uq_credit_card_statements_account_date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("credit_card_statements")
@@ -0,0 +1,82 @@
+"""persisted commute card state
+
+Revision ID: 0028_commute_card_state
+Revises: 0027_credit_card_statements
+Create Date: 2026-10-19 00:00:00.000000
+
+effective_date / expiry_date / used_count are kept up to date by the reservation
+routes so card lists can filter by status in SQL. Existing cards are backfilled
+from one grouped aggregate over commute_reservations.
+"""
+
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0028_commute_card_state"
+down_revision = "0027_credit_card_statements"
+branch_labels = None
+depends_on = None
+
+
+commute_cards = sa.table(
+    "commute_cards",
+    sa.column("id", sa.Integer()),
+    sa.column("effective_date", sa.Date()),
+    sa.column("expiry_date", sa.Date()),
+    sa.column("used_count", sa.Integer()),
+)
+
+commute_reservations = sa.table(
+    "commute_reservations",
+    sa.column("card_id", sa.Integer()),
+    sa.column("ride_date", sa.Date()),
+)
+
+
+def upgrade() -> None:
+    op.add_column("commute_cards", sa.Column("effective_date", sa.Date(), nullable=True))
+    op.add_column("commute_cards", sa.Column("expiry_date", sa.Date(), nullable=True))
+    op.add_column(
+        "commute_cards",
+        sa.Column("used_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+
+    bind = op.get_bind()
+    r = commute_reservations
+    rows = bind.execute(
+        sa.select(r.c.card_id, sa.func.count(), sa.func.min(r.c.ride_date))
+        .where(r.c.card_id.is_not(None))
+        .group_by(r.c.card_id)
+    ).all()
+    updates = [
+        {
+            "row_id": card_id,
+            "used": int(used),
+            "effective": first,
+            "expiry": first + timedelta(days=29) if first is not None else None,
+        }
+        for card_id, used, first in rows
+    ]
+    if updates:
+        bind.execute(
+            commute_cards.update()
+            .where(commute_cards.c.id == sa.bindparam("row_id"))
+            .values(
+                used_count=sa.bindparam("used"),
+                effective_date=sa.bindparam("effective"),
+                expiry_date=sa.bindparam("expiry"),
+            ),
+            updates,
+        )
+
+    op.create_index("ix_commute_cards_user_expiry", "commute_cards", ["user_id", "expiry_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_commute_cards_user_expiry", table_name="commute_cards")
+    op.drop_column("commute_cards", "used_count", mssql_drop_default=True)
+    op.drop_column("commute_cards", "expiry_date")
+    op.drop_column("commute_cards", "effective_date")
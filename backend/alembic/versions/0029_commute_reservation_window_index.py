@@ -0,0 +1,28 @@
+"""commute reservation date window index
+
+Revision ID: 0029_commute_reservation_window_index
+Revises: 0028_commute_card_state
+Create Date: 2026-10-19 00:00:00.000000
+
+Ticket commute listing pages through (user_id, card_id IS NULL, ride_date) windows.
+"""
+
+from alembic import op
+
+
+revision = "0029_commute_reservation_window_index"
+down_revision = "0028_commute_card_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_commute_reservations_user_card_ride_date",
+        "commute_reservations",
+        ["user_id", "card_id", "ride_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_commute_reservations_user_card_ride_date", table_name="commute_reservations")
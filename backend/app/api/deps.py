@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.security import decode_access_token
-from app.db.session import SessionLocal
+from app.db.isolation import use_report_isolation, use_report_isolation_async
+from app.db.routing import SESSION_USER_KEY, async_read_sessionmaker, read_sessionmaker
+from app.db.session import AsyncSessionLocal, BalanceSessionLocal, SessionLocal
 from app.models.user import User
 
 bearer_scheme = HTTPBearer(auto_error=False)
@@ -20,10 +25,32 @@ def get_db() -> Session:
         db.close()
 
 
-def get_request_token(
+def get_balance_db() -> Session:
+    # Balance-checking writes: the whole request runs at IBOOKS_DB_BALANCE_ISOLATION_LEVEL.
+    db = BalanceSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _user_id_from_token(token: str) -> int:
+    try:
+        return int(decode_access_token(token))
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+async def get_request_token(
     request: Request,
     cred: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
 ) -> str:
+    # async so async routers resolve auth without a threadpool hop.
     if cred and cred.credentials:
         return cred.credentials
 
@@ -34,22 +61,77 @@ def get_request_token(
     raise HTTPException(status_code=401, detail="Not authenticated")
 
 
-def get_current_user(
-    token: str = Depends(get_request_token),
-    db: Session = Depends(get_db),
-) -> User:
+def get_read_db(token: str = Depends(get_request_token)) -> Session:
+    # Stats/list GETs: replica unless this user wrote within the staleness window.
+    db = read_sessionmaker(_user_id_from_token(token))()
     try:
-        user_id = int(decode_access_token(token))
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        use_report_isolation(db)
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(token: str = Depends(get_request_token)) -> AsyncIterator[AsyncSession]:
+    async with async_read_sessionmaker(_user_id_from_token(token))() as db:
+        await use_report_isolation_async(db)
+        yield db
+
 
-    user = db.get(User, user_id)
+def _ensure_active_user(user: User | None) -> User:
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="User inactive")
     return user
 
 
-def require_admin_user(current_user: User = Depends(get_current_user)) -> User:
+def _load_current_user(token: str, db: Session) -> User:
+    user_id = _user_id_from_token(token)
+    user = _ensure_active_user(db.get(User, user_id))
+    # Lets the commit hook attribute writes to this user (read-after-write routing).
+    db.info[SESSION_USER_KEY] = user.id
+    return user
+
+
+def get_current_user(
+    token: str = Depends(get_request_token),
+    db: Session = Depends(get_db),
+) -> User:
+    return _load_current_user(token, db)
+
+
+def get_current_user_balance(
+    token: str = Depends(get_request_token),
+    db: Session = Depends(get_balance_db),
+) -> User:
+    # Same session as the balance-checking route, so the user row is read at its level too.
+    return _load_current_user(token, db)
+
+
+def get_current_user_read(
+    token: str = Depends(get_request_token),
+    db: Session = Depends(get_read_db),
+) -> User:
+    user_id = _user_id_from_token(token)
+    return _ensure_active_user(db.get(User, user_id))
+
+
+async def get_current_user_async(
+    token: str = Depends(get_request_token),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> User:
+    # Async routers are the read-only ones, so the user row is read from the same (read) session.
+    user_id = _user_id_from_token(token)
+    return _ensure_active_user(await db.get(User, user_id))
+
+
+def _ensure_admin(current_user: User) -> User:
     if getattr(current_user, "role", User.ROLE_USER) != User.ROLE_ADMIN:
         raise HTTPException(status_code=403, detail="Admin only")
     return current_user
+
+
+def require_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    return _ensure_admin(current_user)
+
+
+async def require_admin_user_async(current_user: User = Depends(get_current_user_async)) -> User:
+    return _ensure_admin(current_user)
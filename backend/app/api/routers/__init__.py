@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routers import auth, bank_accounts, categories, stats, transactions, transfers, users, transaction_audit_logs, travel_plans, commute_cards, ticket_commutes
+from app.api.routers import auth, bank_accounts, categories, stats, transactions, transfers, users, transaction_audit_logs, travel_plans, commute_cards, ticket_commutes, metrics, ledger_history, calendar
 
 api_router = APIRouter()
 api_router.include_router(auth.router)
@@ -14,3 +14,6 @@ api_router.include_router(transaction_audit_logs.router)
 api_router.include_router(travel_plans.router)
 api_router.include_router(commute_cards.router)
 api_router.include_router(ticket_commutes.router)
+api_router.include_router(calendar.router)
+api_router.include_router(metrics.router)
+api_router.include_router(ledger_history.router)
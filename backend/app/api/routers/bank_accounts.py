@@ -1,13 +1,39 @@
 from __future__ import annotations
 
+from datetime import date, datetime, timedelta, timezone
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, select
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import (
+    get_async_read_db,
+    get_current_user,
+    get_current_user_async,
+    get_current_user_read,
+    get_db,
+    get_read_db,
+)
+from app.core.balance_history import (
+    base_cents,
+    cumulative_points,
+    cumulative_window,
+    ensure_checkpoints,
+    month_start,
+    snapshot_checkpoints,
+)
+from app.core.credit_card_statements import minimum_due, payment_status, payments_after_close, statement_cycles
+from app.core.datetime_utils import local_to_utc_naive, user_zone
+from app.core.rank import RANK_MAX_LENGTH, even_keys, key_between, reorder_keys
+from app.db.unit_of_work import retry_on_transient_errors
 from app.models.bank_account import BankAccount
 from app.models.user import User
 from app.schemas.bank_account import (
+    BalanceHistoryOut,
+    BalanceHistoryPoint,
+    CreditCardCycleOut,
+    CreditCardCyclesOut,
     BankAccountCreate,
     BankAccountOut,
     BankAccountReorderRequest,
@@ -16,6 +42,11 @@ from app.schemas.bank_account import (
 
 router = APIRouter(prefix="/config/bank-accounts", tags=["config"])
 
+# Balance history series length limits.
+_HISTORY_MAX_DAYS = 366
+_HISTORY_MAX_MONTHS = 120
+_CYCLES_MAX = 60
+
 
 def _validate_bank_account_fields(
     *, kind: str, billing_day: int | None, repayment_day: int | None
@@ -31,20 +62,56 @@ def _validate_bank_account_fields(
             raise HTTPException(status_code=400, detail="Debit account must not set billingDay/repaymentDay")
 
 
+# List order: pinned first, then fractional sort key (app/core/rank.py), newest first on ties.
+_LIST_ORDER = (BankAccount.is_pinned.desc(), BankAccount.sort_key.asc(), BankAccount.id.desc())
+
+
+def _respace_sort_keys(db: Session, user_id: int) -> None:
+    rows = db.scalars(select(BankAccount).where(BankAccount.user_id == user_id).order_by(*_LIST_ORDER)).all()
+    for row, key in zip(rows, even_keys(len(rows))):
+        row.sort_key = key
+    db.flush()
+
+
+def _edge_sort_key(db: Session, user_id: int, *, first: bool) -> str:
+    """A key before (first) or after all of the user's accounts; only the caller's row is written."""
+    for _ in range(2):
+        edge_func = func.min if first else func.max
+        edge = db.scalar(select(edge_func(BankAccount.sort_key)).where(BankAccount.user_id == user_id))
+        key = key_between(None, edge) if first else key_between(edge, None)
+        if len(key) <= RANK_MAX_LENGTH:
+            return key
+        # Keys at this end got too long: respace once, then retry.
+        _respace_sort_keys(db, user_id)
+    raise RuntimeError("Could not allocate a bank account sort key")
+
+
+def _list_position(db: Session, row: BankAccount) -> int:
+    ahead = or_(
+        BankAccount.sort_key < row.sort_key,
+        and_(BankAccount.sort_key == row.sort_key, BankAccount.id > row.id),
+    )
+    if not row.is_pinned:
+        ahead = or_(BankAccount.is_pinned == True, and_(BankAccount.is_pinned == False, ahead))  # noqa: E712
+    else:
+        ahead = and_(BankAccount.is_pinned == True, ahead)  # noqa: E712
+    return int(db.scalar(select(func.count(BankAccount.id)).where(BankAccount.user_id == row.user_id, ahead)) or 0)
+
+
 @router.get("", response_model=list[BankAccountOut])
-def list_bank_accounts(
+async def list_bank_accounts(
     orderBy: str | None = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ) -> list[BankAccountOut]:
     base = select(BankAccount).where(BankAccount.user_id == current_user.id)
 
     # `orderBy` is kept for backward compatibility. Bank account lists now always
     # follow user-defined order with pinned accounts first.
     _ = orderBy
-    query = base.order_by(BankAccount.is_pinned.desc(), BankAccount.sort_order.asc(), BankAccount.id.desc())
+    query = base.order_by(*_LIST_ORDER)
 
-    rows = db.scalars(query).all()
+    rows = (await db.scalars(query)).all()
     return [
         BankAccountOut(
             id=r.id,
@@ -55,15 +122,17 @@ def list_bank_accounts(
             balanceCents=r.balance_cents,
             billingDay=r.billing_day,
             repaymentDay=r.repayment_day,
-            sortOrder=r.sort_order,
+            sortOrder=i,
+            sortKey=r.sort_key,
             isPinned=r.is_pinned,
             isActive=r.is_active,
         )
-        for r in rows
+        for i, r in enumerate(rows)
     ]
 
 
 @router.post("", response_model=BankAccountOut)
+@retry_on_transient_errors
 def create_bank_account(
     payload: BankAccountCreate,
     db: Session = Depends(get_db),
@@ -71,9 +140,6 @@ def create_bank_account(
 ) -> BankAccountOut:
     _validate_bank_account_fields(kind=payload.kind, billing_day=payload.billingDay, repayment_day=payload.repaymentDay)
 
-    max_sort_order = db.scalar(select(func.max(BankAccount.sort_order)).where(BankAccount.user_id == current_user.id))
-    next_sort_order = (max_sort_order if max_sort_order is not None else -1) + 1
-
     row = BankAccount(
         user_id=current_user.id,
         bank_name=payload.bankName,
@@ -81,9 +147,10 @@ def create_bank_account(
         last4=payload.last4,
         kind=payload.kind,
         balance_cents=payload.balanceCents,
+        opening_balance_cents=payload.balanceCents,
         billing_day=payload.billingDay,
         repayment_day=payload.repaymentDay,
-        sort_order=next_sort_order,
+        sort_key=_edge_sort_key(db, current_user.id, first=False),
         is_pinned=False,
         is_active=payload.isActive,
     )
@@ -100,13 +167,15 @@ def create_bank_account(
         balanceCents=row.balance_cents,
         billingDay=row.billing_day,
         repaymentDay=row.repayment_day,
-        sortOrder=row.sort_order,
+        sortOrder=_list_position(db, row),
+        sortKey=row.sort_key,
         isPinned=row.is_pinned,
         isActive=row.is_active,
     )
 
 
 @router.patch("/{bank_account_id}", response_model=BankAccountOut)
+@retry_on_transient_errors
 def update_bank_account(
     bank_account_id: int,
     payload: BankAccountUpdate,
@@ -136,6 +205,8 @@ def update_bank_account(
     if payload.kind is not None:
         row.kind = payload.kind
     if payload.balanceCents is not None:
+        # A manual edit moves the baseline too, so reconciliation does not undo it.
+        row.opening_balance_cents += payload.balanceCents - row.balance_cents
         row.balance_cents = payload.balanceCents
     if next_kind == "debit":
         row.billing_day = None
@@ -159,13 +230,15 @@ def update_bank_account(
         balanceCents=row.balance_cents,
         billingDay=row.billing_day,
         repaymentDay=row.repayment_day,
-        sortOrder=row.sort_order,
+        sortOrder=_list_position(db, row),
+        sortKey=row.sort_key,
         isPinned=row.is_pinned,
         isActive=row.is_active,
     )
 
 
 @router.post("/reorder")
+@retry_on_transient_errors
 def reorder_bank_accounts(
     payload: BankAccountReorderRequest,
     db: Session = Depends(get_db),
@@ -181,16 +254,20 @@ def reorder_bank_accounts(
     if set(payload_ids) != set(all_ids):
         raise HTTPException(status_code=400, detail="Reorder payload must include all bank account ids")
 
-    order_map = {account_id: idx for idx, account_id in enumerate(payload_ids)}
-    for row in rows:
-        row.sort_order = order_map[row.id]
-        db.add(row)
+    # Keep the keys of accounts already in relative order; a single drag rewrites one row.
+    rows_by_id = {r.id: r for r in rows}
+    ordered = [rows_by_id[account_id] for account_id in payload_ids]
+    new_keys = reorder_keys([r.sort_key for r in ordered]) or even_keys(len(ordered))
+    for row, key in zip(ordered, new_keys):
+        if row.sort_key != key:
+            row.sort_key = key
 
     db.commit()
     return {"ok": True}
 
 
 @router.post("/{bank_account_id}/pin", response_model=BankAccountOut)
+@retry_on_transient_errors
 def pin_bank_account(
     bank_account_id: int,
     db: Session = Depends(get_db),
@@ -200,8 +277,7 @@ def pin_bank_account(
     if not row or row.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Bank account not found")
 
-    min_sort_order = db.scalar(select(func.min(BankAccount.sort_order)).where(BankAccount.user_id == current_user.id))
-    row.sort_order = (min_sort_order if min_sort_order is not None else 0) - 1
+    row.sort_key = _edge_sort_key(db, current_user.id, first=True)
     row.is_pinned = True
     db.add(row)
     db.commit()
@@ -216,13 +292,15 @@ def pin_bank_account(
         balanceCents=row.balance_cents,
         billingDay=row.billing_day,
         repaymentDay=row.repayment_day,
-        sortOrder=row.sort_order,
+        sortOrder=_list_position(db, row),
+        sortKey=row.sort_key,
         isPinned=row.is_pinned,
         isActive=row.is_active,
     )
 
 
 @router.post("/{bank_account_id}/unpin", response_model=BankAccountOut)
+@retry_on_transient_errors
 def unpin_bank_account(
     bank_account_id: int,
     db: Session = Depends(get_db),
@@ -232,8 +310,7 @@ def unpin_bank_account(
     if not row or row.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Bank account not found")
 
-    max_sort_order = db.scalar(select(func.max(BankAccount.sort_order)).where(BankAccount.user_id == current_user.id))
-    row.sort_order = (max_sort_order if max_sort_order is not None else -1) + 1
+    row.sort_key = _edge_sort_key(db, current_user.id, first=False)
     row.is_pinned = False
     db.add(row)
     db.commit()
@@ -248,7 +325,131 @@ def unpin_bank_account(
         balanceCents=row.balance_cents,
         billingDay=row.billing_day,
         repaymentDay=row.repayment_day,
-        sortOrder=row.sort_order,
+        sortOrder=_list_position(db, row),
+        sortKey=row.sort_key,
         isPinned=row.is_pinned,
         isActive=row.is_active,
     )
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+@router.get("/{bank_account_id}/balance-history", response_model=BalanceHistoryOut)
+def get_balance_history(
+    bank_account_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    granularity: str = "day",
+    # Read session: ensure_checkpoints stores missing checkpoints in its own primary transaction, but the
+    # series is computed from this session's snapshot alone (snapshot_checkpoints).
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_read),
+) -> BalanceHistoryOut:
+    if granularity not in ("day", "month"):
+        raise HTTPException(status_code=400, detail="Invalid granularity")
+
+    row = db.get(BankAccount, bank_account_id)
+    if not row or row.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Bank account not found")
+
+    # Buckets are local days/months of the user; each point is the balance at bucket end.
+    zone = user_zone(current_user.time_zone)
+    now = datetime.now(timezone.utc)
+    if end is None:
+        end = now.astimezone(zone).date()
+    if granularity == "day":
+        if start is None:
+            start = end - timedelta(days=29)
+        buckets = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        limit = _HISTORY_MAX_DAYS
+    else:
+        start = start.replace(day=1) if start is not None else _add_months(end, -11)
+        buckets = []
+        cursor = start
+        while cursor <= end:
+            buckets.append(cursor)
+            cursor = _add_months(cursor, 1)
+        limit = _HISTORY_MAX_MONTHS
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if len(buckets) > limit:
+        raise HTTPException(status_code=400, detail="Date range too large")
+
+    step = (lambda d: d + timedelta(days=1)) if granularity == "day" else (lambda d: _add_months(d, 1))
+    bounds = [buckets[0], *(step(b) for b in buckets)]
+    instants = [local_to_utc_naive(datetime(b.year, b.month, b.day), zone) for b in bounds]
+
+    upto = month_start(now.replace(tzinfo=None))
+    ensure_checkpoints(int(row.id), upto)
+    checkpoints = snapshot_checkpoints(db, row, upto)
+    base = base_cents(db, row, checkpoints, upto)
+    # Days: one running sum over the range. Months: each boundary from its nearest checkpoint.
+    if granularity == "day":
+        cumulative = cumulative_window(db, row, checkpoints, instants)
+    else:
+        cumulative = cumulative_points(db, row, checkpoints, instants)
+    balances = [base + c for c in cumulative]
+
+    return BalanceHistoryOut(
+        bankAccountId=int(row.id),
+        granularity=granularity,
+        start=start,
+        end=end,
+        points=[
+            BalanceHistoryPoint(
+                date=bucket,
+                balanceCents=balances[i + 1],
+                changeCents=balances[i + 1] - balances[i],
+            )
+            for i, bucket in enumerate(buckets)
+        ],
+    )
+
+
+@router.get("/{bank_account_id}/cycles", response_model=CreditCardCyclesOut)
+def get_credit_card_cycles(
+    bank_account_id: int,
+    limit: int = 12,
+    # Read session: missing closed cycles are cached by closed_cycles in its own primary transaction.
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_read),
+) -> CreditCardCyclesOut:
+    if limit < 1 or limit > _CYCLES_MAX:
+        raise HTTPException(status_code=400, detail="Invalid limit")
+
+    row = db.get(BankAccount, bank_account_id)
+    if not row or row.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Bank account not found")
+    if row.kind != "credit" or row.billing_day is None or row.repayment_day is None:
+        raise HTTPException(status_code=400, detail="Bank account is not a credit card")
+
+    zone = user_zone(current_user.time_zone)
+    today = datetime.now(timezone.utc).astimezone(zone).date()
+    # Newest first: the open cycle, then the most recent statements.
+    cycles = statement_cycles(db, row, zone, today)[-limit:][::-1]
+    paid = payments_after_close(db, row, [c for c in cycles if not c["is_open"]], zone)
+    paid_by_cycle = iter(paid)
+
+    items = []
+    for cycle in cycles:
+        paid_cents = 0 if cycle["is_open"] else next(paid_by_cycle)
+        items.append(
+            CreditCardCycleOut(
+                cycleStart=cycle["cycle_start"],
+                statementDate=cycle["statement_date"],
+                dueDate=cycle["due_date"],
+                isClosed=not cycle["is_open"],
+                previousBalanceCents=cycle["previous_balance_cents"],
+                chargesCents=cycle["charges_cents"],
+                creditsCents=cycle["credits_cents"],
+                paymentsCents=cycle["payments_cents"],
+                statementBalanceCents=cycle["statement_balance_cents"],
+                minimumDueCents=0 if cycle["is_open"] else minimum_due(cycle["statement_balance_cents"]),
+                paidCents=paid_cents,
+                status=payment_status(cycle, paid_cents, today),
+            )
+        )
+    return CreditCardCyclesOut(bankAccountId=int(bank_account_id), cycles=items)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user_read, get_read_db
+from app.core.commute_reservations import reservation_out
+from app.core.datetime_utils import month_bounds
+from app.core.etag import etag_matches
+from app.models.commute_reservation import CommuteReservation
+from app.models.travel_plan import TravelPlan
+from app.models.user import User
+from app.schemas.travel_plan import ToolsCalendarOut, TravelPlanDayOut
+
+router = APIRouter(prefix="/tools/calendar", tags=["tools"])
+
+
+@router.get("", response_model=ToolsCalendarOut)
+def get_calendar(
+    year: int,
+    month: int,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_read),
+) -> Response:
+    """Plans (rest days included) and every reservation, card or ticket, of one month.
+
+    Both reads are range seeks on the (user_id, date) unique indexes. The ETag is a hash of
+    the body, so an unchanged month revalidates with a 304 and no payload.
+    """
+    start, end = month_bounds(year, month)
+
+    plans = db.scalars(
+        select(TravelPlan)
+        .where(
+            TravelPlan.user_id == current_user.id,
+            TravelPlan.plan_date >= start,
+            TravelPlan.plan_date < end,
+        )
+        .order_by(TravelPlan.plan_date.asc(), TravelPlan.id.asc())
+    ).all()
+    reservations = db.scalars(
+        select(CommuteReservation)
+        .where(
+            CommuteReservation.user_id == current_user.id,
+            CommuteReservation.ride_date >= start,
+            CommuteReservation.ride_date < end,
+        )
+        .order_by(CommuteReservation.ride_date.asc(), CommuteReservation.departure_time.asc(), CommuteReservation.id.asc())
+    ).all()
+
+    out = ToolsCalendarOut(
+        year=year,
+        month=month,
+        plans=[TravelPlanDayOut(date=r.plan_date, is_rest_day=bool(r.is_rest_day), am=r.am, pm=r.pm) for r in plans],
+        rest_days=[r.plan_date for r in plans if r.is_rest_day],
+        reservations=[reservation_out(r) for r in reservations],
+    )
+    body = out.model_dump_json().encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    # Private: the body is per user. no-cache: always revalidate, usually into a 304.
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,10 +1,22 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import Select, func, select
+from sqlalchemy import Select, and_, case, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import (
+    get_async_read_db,
+    get_current_user,
+    get_current_user_async,
+    get_current_user_read,
+    get_db,
+    get_read_db,
+)
+from app.core.audit_log import add_transaction_audit_log, category_merge_summary
+from app.core.category_graph import CategoryGraph, category_graph
+from app.core.rank import RANK_MAX_LENGTH, even_keys, key_between
+from app.db.unit_of_work import retry_on_transient_errors
 from app.models.category import Category
 from app.models.category_tag import CategoryTag
 from app.models.transaction import Transaction
@@ -34,6 +46,35 @@ def _ensure_first_level_expense_category(db: Session, current_user: User, catego
     return row
 
 
+def _place_among_siblings(
+    db: Session, graph: CategoryGraph, row: Category, parent_id: int | None, index: int | None
+) -> int:
+    """Give `row` a sort key at `index` (None = last) among its new siblings; returns the index.
+
+    Only `row` is written, unless the neighbouring keys leave no room (very long or
+    equal keys), in which case the sibling group is respaced once.
+    """
+    siblings = [n for n in graph.children(parent_id, row.type) if n.id != row.id]
+    index = len(siblings) if index is None else min(max(index, 0), len(siblings))
+    lower = siblings[index - 1].sort_key if index > 0 else None
+    upper = siblings[index].sort_key if index < len(siblings) else None
+    try:
+        key = key_between(lower, upper)
+    except ValueError:
+        key = None
+    if key is not None and len(key) <= RANK_MAX_LENGTH:
+        row.sort_key = key
+        return index
+
+    ids = [n.id for n in siblings]
+    rows = {r.id: r for r in db.scalars(select(Category).where(Category.id.in_(ids))).all()}
+    ids.insert(index, row.id)
+    rows[row.id] = row
+    for category_id, key in zip(ids, even_keys(len(ids))):
+        rows[category_id].sort_key = key
+    return index
+
+
 def _build_tree(rows: list[Category]) -> list[CategoryNodeOut]:
     nodes: dict[int, CategoryNodeOut] = {}
     for r in rows:
@@ -42,7 +83,8 @@ def _build_tree(rows: list[Category]) -> list[CategoryNodeOut]:
             type=r.type,
             name=r.name,
             parentId=r.parent_id,
-            sortOrder=r.sort_order,
+            sortOrder=0,  # position among siblings, set below
+            sortKey=r.sort_key,
             isActive=r.is_active,
             isLeaf=True,  # temporary, recomputed later
             children=[],
@@ -57,23 +99,27 @@ def _build_tree(rows: list[Category]) -> list[CategoryNodeOut]:
             roots.append(node)
 
     def finalize(n: CategoryNodeOut) -> None:
-        n.children.sort(key=lambda x: (x.sortOrder, x.id))
+        n.children.sort(key=lambda x: (x.sortKey, x.id))
         n.isLeaf = len(n.children) == 0
-        for c in n.children:
+        for i, c in enumerate(n.children):
+            c.sortOrder = i
             finalize(c)
 
-    roots.sort(key=lambda x: (x.sortOrder, x.id))
+    roots.sort(key=lambda x: (x.sortKey, x.id))
+    root_counts: dict[str, int] = {}
     for root in roots:
+        root.sortOrder = root_counts.get(root.type, 0)
+        root_counts[root.type] = root.sortOrder + 1
         finalize(root)
 
     return roots
 
 
 @router.get("/tree", response_model=list[CategoryNodeOut])
-def get_category_tree(
+async def get_category_tree(
     type: str | None = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ) -> list[CategoryNodeOut]:
     stmt: Select[tuple[Category]] = select(Category).where(Category.user_id == current_user.id)
     if type:
@@ -81,7 +127,7 @@ def get_category_tree(
             raise HTTPException(status_code=400, detail="Invalid type")
         stmt = stmt.where(Category.type == type)
 
-    rows = db.scalars(stmt.order_by(Category.sort_order.asc(), Category.id.asc())).all()
+    rows = (await db.scalars(stmt.order_by(Category.sort_key.asc(), Category.id.asc()))).all()
     return _build_tree(rows)
 
 
@@ -94,10 +140,11 @@ def create_category(
     if payload.type not in ("income", "expense"):
         raise HTTPException(status_code=400, detail="Invalid type")
 
+    graph = category_graph(db, current_user.id)
     parent_id: int | None = None
     if payload.parentId is not None:
-        parent = db.get(Category, payload.parentId)
-        if not parent or parent.user_id != current_user.id:
+        parent = graph.get(payload.parentId)
+        if not parent:
             raise HTTPException(status_code=400, detail="Invalid parentId")
         if not parent.is_active:
             raise HTTPException(status_code=400, detail="Parent category is inactive")
@@ -105,30 +152,15 @@ def create_category(
             raise HTTPException(status_code=400, detail="Income/expense type mismatch")
         parent_id = parent.id
 
-    sort_order: int
-    if payload.sortOrder is not None:
-        sort_order = payload.sortOrder
-    else:
-        max_sort = db.scalar(
-            select(func.max(Category.sort_order)).where(
-                Category.user_id == current_user.id,
-                Category.type == payload.type,
-                Category.parent_id == parent_id,
-            )
-        )
-        if max_sort is None:
-            sort_order = 0
-        else:
-            sort_order = int(max_sort) + 10
-
     row = Category(
         user_id=current_user.id,
         type=payload.type,
         name=payload.name,
         parent_id=parent_id,
-        sort_order=sort_order,
         is_active=payload.isActive,
     )
+    # sortOrder is the position among siblings; omitted = last
+    position = _place_among_siblings(db, graph, row, parent_id, payload.sortOrder)
     db.add(row)
     db.commit()
     db.refresh(row)
@@ -138,7 +170,8 @@ def create_category(
         type=row.type,
         name=row.name,
         parentId=row.parent_id,
-        sortOrder=row.sort_order,
+        sortOrder=position,
+        sortKey=row.sort_key,
         isActive=row.is_active,
         isLeaf=True,
         children=[],
@@ -149,8 +182,8 @@ def create_category(
 def list_category_tags(
     category_id: int,
     activeOnly: bool = True,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_read),
 ) -> list[CategoryTagOut]:
     category = _ensure_first_level_expense_category(db, current_user, category_id)
 
@@ -254,7 +287,7 @@ def update_category(
     if payload.name is not None:
         row.name = payload.name
     if payload.sortOrder is not None:
-        row.sort_order = payload.sortOrder
+        _place_among_siblings(db, category_graph(db, current_user.id), row, row.parent_id, payload.sortOrder)
     if payload.isActive is not None:
         row.is_active = payload.isActive
 
@@ -262,23 +295,18 @@ def update_category(
     db.commit()
     db.refresh(row)
 
-    has_child = (
-        db.scalar(
-            select(Category.id)
-            .where(Category.user_id == current_user.id, Category.parent_id == row.id)
-            .limit(1)
-        )
-        is not None
-    )
+    graph = category_graph(db, current_user.id)
+    siblings = graph.children(row.parent_id, row.type)
 
     return CategoryNodeOut(
         id=row.id,
         type=row.type,
         name=row.name,
         parentId=row.parent_id,
-        sortOrder=row.sort_order,
+        sortOrder=next((i for i, n in enumerate(siblings) if n.id == row.id), 0),
+        sortKey=row.sort_key,
         isActive=row.is_active,
-        isLeaf=not has_child,
+        isLeaf=graph.is_leaf(row.id),
         children=[],
     )
 
@@ -293,12 +321,7 @@ def delete_category(
     if not row or row.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    has_child = db.scalar(
-        select(Category.id)
-        .where(Category.user_id == current_user.id, Category.parent_id == row.id, Category.is_active == True)
-        .limit(1)  # noqa: E712
-    )
-    if has_child is not None:
+    if category_graph(db, current_user.id).has_active_child(row.id):
         raise HTTPException(status_code=400, detail="Category has children; delete/disable children first")
 
     referenced = (
@@ -331,76 +354,188 @@ def move_category(
     if not row or row.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Category not found")
 
+    graph = category_graph(db, current_user.id)
     new_parent_id: int | None = None
     if payload.parentId is not None:
         if payload.parentId == row.id:
             raise HTTPException(status_code=400, detail="parentId must not be self")
 
-        parent = db.get(Category, payload.parentId)
-        if not parent or parent.user_id != current_user.id:
+        parent = graph.get(payload.parentId)
+        if not parent:
             raise HTTPException(status_code=400, detail="Invalid parentId")
         if parent.type != row.type:
             raise HTTPException(status_code=400, detail="Income/expense type mismatch")
         if not parent.is_active:
             raise HTTPException(status_code=400, detail="Parent category is inactive")
 
-        # Prevent cycles: walk up from parent to root
-        cursor = parent
-        while cursor.parent_id is not None:
-            if cursor.parent_id == row.id:
-                raise HTTPException(status_code=400, detail="Cannot move under descendant")
-            cursor = db.get(Category, cursor.parent_id)
-            if not cursor:
-                break
+        # Prevent cycles: the new parent must not sit below the moved category
+        if row.id in graph.ancestor_ids(parent.id):
+            raise HTTPException(status_code=400, detail="Cannot move under descendant")
 
         new_parent_id = parent.id
 
-    old_parent_id = row.parent_id
-    old_parent_changed = old_parent_id != new_parent_id
+    # Only the moved row gets a new key; the old and new siblings keep theirs.
+    _place_among_siblings(db, graph, row, new_parent_id, payload.index)
+    row.parent_id = new_parent_id
+    db.commit()
 
-    # Load siblings in target parent
-    siblings = db.scalars(
-        select(Category)
-        .where(
-            Category.user_id == current_user.id,
-            Category.type == row.type,
-            Category.parent_id == new_parent_id,
-        )
-        .order_by(Category.sort_order.asc(), Category.id.asc())
-    ).all()
+    return {"ok": True}
 
-    # Remove row if it is already in the list
-    siblings = [s for s in siblings if s.id != row.id]
 
-    insert_index = payload.index
-    if insert_index < 0:
-        insert_index = 0
-    if insert_index > len(siblings):
-        insert_index = len(siblings)
+# Transaction ids per summarizing audit entry of a merge.
+_MERGE_AUDIT_BATCH = 1000
 
-    siblings.insert(insert_index, row)
 
-    # Re-assign sort_order with gaps to reduce churn
-    for i, s in enumerate(siblings):
-        s.sort_order = i * 10
-        if s.id == row.id:
-            s.parent_id = new_parent_id
+@router.post("/{category_id}/merge-into/{target_id}")
+@retry_on_transient_errors
+def merge_category(
+    category_id: int,
+    target_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> dict:
+    graph = category_graph(db, current_user.id)
+    source = graph.get(category_id)
+    if not source:
+        raise HTTPException(status_code=404, detail="Category not found")
+    target = graph.get(target_id)
+    if not target:
+        raise HTTPException(status_code=400, detail="Invalid target category")
+    if target.id == source.id:
+        raise HTTPException(status_code=400, detail="Cannot merge a category into itself")
+    if target.type != source.type:
+        raise HTTPException(status_code=400, detail="Income/expense type mismatch")
+    if not target.is_active:
+        raise HTTPException(status_code=400, detail="Target category is inactive")
+    if not graph.is_leaf(source.id) or not graph.is_leaf(target.id):
+        raise HTTPException(status_code=400, detail="Only leaf categories can be merged")
+
+    # Writes are set-based against these subqueries. Only the moved ids are read into
+    # Python, once, because the audit summary lists them.
+    source_expense_ids = select(Transaction.id).where(
+        Transaction.user_id == current_user.id,
+        Transaction.category_id == source.id,
+        Transaction.type != "refund",
+    )
+    moved = or_(
+        Transaction.category_id == source.id,
+        and_(Transaction.type == "refund", Transaction.refund_of_transaction_id.in_(source_expense_ids)),
+    )
+    moved_ids = list(
+        db.scalars(
+            select(Transaction.id).where(Transaction.user_id == current_user.id, moved).order_by(Transaction.id)
+        ).all()
+    )
+    moved_ids_query = select(Transaction.id).where(Transaction.user_id == current_user.id, moved)
+
+    # Tags hang off first-level expense categories; when the merge crosses to another one,
+    # the moved transactions' tags follow by name.
+    tag_id_map: dict[int, int] = {}
+    rehome_ids: list[int] = []
+    source_top = graph.top_level(source.id)
+    target_top = graph.top_level(target.id)
+    if source_top is not None and (target_top is None or target_top.id != source_top.id):
+        used_tag_ids = set(
+            db.scalars(
+                select(TransactionTag.tag_id)
+                .where(TransactionTag.transaction_id.in_(moved_ids_query))
+                .distinct()
+            ).all()
+        )
+        source_tags = [t for t in graph.tags.values() if t.category_id == source_top.id]
+        if source_top.id == source.id:
+            # The source itself is the first-level category: its tags move with it.
+            used_tag_ids = {t.id for t in source_tags}
+        source_tags = [t for t in source_tags if t.id in used_tag_ids]
+        if source_tags and target_top is None:
+            raise HTTPException(status_code=400, detail="Target category cannot hold the source tags")
+
+        target_tags = {t.name: t.id for t in graph.tags.values() if target_top and t.category_id == target_top.id}
+        rehome_ids = [t.id for t in source_tags if source_top.id == source.id and t.name not in target_tags]
+        if rehome_ids:
+            db.execute(
+                update(CategoryTag)
+                .where(CategoryTag.id.in_(rehome_ids))
+                .values(category_id=target_top.id)
+                .execution_options(synchronize_session=False)
+            )
+        missing = [t for t in source_tags if t.name not in target_tags and t.id not in rehome_ids]
+        if missing:
+            # One multi-row INSERT; RETURNING hands back the new ids by name.
+            created = db.execute(
+                insert(CategoryTag).returning(CategoryTag.name, CategoryTag.id),
+                [
+                    {"user_id": current_user.id, "category_id": target_top.id, "name": t.name, "is_active": t.is_active}
+                    for t in missing
+                ],
+            ).all()
+            target_tags.update({name: int(tag_id) for name, tag_id in created})
+        tag_id_map = {t.id: target_tags[t.name] for t in source_tags if t.id not in rehome_ids}
+
+        if tag_id_map:
+            db.execute(
+                update(TransactionTag)
+                .where(
+                    TransactionTag.tag_id.in_(list(tag_id_map)),
+                    TransactionTag.transaction_id.in_(moved_ids_query),
+                )
+                .values(tag_id=case(tag_id_map, value=TransactionTag.tag_id))
+                .execution_options(synchronize_session=False)
+            )
+            if source_top.id == source.id:
+                # Same-name duplicates left on the disabled source are no longer referenced.
+                db.execute(
+                    update(CategoryTag)
+                    .where(CategoryTag.id.in_(list(tag_id_map)))
+                    .values(is_active=False)
+                    .execution_options(synchronize_session=False)
+                )
+
+    # Refunds follow their original expense, so move them before the originals change.
+    # Only category_id changes, which no balance checkpoint or card statement depends on.
+    moved_refunds = db.execute(
+        update(Transaction)
+        .where(
+            Transaction.user_id == current_user.id,
+            Transaction.type == "refund",
+            Transaction.refund_of_transaction_id.in_(source_expense_ids),
+        )
+        .values(category_id=target.id)
+        .execution_options(synchronize_session=False, history_unaffected=True)
+    ).rowcount
+    moved_transactions = db.execute(
+        update(Transaction)
+        .where(Transaction.user_id == current_user.id, Transaction.category_id == source.id)
+        .values(category_id=target.id)
+        .execution_options(synchronize_session=False, history_unaffected=True)
+    ).rowcount
+
+    for i in range(0, len(moved_ids), _MERGE_AUDIT_BATCH):
+        before, after = category_merge_summary(
+            source_id=source.id,
+            target_id=target.id,
+            transaction_ids=moved_ids[i : i + _MERGE_AUDIT_BATCH],
+            tag_id_map=tag_id_map,
+        )
+        add_transaction_audit_log(
+            db,
+            action="update",
+            actor_user_id=current_user.id,
+            target_user_id=current_user.id,
+            transaction_id=None,
+            tx_type=source.type,
+            before=before,
+            after=after,
+        )
 
+    row = db.get(Category, source.id)
+    row.is_active = False
     db.commit()
 
-    # If moved across parents, also re-pack old parent's remaining siblings a bit
-    if old_parent_changed:
-        old_siblings = db.scalars(
-            select(Category)
-            .where(
-                Category.user_id == current_user.id,
-                Category.type == row.type,
-                Category.parent_id == old_parent_id,
-            )
-            .order_by(Category.sort_order.asc(), Category.id.asc())
-        ).all()
-        for i, s in enumerate(old_siblings):
-            s.sort_order = i * 10
-        db.commit()
-
-    return {"ok": True}
+    return {
+        "ok": True,
+        "movedTransactions": int(moved_transactions or 0),
+        "movedRefunds": int(moved_refunds or 0),
+        "remappedTags": len(tag_id_map),
+        "rehomedTags": len(rehome_ids),
+    }
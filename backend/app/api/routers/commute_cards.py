@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import base64
 from datetime import date, datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_current_user_read, get_db, get_read_db
+from app.core.commute_reservations import flush_reservations, reservation_out, slot_conflict_error
 from app.models.commute_card import CommuteCard
 from app.models.commute_reservation import CommuteReservation
 from app.models.user import User
@@ -14,6 +16,8 @@ from app.schemas.commute_card import (
     CommuteCardCreate,
     CommuteCardListOut,
     CommuteCardOut,
+    CommuteReservationBatchCreate,
+    CommuteReservationBatchOut,
     CommuteReservationCreate,
     CommuteReservationOut,
     CommuteReservationUpdate,
@@ -21,6 +25,10 @@ from app.schemas.commute_card import (
 
 router = APIRouter(prefix="/tools/commute-cards", tags=["tools"])
 
+CARD_STATUSES = ("draft", "active", "expired", "used-up")
+# Cards the page shows by default: not yet used, or still inside their window.
+LIVE_CARD_STATUSES = ("draft", "active")
+
 
 def _utc_now_naive() -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -31,8 +39,16 @@ def _travel_slot_from_time(departure_time: str) -> str:
     return "am" if hour < 12 else "pm"
 
 
-def _card_with_user_or_404(db: Session, current_user: User, card_id: int) -> CommuteCard:
-    card = db.scalar(select(CommuteCard).where(CommuteCard.id == card_id, CommuteCard.user_id == current_user.id))
+def _card_with_user_or_404(db: Session, current_user: User, card_id: int, *, lock: bool = False) -> CommuteCard:
+    query = select(CommuteCard).where(CommuteCard.id == card_id, CommuteCard.user_id == current_user.id)
+    if lock:
+        # Serializes bookings on one card so the usage aggregate stays valid until commit.
+        query = (
+            query.with_for_update()
+            .with_hint(CommuteCard, "WITH (UPDLOCK, ROWLOCK)", "mssql")
+            .execution_options(populate_existing=True)
+        )
+    card = db.scalar(query)
     if card is None:
         raise HTTPException(status_code=404, detail="Commute card not found")
     return card
@@ -50,125 +66,135 @@ def _reservation_with_user_or_404(db: Session, current_user: User, reservation_i
     return reservation
 
 
-def _validate_card_trip_limit(db: Session, card: CommuteCard, exclude_reservation_id: int | None = None) -> None:
-    count_query = select(func.count(CommuteReservation.id)).where(CommuteReservation.card_id == card.id)
+def _card_usage(
+    db: Session, card: CommuteCard, exclude_reservation_id: int | None = None
+) -> tuple[int, date | None, date | None]:
+    """Reservation count and first/last ride date of a card, in one aggregate."""
+    query = select(
+        func.count(CommuteReservation.id),
+        func.min(CommuteReservation.ride_date),
+        func.max(CommuteReservation.ride_date),
+    ).where(CommuteReservation.card_id == card.id)
     if exclude_reservation_id is not None:
-        count_query = count_query.where(CommuteReservation.id != exclude_reservation_id)
-    existing_count = int(db.scalar(count_query) or 0)
-    if existing_count >= card.trip_count:
-        raise HTTPException(status_code=400, detail="This commute card has no remaining trips")
+        query = query.where(CommuteReservation.id != exclude_reservation_id)
+    count, first, last = db.execute(query).one()
+    return int(count or 0), first, last
 
 
-def _validate_slot_conflict(
-    db: Session,
-    *,
-    current_user: User,
-    ride_date: date,
-    travel_slot: str,
-    exclude_reservation_id: int | None = None,
+def _validate_card_booking(
+    card: CommuteCard, usage: tuple[int, date | None, date | None], ride_dates: list[date], *, new: bool = True
 ) -> None:
-    query = select(CommuteReservation).where(
-        CommuteReservation.user_id == current_user.id,
-        CommuteReservation.ride_date == ride_date,
-        CommuteReservation.travel_slot == travel_slot,
-    )
-    if exclude_reservation_id is not None:
-        query = query.where(CommuteReservation.id != exclude_reservation_id)
+    count, first, last = usage
+    if new and count + len(ride_dates) > card.trip_count:
+        raise HTTPException(status_code=400, detail="This commute card has no remaining trips")
 
-    existing = db.scalar(query)
-    if existing is not None:
-        label = "上午" if travel_slot == "am" else "下午"
-        raise HTTPException(status_code=400, detail=f"该日期的{label}已经有预约了")
+    dates = [item for item in (first, last, *ride_dates) if item is not None]
+    if dates and max(dates) > min(dates) + timedelta(days=29):
+        raise HTTPException(status_code=400, detail="All reservations for the same commute card must stay within 30 days from the first reservation")
 
 
-def _validate_card_window(
-    db: Session,
-    *,
-    card_id: int,
-    proposed_date: date,
-    exclude_reservation_id: int | None = None,
-) -> None:
-    query = select(CommuteReservation).where(CommuteReservation.card_id == card_id)
-    if exclude_reservation_id is not None:
-        query = query.where(CommuteReservation.id != exclude_reservation_id)
+def _set_card_state(card: CommuteCard, usage: tuple[int, date | None, date | None], ride_dates: list[date]) -> None:
+    """Persist the card's used count and effective/expiry dates after the write."""
+    count, first, _ = usage
+    dates = [item for item in (first, *ride_dates) if item is not None]
+    card.used_count = count + len(ride_dates)
+    card.effective_date = min(dates) if dates else None
+    card.expiry_date = card.effective_date + timedelta(days=29) if dates else None
 
-    rows = db.scalars(
-        query.order_by(
-            CommuteReservation.ride_date.asc(),
-            CommuteReservation.departure_time.asc(),
-            CommuteReservation.id.asc(),
-        )
-    ).all()
 
-    dates = [reservation.ride_date for reservation in rows] + [proposed_date]
-    if not dates:
-        return
+def _card_status(card: CommuteCard, today: date) -> str:
+    if card.used_count == 0:
+        return "draft"
+    if card.used_count >= card.trip_count:
+        return "used-up"
+    if card.expiry_date is not None and card.expiry_date < today:
+        return "expired"
+    return "active"
 
-    effective_date = min(dates)
-    expiry_date = effective_date + timedelta(days=29)
-    if any(item_date > expiry_date for item_date in dates):
-        raise HTTPException(status_code=400, detail="All reservations for the same commute card must stay within 30 days from the first reservation")
 
+def _status_filter(status_name: str, today: date):
+    # SQL mirror of _card_status.
+    used = CommuteCard.used_count > 0
+    left = CommuteCard.used_count < CommuteCard.trip_count
+    if status_name == "draft":
+        return CommuteCard.used_count == 0
+    if status_name == "used-up":
+        return and_(used, CommuteCard.used_count >= CommuteCard.trip_count)
+    if status_name == "expired":
+        return and_(used, left, CommuteCard.expiry_date < today)
+    return and_(used, left, CommuteCard.expiry_date >= today)
 
-def _build_card_out(card: CommuteCard, reservations: list[CommuteReservation]) -> CommuteCardOut:
-    reservation_out = [
-        CommuteReservationOut(
-            id=item.id,
-            card_id=item.card_id,
-            ride_date=item.ride_date,
-            departure_time=item.departure_time,
-            travel_slot=item.travel_slot,  # type: ignore[arg-type]
-            direction=item.direction,  # type: ignore[arg-type]
-            train_no=item.train_no,
-            carriage_no=item.carriage_no,
-            seat_no=item.seat_no,
-            created_at=item.created_at,
-        )
-        for item in reservations
-    ]
-
-    effective_date = reservation_out[0].ride_date if reservation_out else None
-    expiry_date = effective_date + timedelta(days=29) if effective_date else None
-    used_count = len(reservation_out)
-    remaining_count = max(0, card.trip_count - used_count)
-    today = date.today()
-
-    if not reservation_out:
-        status_name = "draft"
-    elif remaining_count == 0:
-        status_name = "used-up"
-    elif expiry_date is not None and expiry_date < today:
-        status_name = "expired"
-    else:
-        status_name = "active"
 
+def _encode_cursor(card: CommuteCard) -> str:
+    raw = f"{card.created_at.isoformat()}|{int(card.id)}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, card_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), int(card_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _build_card_out(card: CommuteCard, reservations: list[CommuteReservation]) -> CommuteCardOut:
     return CommuteCardOut(
         id=card.id,
         trip_count=card.trip_count,  # type: ignore[arg-type]
         created_at=card.created_at,
-        effective_date=effective_date,
-        expiry_date=expiry_date,
-        used_count=used_count,
-        remaining_count=remaining_count,
-        status=status_name,  # type: ignore[arg-type]
-        reservations=reservation_out,
+        effective_date=card.effective_date,
+        expiry_date=card.expiry_date,
+        used_count=card.used_count,
+        remaining_count=max(0, card.trip_count - card.used_count),
+        status=_card_status(card, date.today()),  # type: ignore[arg-type]
+        reservations=[reservation_out(item) for item in reservations],
     )
 
 
 @router.get("", response_model=CommuteCardListOut)
 def list_cards(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    state: str | None = Query(None, alias="status"),
+    pageSize: int = 50,
+    cursor: str | None = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_read),
 ) -> CommuteCardListOut:
+    # `?status=`: comma-separated card statuses, or "all"; live cards by default.
+    if state is None:
+        statuses = LIVE_CARD_STATUSES
+    elif state == "all":
+        statuses = CARD_STATUSES
+    else:
+        statuses = tuple(item.strip() for item in state.split(",") if item.strip())
+        if not statuses or any(item not in CARD_STATUSES for item in statuses):
+            raise HTTPException(status_code=400, detail="Invalid status")
+    if pageSize < 1 or pageSize > 200:
+        raise HTTPException(status_code=400, detail="Invalid pageSize")
+
+    query = select(CommuteCard).where(CommuteCard.user_id == current_user.id)
+    if set(statuses) != set(CARD_STATUSES):
+        today = date.today()
+        query = query.where(or_(*(_status_filter(item, today) for item in statuses)))
+    if cursor is not None:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(
+            or_(
+                CommuteCard.created_at < cursor_created_at,
+                and_(CommuteCard.created_at == cursor_created_at, CommuteCard.id < cursor_id),
+            )
+        )
+
     cards = db.scalars(
-        select(CommuteCard)
-        .where(CommuteCard.user_id == current_user.id)
-        .order_by(CommuteCard.created_at.desc(), CommuteCard.id.desc())
+        query.order_by(CommuteCard.created_at.desc(), CommuteCard.id.desc()).limit(pageSize + 1)
     ).all()
+    next_cursor = _encode_cursor(cards[pageSize - 1]) if len(cards) > pageSize else None
+    cards = cards[:pageSize]
 
     card_ids = [card.id for card in cards]
     if not card_ids:
-        return CommuteCardListOut(items=[])
+        return CommuteCardListOut(items=[], next_cursor=next_cursor)
 
     reservations = db.scalars(
         select(CommuteReservation)
@@ -181,7 +207,10 @@ def list_cards(
     for reservation in reservations:
         reservation_map.setdefault(reservation.card_id, []).append(reservation)
 
-    return CommuteCardListOut(items=[_build_card_out(card, reservation_map.get(card.id, [])) for card in cards])
+    return CommuteCardListOut(
+        items=[_build_card_out(card, reservation_map.get(card.id, [])) for card in cards],
+        next_cursor=next_cursor,
+    )
 
 
 @router.post("", response_model=CommuteCardOut, status_code=status.HTTP_201_CREATED)
@@ -207,7 +236,7 @@ def delete_card(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> Response:
-    card = _card_with_user_or_404(db, current_user, card_id)
+    card = _card_with_user_or_404(db, current_user, card_id, lock=True)
     has_reservations = db.scalar(select(func.count(CommuteReservation.id)).where(CommuteReservation.card_id == card.id))
     if int(has_reservations or 0) > 0:
         raise HTTPException(status_code=400, detail="Please delete all reservations before deleting this commute card")
@@ -217,48 +246,82 @@ def delete_card(
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@router.post("/{card_id}/reservations", response_model=CommuteReservationOut, status_code=status.HTTP_201_CREATED)
-def create_reservation(
-    card_id: int,
-    payload: CommuteReservationCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> CommuteReservationOut:
-    card = _card_with_user_or_404(db, current_user, card_id)
-    travel_slot = _travel_slot_from_time(payload.departure_time)
-
-    _validate_card_trip_limit(db, card)
-    _validate_slot_conflict(db, current_user=current_user, ride_date=payload.ride_date, travel_slot=travel_slot)
-    _validate_card_window(db, card_id=card.id, proposed_date=payload.ride_date)
-
-    row = CommuteReservation(
+def _new_reservation(current_user: User, card: CommuteCard, payload: CommuteReservationCreate) -> CommuteReservation:
+    return CommuteReservation(
         user_id=current_user.id,
         card_id=card.id,
         ride_date=payload.ride_date,
         departure_time=payload.departure_time,
-        travel_slot=travel_slot,
+        travel_slot=_travel_slot_from_time(payload.departure_time),
         direction=payload.direction,
         train_no=payload.train_no,
         carriage_no=payload.carriage_no,
         seat_no=payload.seat_no,
         updated_at=_utc_now_naive(),
     )
+
+
+@router.post("/{card_id}/reservations", response_model=CommuteReservationOut, status_code=status.HTTP_201_CREATED)
+def create_reservation(
+    card_id: int,
+    payload: CommuteReservationCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> CommuteReservationOut:
+    card = _card_with_user_or_404(db, current_user, card_id, lock=True)
+    usage = _card_usage(db, card)
+    _validate_card_booking(card, usage, [payload.ride_date])
+
+    row = _new_reservation(current_user, card, payload)
     db.add(row)
+    _set_card_state(card, usage, [payload.ride_date])
+    flush_reservations(db, user_id=current_user.id, slots=[(row.ride_date, row.travel_slot)])
     db.commit()
     db.refresh(row)
+    return reservation_out(row)
 
-    return CommuteReservationOut(
-        id=row.id,
-        card_id=row.card_id,
-        ride_date=row.ride_date,
-        departure_time=row.departure_time,
-        travel_slot=row.travel_slot,  # type: ignore[arg-type]
-        direction=row.direction,  # type: ignore[arg-type]
-        train_no=row.train_no,
-        carriage_no=row.carriage_no,
-        seat_no=row.seat_no,
-        created_at=row.created_at,
-    )
+
+@router.post(
+    "/{card_id}/reservations/batch",
+    response_model=CommuteReservationBatchOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_reservations_batch(
+    card_id: int,
+    payload: CommuteReservationBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> CommuteReservationBatchOut:
+    # All or nothing: every item is validated against the card and each other before one flush.
+    card = _card_with_user_or_404(db, current_user, card_id, lock=True)
+    rows = [_new_reservation(current_user, card, item) for item in payload.items]
+    slots = [(row.ride_date, row.travel_slot) for row in rows]
+    seen: set[tuple[date, str]] = set()
+    for slot in slots:
+        if slot in seen:
+            raise slot_conflict_error(slot[1])
+        seen.add(slot)
+
+    ride_dates = [row.ride_date for row in rows]
+    usage = _card_usage(db, card)
+    _validate_card_booking(card, usage, ride_dates)
+
+    db.add_all(rows)
+    _set_card_state(card, usage, ride_dates)
+    flush_reservations(db, user_id=current_user.id, slots=slots)
+    row_ids = [row.id for row in rows]
+    db.commit()
+
+    # One read brings back the server-side timestamps of every new row.
+    created = {
+        row.id: row
+        for row in db.scalars(
+            select(CommuteReservation)
+            .where(CommuteReservation.id.in_(row_ids))
+            .execution_options(populate_existing=True)
+        )
+    }
+    return CommuteReservationBatchOut(items=[reservation_out(created[row_id]) for row_id in row_ids])
 
 
 @router.patch("/reservations/{reservation_id}", response_model=CommuteReservationOut)
@@ -269,17 +332,11 @@ def update_reservation(
     current_user: User = Depends(get_current_user),
 ) -> CommuteReservationOut:
     row = _reservation_with_user_or_404(db, current_user, reservation_id)
-    card = _card_with_user_or_404(db, current_user, row.card_id)
+    card = _card_with_user_or_404(db, current_user, row.card_id, lock=True)
     travel_slot = _travel_slot_from_time(payload.departure_time)
 
-    _validate_slot_conflict(
-        db,
-        current_user=current_user,
-        ride_date=payload.ride_date,
-        travel_slot=travel_slot,
-        exclude_reservation_id=row.id,
-    )
-    _validate_card_window(db, card_id=card.id, proposed_date=payload.ride_date, exclude_reservation_id=row.id)
+    usage = _card_usage(db, card, exclude_reservation_id=row.id)
+    _validate_card_booking(card, usage, [payload.ride_date], new=False)
 
     row.ride_date = payload.ride_date
     row.departure_time = payload.departure_time
@@ -289,22 +346,12 @@ def update_reservation(
     row.carriage_no = payload.carriage_no
     row.seat_no = payload.seat_no
     row.updated_at = _utc_now_naive()
+    _set_card_state(card, usage, [payload.ride_date])
+    flush_reservations(db, user_id=current_user.id, slots=[(payload.ride_date, travel_slot)])
 
     db.commit()
     db.refresh(row)
-
-    return CommuteReservationOut(
-        id=row.id,
-        card_id=row.card_id,
-        ride_date=row.ride_date,
-        departure_time=row.departure_time,
-        travel_slot=row.travel_slot,  # type: ignore[arg-type]
-        direction=row.direction,  # type: ignore[arg-type]
-        train_no=row.train_no,
-        carriage_no=row.carriage_no,
-        seat_no=row.seat_no,
-        created_at=row.created_at,
-    )
+    return reservation_out(row)
 
 
 @router.delete("/reservations/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -314,6 +361,9 @@ def delete_reservation(
     current_user: User = Depends(get_current_user),
 ) -> Response:
     row = _reservation_with_user_or_404(db, current_user, reservation_id)
+    if row.card_id is not None:
+        card = _card_with_user_or_404(db, current_user, row.card_id, lock=True)
+        _set_card_state(card, _card_usage(db, card, exclude_reservation_id=row.id), [])
     db.delete(row)
     db.commit()
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
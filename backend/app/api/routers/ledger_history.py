@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_read_db, require_admin_user
+from app.core.audit_outbox import flush_audit_outbox
+from app.core.config import settings
+from app.core.datetime_utils import as_utc, to_utc_naive
+from app.core.ledger_history import ledger_at
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.schemas.ledger_history import LedgerAtBalanceOut, LedgerAtOut
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/ledger-at", response_model=LedgerAtOut)
+def get_ledger_at(
+    userId: int,
+    at: datetime,
+    db: Session = Depends(get_read_db),
+    _: User = Depends(require_admin_user),
+) -> LedgerAtOut:
+    # Replay needs every audit record; deliver queued ones before the read session's first query.
+    flush_audit_outbox(SessionLocal, batch_size=settings.audit_outbox_batch_size)
+    if db.get(User, userId) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    result = ledger_at(db, userId, to_utc_naive(at))
+    return LedgerAtOut(
+        userId=userId,
+        at=as_utc(to_utc_naive(at)),
+        checkpointAsOf=as_utc(result["checkpointAsOf"]) if result["checkpointAsOf"] is not None else None,
+        replayedLogs=result["replayedLogs"],
+        transactions=result["transactions"],
+        balances=[LedgerAtBalanceOut(**b) for b in result["balances"]],
+    )
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import require_admin_user_async
+from app.core import metrics
+from app.models.user import User
+from app.schemas.metrics import MetricsOut
+
+router = APIRouter(prefix="/admin/metrics", tags=["admin"])
+
+
+@router.get("", response_model=MetricsOut)
+async def get_metrics(_: User = Depends(require_admin_user_async)) -> MetricsOut:
+    # e.g. db.write_retry.create_transfer / db.write_retry_exhausted.create_transfer
+    return MetricsOut(counters=metrics.snapshot())
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone, tzinfo
-from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from datetime import datetime, tzinfo
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import func, select
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_async_read_db, get_current_user_async
+from app.core.datetime_utils import local_to_utc_naive, user_zone
 from app.models.category import Category
 from app.models.transaction import Transaction
 from app.models.user import User
@@ -26,19 +27,19 @@ from app.schemas.stats import (
 router = APIRouter(prefix="/stats", tags=["stats"])
 
 
-def _descendant_category_ids(db: Session, user_id: int, root_id: int) -> set[int]:
-    root = db.get(Category, root_id)
+async def _descendant_category_ids(db: AsyncSession, user_id: int, root_id: int) -> set[int]:
+    root = await db.get(Category, root_id)
     if not root or root.user_id != user_id:
         raise HTTPException(status_code=404, detail="Category not found")
     if root.type != "expense":
         raise HTTPException(status_code=400, detail="Only expense categories are supported")
 
-    rows = db.execute(
+    rows = (await db.execute(
         select(Category.id, Category.parent_id).where(
             Category.user_id == user_id,
             Category.type == "expense",
         )
-    ).all()
+    )).all()
 
     children: dict[int | None, list[int]] = {}
     for cid, pid in rows:
@@ -67,14 +68,7 @@ def _merge_net(expense_rows: list[tuple], refund_rows: list[tuple]) -> dict[tupl
 
 
 def _user_zone(current_user: User) -> tzinfo:
-    try:
-        return ZoneInfo(current_user.time_zone or "Asia/Shanghai")
-    except ZoneInfoNotFoundError:
-        return timezone(timedelta(hours=8))
-
-
-def _local_datetime_to_utc_naive(dt: datetime, user_zone: tzinfo) -> datetime:
-    return dt.replace(tzinfo=user_zone).astimezone(timezone.utc).replace(tzinfo=None)
+    return user_zone(current_user.time_zone)
 
 
 def _year_bounds_utc_naive(year: int, user_zone: tzinfo) -> tuple[datetime, datetime]:
@@ -82,7 +76,7 @@ def _year_bounds_utc_naive(year: int, user_zone: tzinfo) -> tuple[datetime, date
         raise HTTPException(status_code=400, detail="Invalid year")
     start = datetime(year, 1, 1)
     end = datetime(year + 1, 1, 1)
-    return _local_datetime_to_utc_naive(start, user_zone), _local_datetime_to_utc_naive(end, user_zone)
+    return local_to_utc_naive(start, user_zone), local_to_utc_naive(end, user_zone)
 
 
 def _month_bounds_utc_naive(year: int, month: int, user_zone: tzinfo) -> tuple[datetime, datetime]:
@@ -96,7 +90,7 @@ def _month_bounds_utc_naive(year: int, month: int, user_zone: tzinfo) -> tuple[d
         end = datetime(year + 1, 1, 1)
     else:
         end = datetime(year, month + 1, 1)
-    return _local_datetime_to_utc_naive(start, user_zone), _local_datetime_to_utc_naive(end, user_zone)
+    return local_to_utc_naive(start, user_zone), local_to_utc_naive(end, user_zone)
 
 
 def _next_month(year: int, month: int) -> tuple[int, int]:
@@ -105,8 +99,8 @@ def _next_month(year: int, month: int) -> tuple[int, int]:
     return year, month + 1
 
 
-def _sum_type_period(
-    db: Session,
+async def _sum_type_period(
+    db: AsyncSession,
     user_id: int,
     type: str,
     start: datetime,
@@ -114,7 +108,7 @@ def _sum_type_period(
 ) -> int:
     if type == "income":
         return int(
-            db.scalar(
+            await db.scalar(
                 select(func.coalesce(func.sum(Transaction.amount_cents), 0)).where(
                     Transaction.user_id == user_id,
                     Transaction.type == "income",
@@ -128,7 +122,7 @@ def _sum_type_period(
     expense = aliased(Transaction)
     refund = aliased(Transaction)
     expense_sum = int(
-        db.scalar(
+        await db.scalar(
             select(func.coalesce(func.sum(expense.amount_cents), 0)).where(
                 expense.user_id == user_id,
                 expense.type == "expense",
@@ -139,7 +133,7 @@ def _sum_type_period(
         or 0
     )
     refund_sum = int(
-        db.scalar(
+        await db.scalar(
             select(func.coalesce(func.sum(refund.amount_cents), 0))
             .select_from(refund)
             .join(expense, refund.refund_of_transaction_id == expense.id)
@@ -157,15 +151,15 @@ def _sum_type_period(
     return max(0, expense_sum - refund_sum)
 
 
-def _category_rows_for_period(
-    db: Session,
+async def _category_rows_for_period(
+    db: AsyncSession,
     user_id: int,
     type: str,
     start: datetime,
     end: datetime,
 ) -> list[tuple[int, int]]:
     if type == "income":
-        rows = db.execute(
+        rows = (await db.execute(
             select(Transaction.category_id, func.coalesce(func.sum(Transaction.amount_cents), 0))
             .where(
                 Transaction.user_id == user_id,
@@ -175,12 +169,12 @@ def _category_rows_for_period(
                 Transaction.occurred_at < end,
             )
             .group_by(Transaction.category_id)
-        ).all()
+        )).all()
         return [(int(cid), int(amt or 0)) for cid, amt in rows if cid is not None]
 
     expense = aliased(Transaction)
     refund = aliased(Transaction)
-    expense_rows = db.execute(
+    expense_rows = (await db.execute(
         select(expense.category_id, func.coalesce(func.sum(expense.amount_cents), 0))
         .where(
             expense.user_id == user_id,
@@ -190,8 +184,8 @@ def _category_rows_for_period(
             expense.occurred_at < end,
         )
         .group_by(expense.category_id)
-    ).all()
-    refund_rows = db.execute(
+    )).all()
+    refund_rows = (await db.execute(
         select(expense.category_id, func.coalesce(func.sum(refund.amount_cents), 0))
         .select_from(refund)
         .join(expense, refund.refund_of_transaction_id == expense.id)
@@ -205,7 +199,7 @@ def _category_rows_for_period(
             expense.occurred_at < end,
         )
         .group_by(expense.category_id)
-    ).all()
+    )).all()
     expense_kv = [(int(cid), int(amt or 0)) for cid, amt in expense_rows if cid is not None]
     refund_kv = [(int(cid), int(amt or 0)) for cid, amt in refund_rows if cid is not None]
     net_map = _merge_net(expense_kv, refund_kv)
@@ -221,14 +215,14 @@ def _parse_yyyy_mm(value: str) -> tuple[int, int]:
 
 
 @router.get("/expense-item", response_model=ExpenseItemStatsOut)
-def expense_item_stats(
+async def expense_item_stats(
     categoryId: int,
     year: int,
     month: int | None = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ) -> ExpenseItemStatsOut:
-    category_ids = _descendant_category_ids(db, current_user.id, int(categoryId))
+    category_ids = await _descendant_category_ids(db, current_user.id, int(categoryId))
     user_zone = _user_zone(current_user)
 
     scope = "year"
@@ -241,7 +235,7 @@ def expense_item_stats(
     expense = aliased(Transaction)
     refund = aliased(Transaction)
 
-    expense_sum = db.scalar(
+    expense_sum = await db.scalar(
         select(func.coalesce(func.sum(expense.amount_cents), 0)).where(
             expense.user_id == current_user.id,
             expense.type == "expense",
@@ -251,7 +245,7 @@ def expense_item_stats(
         )
     )
 
-    refund_sum = db.scalar(
+    refund_sum = await db.scalar(
         select(func.coalesce(func.sum(refund.amount_cents), 0))
         .select_from(refund)
         .join(expense, refund.refund_of_transaction_id == expense.id)
@@ -266,7 +260,7 @@ def expense_item_stats(
         )
     )
 
-    expense_rows = db.execute(
+    expense_rows = (await db.execute(
         select(expense.category_id, func.coalesce(func.sum(expense.amount_cents), 0))
         .where(
             expense.user_id == current_user.id,
@@ -277,9 +271,9 @@ def expense_item_stats(
             expense.occurred_at < end,
         )
         .group_by(expense.category_id)
-    ).all()
+    )).all()
 
-    refund_rows = db.execute(
+    refund_rows = (await db.execute(
         select(expense.category_id, func.coalesce(func.sum(refund.amount_cents), 0))
         .select_from(refund)
         .join(expense, refund.refund_of_transaction_id == expense.id)
@@ -294,7 +288,7 @@ def expense_item_stats(
             expense.occurred_at < end,
         )
         .group_by(expense.category_id)
-    ).all()
+    )).all()
 
     expense_kv = [(int(cid), int(amt or 0)) for cid, amt in expense_rows if cid is not None]
     refund_kv = [(int(cid), int(amt or 0)) for cid, amt in refund_rows if cid is not None]
@@ -323,11 +317,11 @@ def expense_item_stats(
 
 
 @router.get("/year-category", response_model=YearCategoryStatsOut)
-def year_category_stats(
+async def year_category_stats(
     year: int,
     type: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ) -> YearCategoryStatsOut:
     if type not in ("income", "expense"):
         raise HTTPException(status_code=400, detail="Invalid type")
@@ -336,7 +330,7 @@ def year_category_stats(
     start, end = _year_bounds_utc_naive(year, user_zone)
 
     if type == "income":
-        breakdown_rows = db.execute(
+        breakdown_rows = (await db.execute(
             select(Transaction.category_id, func.coalesce(func.sum(Transaction.amount_cents), 0))
             .where(
                 Transaction.user_id == current_user.id,
@@ -346,12 +340,12 @@ def year_category_stats(
                 Transaction.occurred_at < end,
             )
             .group_by(Transaction.category_id)
-        ).all()
+        )).all()
     else:
         expense = aliased(Transaction)
         refund = aliased(Transaction)
 
-        expense_rows = db.execute(
+        expense_rows = (await db.execute(
             select(expense.category_id, func.coalesce(func.sum(expense.amount_cents), 0))
             .where(
                 expense.user_id == current_user.id,
@@ -361,8 +355,8 @@ def year_category_stats(
                 expense.occurred_at < end,
             )
             .group_by(expense.category_id)
-        ).all()
-        refund_rows = db.execute(
+        )).all()
+        refund_rows = (await db.execute(
             select(expense.category_id, func.coalesce(func.sum(refund.amount_cents), 0))
             .select_from(refund)
             .join(expense, refund.refund_of_transaction_id == expense.id)
@@ -376,7 +370,7 @@ def year_category_stats(
                 expense.occurred_at < end,
             )
             .group_by(expense.category_id)
-        ).all()
+        )).all()
 
         expense_kv = [(int(cid), int(amt or 0)) for cid, amt in expense_rows if cid is not None]
         refund_kv = [(int(cid), int(amt or 0)) for cid, amt in refund_rows if cid is not None]
@@ -393,7 +387,7 @@ def year_category_stats(
     total_cents = 0
     for month_index in range(1, 13):
         month_start, month_end = _month_bounds_utc_naive(year, month_index, user_zone)
-        amt = _sum_type_period(db, current_user.id, type, month_start, month_end)
+        amt = await _sum_type_period(db, current_user.id, type, month_start, month_end)
         if amt > 0:
             monthly_totals.append({"month": f"{year:04d}-{month_index:02d}", "amountCents": amt})
         total_cents += amt
@@ -412,11 +406,11 @@ def year_category_stats(
 
 
 @router.get("/yoy-monthly", response_model=YoYMonthlyStatsOut)
-def yoy_monthly_stats(
+async def yoy_monthly_stats(
     year: int,
     type: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ) -> YoYMonthlyStatsOut:
     if type not in ("income", "expense"):
         raise HTTPException(status_code=400, detail="Invalid type")
@@ -429,10 +423,10 @@ def yoy_monthly_stats(
         cur_start, cur_end = _month_bounds_utc_naive(year, month_index, user_zone)
         prev_start, prev_end = _month_bounds_utc_naive(year - 1, month_index, user_zone)
         cur_month_maps[month_index] = dict(
-            _category_rows_for_period(db, current_user.id, type, cur_start, cur_end)
+            await _category_rows_for_period(db, current_user.id, type, cur_start, cur_end)
         )
         prev_month_maps[month_index] = dict(
-            _category_rows_for_period(db, current_user.id, type, prev_start, prev_end)
+            await _category_rows_for_period(db, current_user.id, type, prev_start, prev_end)
         )
 
     series: list[YoYMonthlyPoint] = []
@@ -467,12 +461,12 @@ def yoy_monthly_stats(
 
 
 @router.get("/mom", response_model=MoMStatsOut)
-def mom_stats(
+async def mom_stats(
     year: int,
     month: int,
     type: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ) -> MoMStatsOut:
     if type not in ("income", "expense"):
         raise HTTPException(status_code=400, detail="Invalid type")
@@ -486,10 +480,10 @@ def mom_stats(
     previous_start, previous_end = _month_bounds_utc_naive(previous_year, previous_month, user_zone)
 
     current_map = dict(
-        _category_rows_for_period(db, current_user.id, type, current_start, current_end)
+        await _category_rows_for_period(db, current_user.id, type, current_start, current_end)
     )
     previous_map = dict(
-        _category_rows_for_period(db, current_user.id, type, previous_start, previous_end)
+        await _category_rows_for_period(db, current_user.id, type, previous_start, previous_end)
     )
 
     keys = sorted(set(current_map.keys()) | set(previous_map.keys()))
@@ -507,18 +501,18 @@ def mom_stats(
         type=type,
         currentLabel=f"{year:04d}-{month:02d}",
         previousLabel=f"{previous_year:04d}-{previous_month:02d}",
-        currentTotalCents=_sum_type_period(db, current_user.id, type, current_start, current_end),
-        previousTotalCents=_sum_type_period(db, current_user.id, type, previous_start, previous_end),
+        currentTotalCents=await _sum_type_period(db, current_user.id, type, current_start, current_end),
+        previousTotalCents=await _sum_type_period(db, current_user.id, type, previous_start, previous_end),
         items=items,
     )
 
 
 @router.get("/monthly-range", response_model=MonthlyRangeOut)
-def monthly_range(
+async def monthly_range(
     startMonth: str,
     endMonth: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ) -> MonthlyRangeOut:
     sy, sm = _parse_yyyy_mm(startMonth)
     ey, em = _parse_yyyy_mm(endMonth)
@@ -537,8 +531,8 @@ def monthly_range(
         month_start, month_end = _month_bounds_utc_naive(cursor_y, cursor_m, user_zone)
         series_map[key] = MonthlyInOut(
             month=key,
-            incomeCents=_sum_type_period(db, current_user.id, "income", month_start, month_end),
-            expenseCents=_sum_type_period(db, current_user.id, "expense", month_start, month_end),
+            incomeCents=await _sum_type_period(db, current_user.id, "income", month_start, month_end),
+            expenseCents=await _sum_type_period(db, current_user.id, "expense", month_start, month_end),
         )
         if cursor_y == ey and cursor_m == em:
             break
@@ -552,11 +546,11 @@ def monthly_range(
 
 
 @router.get("/month-category", response_model=MonthCategoryStatsOut)
-def month_category_stats(
+async def month_category_stats(
     month: str,
     type: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ) -> MonthCategoryStatsOut:
     if type not in ("income", "expense"):
         raise HTTPException(status_code=400, detail="Invalid type")
@@ -564,7 +558,7 @@ def month_category_stats(
     y, m = _parse_yyyy_mm(month)
     user_zone = _user_zone(current_user)
     start, end = _month_bounds_utc_naive(y, m, user_zone)
-    rows = _category_rows_for_period(db, current_user.id, type, start, end)
+    rows = await _category_rows_for_period(db, current_user.id, type, start, end)
 
     breakdown = [
         {"categoryId": int(category_id), "amountCents": int(amount)}
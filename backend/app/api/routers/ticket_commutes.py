@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import base64
 from datetime import date, datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy import select
+from sqlalchemy import and_, case, extract, func, or_, select
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_current_user_read, get_db, get_read_db
+from app.core.commute_reservations import flush_reservations, reservation_out
 from app.models.commute_reservation import CommuteReservation
 from app.models.user import User
 from app.schemas.commute_card import (
@@ -14,10 +16,14 @@ from app.schemas.commute_card import (
     CommuteReservationOut,
     CommuteReservationUpdate,
     TicketCommuteListOut,
+    TicketCommuteMonthSummaryOut,
+    TicketCommuteSummaryOut,
 )
 
 router = APIRouter(prefix="/tools/ticket-commutes", tags=["tools"])
 
+_PAGE_SIZE_MAX = 500
+
 
 def _utc_now_naive() -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -41,57 +47,99 @@ def _reservation_with_user_or_404(db: Session, current_user: User, reservation_i
     return reservation
 
 
-def _validate_slot_conflict(
-    db: Session,
-    *,
-    current_user: User,
-    ride_date: date,
-    travel_slot: str,
-    exclude_reservation_id: int | None = None,
-) -> None:
-    query = select(CommuteReservation).where(
-        CommuteReservation.user_id == current_user.id,
-        CommuteReservation.ride_date == ride_date,
-        CommuteReservation.travel_slot == travel_slot,
-    )
-    if exclude_reservation_id is not None:
-        query = query.where(CommuteReservation.id != exclude_reservation_id)
-
-    existing = db.scalar(query)
-    if existing is not None:
-        label = "上午" if travel_slot == "am" else "下午"
-        raise HTTPException(status_code=400, detail=f"该日期的{label}已经有预约了")
-
-
-def _to_out(row: CommuteReservation) -> CommuteReservationOut:
-    return CommuteReservationOut(
-        id=row.id,
-        card_id=row.card_id,
-        ride_date=row.ride_date,
-        departure_time=row.departure_time,
-        travel_slot=row.travel_slot,  # type: ignore[arg-type]
-        direction=row.direction,  # type: ignore[arg-type]
-        train_no=row.train_no,
-        carriage_no=row.carriage_no,
-        seat_no=row.seat_no,
-        created_at=row.created_at,
-    )
+def _encode_cursor(row: CommuteReservation) -> str:
+    raw = f"{row.ride_date.isoformat()}|{row.departure_time}|{int(row.id)}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[date, str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ride_date, departure_time, row_id = raw.split("|", 2)
+        return date.fromisoformat(ride_date), departure_time, int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _date_window(current_user: User, start: date | None, end: date | None) -> list:
+    # Seeks ix_commute_reservations_user_card_ride_date: (user_id, card_id IS NULL, ride_date).
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="Invalid date range")
+    filters = [CommuteReservation.user_id == current_user.id, CommuteReservation.card_id.is_(None)]
+    if start is not None:
+        filters.append(CommuteReservation.ride_date >= start)
+    if end is not None:
+        filters.append(CommuteReservation.ride_date <= end)
+    return filters
 
 
 @router.get("", response_model=TicketCommuteListOut)
 def list_ticket_commutes(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    start: date | None = None,
+    end: date | None = None,
+    pageSize: int = 200,
+    cursor: str | None = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_read),
 ) -> TicketCommuteListOut:
+    # `start`/`end`: inclusive ride_date bounds. Pages run oldest first.
+    if pageSize < 1 or pageSize > _PAGE_SIZE_MAX:
+        raise HTTPException(status_code=400, detail="Invalid pageSize")
+
+    query = select(CommuteReservation).where(*_date_window(current_user, start, end))
+    if cursor is not None:
+        cursor_date, cursor_time, cursor_id = _decode_cursor(cursor)
+        query = query.where(
+            or_(
+                CommuteReservation.ride_date > cursor_date,
+                and_(CommuteReservation.ride_date == cursor_date, CommuteReservation.departure_time > cursor_time),
+                and_(
+                    CommuteReservation.ride_date == cursor_date,
+                    CommuteReservation.departure_time == cursor_time,
+                    CommuteReservation.id > cursor_id,
+                ),
+            )
+        )
+
     rows = db.scalars(
-        select(CommuteReservation)
-        .where(
-            CommuteReservation.user_id == current_user.id,
-            CommuteReservation.card_id.is_(None),
+        query.order_by(
+            CommuteReservation.ride_date.asc(), CommuteReservation.departure_time.asc(), CommuteReservation.id.asc()
+        ).limit(pageSize + 1)
+    ).all()
+    next_cursor = _encode_cursor(rows[pageSize - 1]) if len(rows) > pageSize else None
+    return TicketCommuteListOut(items=[reservation_out(row) for row in rows[:pageSize]], next_cursor=next_cursor)
+
+
+@router.get("/summary", response_model=TicketCommuteSummaryOut)
+def summarize_ticket_commutes(
+    start: date | None = None,
+    end: date | None = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_read),
+) -> TicketCommuteSummaryOut:
+    """Ticket reservation counts per month, from one grouped aggregate."""
+    year = extract("year", CommuteReservation.ride_date)
+    month = extract("month", CommuteReservation.ride_date)
+    rows = db.execute(
+        select(
+            year,
+            month,
+            func.count(CommuteReservation.id),
+            func.sum(case((CommuteReservation.travel_slot == "am", 1), else_=0)),
+            func.sum(case((CommuteReservation.travel_slot == "pm", 1), else_=0)),
         )
-        .order_by(CommuteReservation.ride_date.asc(), CommuteReservation.departure_time.asc(), CommuteReservation.id.asc())
+        .where(*_date_window(current_user, start, end))
+        .group_by(year, month)
+        .order_by(year, month)
     ).all()
-    return TicketCommuteListOut(items=[_to_out(row) for row in rows])
+    return TicketCommuteSummaryOut(
+        items=[
+            TicketCommuteMonthSummaryOut(
+                year=int(y), month=int(m), count=int(count), am_count=int(am or 0), pm_count=int(pm or 0)
+            )
+            for y, m, count, am, pm in rows
+        ]
+    )
 
 
 @router.post("/reservations", response_model=CommuteReservationOut, status_code=status.HTTP_201_CREATED)
@@ -101,7 +149,6 @@ def create_ticket_commute(
     current_user: User = Depends(get_current_user),
 ) -> CommuteReservationOut:
     travel_slot = _travel_slot_from_time(payload.departure_time)
-    _validate_slot_conflict(db, current_user=current_user, ride_date=payload.ride_date, travel_slot=travel_slot)
 
     row = CommuteReservation(
         user_id=current_user.id,
@@ -116,9 +163,10 @@ def create_ticket_commute(
         updated_at=_utc_now_naive(),
     )
     db.add(row)
+    flush_reservations(db, user_id=current_user.id, slots=[(payload.ride_date, travel_slot)])
     db.commit()
     db.refresh(row)
-    return _to_out(row)
+    return reservation_out(row)
 
 
 @router.patch("/reservations/{reservation_id}", response_model=CommuteReservationOut)
@@ -130,13 +178,6 @@ def update_ticket_commute(
 ) -> CommuteReservationOut:
     row = _reservation_with_user_or_404(db, current_user, reservation_id)
     travel_slot = _travel_slot_from_time(payload.departure_time)
-    _validate_slot_conflict(
-        db,
-        current_user=current_user,
-        ride_date=payload.ride_date,
-        travel_slot=travel_slot,
-        exclude_reservation_id=row.id,
-    )
 
     row.ride_date = payload.ride_date
     row.departure_time = payload.departure_time
@@ -146,10 +187,11 @@ def update_ticket_commute(
     row.carriage_no = payload.carriage_no
     row.seat_no = payload.seat_no
     row.updated_at = _utc_now_naive()
+    flush_reservations(db, user_id=current_user.id, slots=[(payload.ride_date, travel_slot)])
 
     db.commit()
     db.refresh(row)
-    return _to_out(row)
+    return reservation_out(row)
 
 
 @router.delete("/reservations/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
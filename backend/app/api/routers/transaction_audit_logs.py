@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import itertools
 from datetime import datetime
+from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, require_admin_user
-from app.core.audit_log import parse_snapshot
+from app.api.deps import get_async_read_db, require_admin_user_async
+from app.core.audit_archive import archived_before, count_archived_logs, iter_archived_logs
+from app.core.audit_log import NOTE_PREFIX_LENGTH, reconstruct_snapshots, stored_snapshots
 from app.core.datetime_utils import as_utc, to_utc_naive
 from app.models.transaction_audit_log import TransactionAuditLog
 from app.models.user import User
@@ -15,10 +20,172 @@ from app.schemas.transaction_audit_log import TransactionAuditLogListOut, Transa
 
 router = APIRouter(prefix="/admin/transaction-audit-logs", tags=["admin"])
 
+# Filtered estimates count at most this many rows, so the cost stays bounded.
+_COUNT_ESTIMATE_CAP = 10_000
+
+
+def _encode_cursor(row: TransactionAuditLog) -> str:
+    raw = f"{row.created_at.isoformat()}|{int(row.id)}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _estimate_total(db: AsyncSession, filters: list) -> tuple[int, bool]:
+    if not filters and db.get_bind().dialect.name == "mssql":
+        # Unfiltered: row count from catalog metadata instead of scanning the table.
+        rows = await db.scalar(
+            text(
+                "SELECT SUM(p.rows) FROM sys.partitions p "
+                "WHERE p.object_id = OBJECT_ID('transaction_audit_logs') AND p.index_id IN (0, 1)"
+            )
+        )
+        return int(rows or 0), True
+
+    capped = select(TransactionAuditLog.id).where(*filters).limit(_COUNT_ESTIMATE_CAP + 1).subquery()
+    counted = int(await db.scalar(select(func.count()).select_from(capped)) or 0)
+    return min(counted, _COUNT_ESTIMATE_CAP), counted > _COUNT_ESTIMATE_CAP
+
+
+def _key(row: TransactionAuditLog) -> tuple[datetime, int]:
+    return row.created_at, int(row.id)
+
+
+def _after(key: tuple[datetime, int]):
+    created_at, row_id = key
+    return or_(
+        TransactionAuditLog.created_at > created_at,
+        and_(TransactionAuditLog.created_at == created_at, TransactionAuditLog.id > row_id),
+    )
+
+
+def _before(key: tuple[datetime, int]):
+    created_at, row_id = key
+    return or_(
+        TransactionAuditLog.created_at < created_at,
+        and_(TransactionAuditLog.created_at == created_at, TransactionAuditLog.id < row_id),
+    )
+
+
+def _at_or_after(key: tuple[datetime, int]):
+    created_at, row_id = key
+    return or_(
+        TransactionAuditLog.created_at > created_at,
+        and_(TransactionAuditLog.created_at == created_at, TransactionAuditLog.id >= row_id),
+    )
+
+
+def _at_or_before(key: tuple[datetime, int]):
+    created_at, row_id = key
+    return or_(
+        TransactionAuditLog.created_at < created_at,
+        and_(TransactionAuditLog.created_at == created_at, TransactionAuditLog.id <= row_id),
+    )
+
+
+async def _delta_history(db: AsyncSession, rows: list[TransactionAuditLog]) -> list[TransactionAuditLog]:
+    """The rows reconstruct_snapshots needs for the delta rows of one page, in (created_at, id) order.
+
+    Bounded by the page, not by table size: per transaction, from its last full snapshot
+    before the page through the page's last row, plus the category merge summaries of
+    the same users inside that window.
+    """
+    first = min(_key(r) for r in rows)
+    last = max(_key(r) for r in rows)
+    tx_ids = {int(r.transaction_id) for r in rows if r.is_delta and r.transaction_id is not None}
+    user_ids = {int(r.target_user_id) for r in rows if r.is_delta}
+
+    # Latest full (create, delete or first-update) row of each transaction before the page.
+    ranked = (
+        select(
+            TransactionAuditLog.transaction_id,
+            TransactionAuditLog.created_at,
+            TransactionAuditLog.id,
+            func.row_number()
+            .over(
+                partition_by=TransactionAuditLog.transaction_id,
+                order_by=(TransactionAuditLog.created_at.desc(), TransactionAuditLog.id.desc()),
+            )
+            .label("position"),
+        )
+        .where(
+            TransactionAuditLog.transaction_id.in_(tx_ids),
+            TransactionAuditLog.is_delta == False,  # noqa: E712
+            _before(first),
+        )
+        .subquery()
+    )
+    bases = {
+        int(tx_id): (created_at, int(row_id))
+        for tx_id, created_at, row_id in (
+            await db.execute(
+                select(ranked.c.transaction_id, ranked.c.created_at, ranked.c.id).where(ranked.c.position == 1)
+            )
+        ).all()
+    }
+
+    order_by = (TransactionAuditLog.created_at.asc(), TransactionAuditLog.id.asc())
+    # A transaction with no full row before the page (its create is on it, or it predates
+    # the audit log) only has rows from the page window onwards to read.
+    history = list(
+        (
+            await db.scalars(
+                select(TransactionAuditLog)
+                .where(
+                    or_(
+                        *(
+                            and_(TransactionAuditLog.transaction_id == tx_id, _at_or_after(bases[tx_id]))
+                            if tx_id in bases
+                            else TransactionAuditLog.transaction_id == tx_id
+                            for tx_id in sorted(tx_ids)
+                        )
+                    ),
+                    _at_or_before(last),
+                )
+                .order_by(*order_by)
+            )
+        ).all()
+    )
+    # Category merge summaries (transaction_id NULL) of the same users change those views too.
+    merges = (
+        await db.scalars(
+            select(TransactionAuditLog)
+            .where(
+                TransactionAuditLog.transaction_id.is_(None),
+                TransactionAuditLog.target_user_id.in_(user_ids),
+                TransactionAuditLog.action == "update",
+                _at_or_after(min([first, *(_key(r) for r in history)])),
+                _at_or_before(last),
+            )
+            .order_by(*order_by)
+        )
+    ).all()
+    return sorted([*history, *merges], key=_key)
+
+
+def _archived_page(
+    match: dict[str, Any],
+    start: datetime | None,
+    end: datetime | None,
+    order: str,
+    after: tuple[datetime, int] | None,
+    limit: int,
+    note_prefix: str | None,
+) -> list[TransactionAuditLog]:
+    rows = iter_archived_logs(filters=match, start=start, end=end, order=order, after=after, note_prefix=note_prefix)
+    return list(itertools.islice(rows, limit))
+
 
 @router.get("", response_model=TransactionAuditLogListOut)
-def list_transaction_audit_logs(
-    page: int = 1,
+async def list_transaction_audit_logs(
+    cursor: str | None = None,
     pageSize: int = 50,
     order: str = "asc",
     action: str | None = None,
@@ -26,13 +193,16 @@ def list_transaction_audit_logs(
     txType: str | None = None,
     actorUserId: int | None = None,
     targetUserId: int | None = None,
+    amountCents: int | None = None,
+    categoryId: int | None = None,
+    bankAccountId: int | None = None,
+    note: str | None = None,
     start: datetime | None = None,
     end: datetime | None = None,
-    db: Session = Depends(get_db),
-    _: User = Depends(require_admin_user),
+    countMode: str = "none",
+    db: AsyncSession = Depends(get_async_read_db),
+    _: User = Depends(require_admin_user_async),
 ) -> TransactionAuditLogListOut:
-    if page < 1:
-        raise HTTPException(status_code=400, detail="Invalid page")
     if pageSize < 1 or pageSize > 200:
         raise HTTPException(status_code=400, detail="Invalid pageSize")
 
@@ -42,25 +212,70 @@ def list_transaction_audit_logs(
         raise HTTPException(status_code=400, detail="Invalid txType")
     if order not in ("asc", "desc"):
         raise HTTPException(status_code=400, detail="Invalid order")
+    if countMode not in ("none", "estimated", "exact"):
+        raise HTTPException(status_code=400, detail="Invalid countMode")
 
-    filters: list = []
+    match: dict[str, Any] = {}
     if action is not None:
-        filters.append(TransactionAuditLog.action == action)
+        match["action"] = action
     if transactionId is not None:
-        filters.append(TransactionAuditLog.transaction_id == transactionId)
+        match["transaction_id"] = transactionId
     if txType is not None:
-        filters.append(TransactionAuditLog.tx_type == txType)
+        match["tx_type"] = txType
     if actorUserId is not None:
-        filters.append(TransactionAuditLog.actor_user_id == actorUserId)
+        match["actor_user_id"] = actorUserId
     if targetUserId is not None:
-        filters.append(TransactionAuditLog.target_user_id == targetUserId)
-    if start is not None:
-        filters.append(TransactionAuditLog.created_at >= to_utc_naive(start))
-    if end is not None:
-        filters.append(TransactionAuditLog.created_at <= to_utc_naive(end))
+        match["target_user_id"] = targetUserId
+    # Content search hits the indexed projection columns, never the snapshot JSON.
+    if amountCents is not None:
+        match["amount_cents"] = amountCents
+    if categoryId is not None:
+        match["category_id"] = categoryId
+    if bankAccountId is not None:
+        match["bank_account_id"] = bankAccountId
+    note_prefix = note.strip()[:NOTE_PREFIX_LENGTH] if note and note.strip() else None
+    start_naive = to_utc_naive(start) if start is not None else None
+    end_naive = to_utc_naive(end) if end is not None else None
+
+    filters: list = [getattr(TransactionAuditLog, column) == value for column, value in match.items()]
+    if note_prefix is not None:
+        filters.append(TransactionAuditLog.note_prefix.startswith(note_prefix, autoescape=True))
+    if start_naive is not None:
+        filters.append(TransactionAuditLog.created_at >= start_naive)
+    if end_naive is not None:
+        filters.append(TransactionAuditLog.created_at <= end_naive)
 
-    base = select(TransactionAuditLog).where(*filters)
-    total = int(db.scalar(select(func.count()).select_from(base.subquery())) or 0)
+    # Old ranges may have been moved to compressed archive segments (see app/core/audit_archive.py).
+    horizon = await asyncio.to_thread(archived_before)
+    use_archive = horizon is not None and (start_naive is None or start_naive < horizon)
+
+    total: int | None = None
+    total_is_estimate = False
+    if countMode == "exact":
+        total = int(await db.scalar(select(func.count(TransactionAuditLog.id)).where(*filters)) or 0)
+        if use_archive:
+            total += await asyncio.to_thread(
+                count_archived_logs, filters=match, start=start_naive, end=end_naive, note_prefix=note_prefix
+            )
+    elif countMode == "estimated":
+        total, total_is_estimate = await _estimate_total(db, filters)
+        if use_archive:
+            archived = await asyncio.to_thread(
+                count_archived_logs,
+                filters=match,
+                start=start_naive,
+                end=end_naive,
+                cap=_COUNT_ESTIMATE_CAP,
+                note_prefix=note_prefix,
+            )
+            total_is_estimate = total_is_estimate or archived > _COUNT_ESTIMATE_CAP
+            total += min(archived, _COUNT_ESTIMATE_CAP)
+
+    # Keyset pagination on (created_at, id): each page is an index range seek, whatever its depth.
+    page_filters = list(filters)
+    after = _decode_cursor(cursor) if cursor is not None else None
+    if after is not None:
+        page_filters.append(_after(after) if order == "asc" else _before(after))
 
     order_by = (
         (TransactionAuditLog.created_at.asc(), TransactionAuditLog.id.asc())
@@ -68,7 +283,25 @@ def list_transaction_audit_logs(
         else (TransactionAuditLog.created_at.desc(), TransactionAuditLog.id.desc())
     )
 
-    rows = db.scalars(base.order_by(*order_by).offset((page - 1) * pageSize).limit(pageSize)).all()
+    rows = (
+        await db.scalars(select(TransactionAuditLog).where(*page_filters).order_by(*order_by).limit(pageSize + 1))
+    ).all()
+    if use_archive:
+        archived_rows = await asyncio.to_thread(
+            _archived_page, match, start_naive, end_naive, order, after, pageSize + 1, note_prefix
+        )
+        # While an archive run is deleting, a row can exist in both places; the live copy wins.
+        merged = {int(r.id): r for r in archived_rows}
+        merged.update({int(r.id): r for r in rows})
+        rows = sorted(merged.values(), key=lambda r: (r.created_at, r.id), reverse=order == "desc")[: pageSize + 1]
+    next_cursor = _encode_cursor(rows[pageSize - 1]) if len(rows) > pageSize else None
+    rows = rows[:pageSize]
+
+    # Update rows may be stored as field diffs; rebuild full views from each transaction's history.
+    views = {int(r.id): stored_snapshots(r) for r in rows}
+    if any(r.is_delta and r.transaction_id is not None for r in rows):
+        reconstructed = reconstruct_snapshots(await _delta_history(db, rows))
+        views.update({log_id: reconstructed[log_id] for log_id in views if log_id in reconstructed})
 
     items = [
         TransactionAuditLogOut(
@@ -79,10 +312,15 @@ def list_transaction_audit_logs(
             transactionId=int(r.transaction_id) if r.transaction_id is not None else None,
             txType=str(r.tx_type) if r.tx_type is not None else None,
             createdAt=as_utc(r.created_at),
-            before=parse_snapshot(r.before_json),
-            after=parse_snapshot(r.after_json),
+            before=views[int(r.id)][0],
+            after=views[int(r.id)][1],
         )
         for r in rows
     ]
 
-    return TransactionAuditLogListOut(items=items, total=total)
+    return TransactionAuditLogListOut(
+        items=items,
+        nextCursor=next_cursor,
+        total=total,
+        totalIsEstimate=total_is_estimate,
+    )
@@ -5,13 +5,22 @@ from datetime import datetime, timezone
 
 from pydantic import BaseModel, Field
 from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import (
+    get_async_read_db,
+    get_balance_db,
+    get_current_user,
+    get_current_user_async,
+    get_current_user_balance,
+    get_db,
+)
 from app.core.audit_log import add_transaction_audit_log, build_transaction_snapshot
+from app.core.category_graph import CategoryNode, category_graph
 from app.core.datetime_utils import as_utc, to_utc_naive
+from app.db.unit_of_work import lock_bank_accounts, retry_on_transient_errors
 from app.models.bank_account import BankAccount
-from app.models.category import Category
 from app.models.category_tag import CategoryTag
 from app.models.transaction import Transaction
 from app.models.transaction_tag import TransactionTag
@@ -28,22 +37,14 @@ class RefundCreate(BaseModel):
     note: str | None = None
 
 
-def _ensure_leaf_category(db: Session, current_user: User, category_id: int, expected_type: str) -> Category:
-    category = db.get(Category, category_id)
-    if not category or category.user_id != current_user.id or not category.is_active:
+def _ensure_leaf_category(db: Session, current_user: User, category_id: int, expected_type: str) -> CategoryNode:
+    graph = category_graph(db, current_user.id)
+    category = graph.get(category_id)
+    if not category or not category.is_active:
         raise HTTPException(status_code=400, detail="Invalid categoryId")
     if category.type != expected_type:
         raise HTTPException(status_code=400, detail="Income/expense type mismatch")
-
-    has_child = (
-        db.scalar(
-            select(Category.id)
-            .where(Category.user_id == current_user.id, Category.parent_id == category.id)
-            .limit(1)
-        )
-        is not None
-    )
-    if has_child:
+    if not graph.is_leaf(category.id):
         raise HTTPException(status_code=400, detail="Category must be a leaf node")
 
     return category
@@ -52,45 +53,32 @@ def _ensure_leaf_category(db: Session, current_user: User, category_id: int, exp
 def _validate_and_resolve_tags(
     db: Session,
     current_user: User,
-    category: Category,
+    category: CategoryNode,
     tag_ids: list[int],
 ) -> tuple[list[int], list[str]]:
     if category.type != "expense":
         raise HTTPException(status_code=400, detail="Tags are only supported for expense")
 
-    # Find the first-level expense category (child of an expense root)
-    cursor = category
-    top_level: Category | None = None
-    while cursor.parent_id is not None:
-        parent = db.get(Category, cursor.parent_id)
-        if not parent or parent.user_id != current_user.id:
-            raise HTTPException(status_code=400, detail="Invalid category ancestry")
-        if parent.parent_id is None:
-            top_level = cursor
-            break
-        cursor = parent
-
+    # Tags bind to the first-level expense category (child of an expense root)
+    graph = category_graph(db, current_user.id)
+    if graph.is_orphan(category.id):
+        raise HTTPException(status_code=400, detail="Invalid category ancestry")
+    top_level = graph.top_level(category.id)
     if not top_level:
         raise HTTPException(status_code=400, detail="Invalid category for tags")
 
     unique_ids = sorted({int(x) for x in tag_ids})
-    tags = db.scalars(
-        select(CategoryTag).where(
-            CategoryTag.user_id == current_user.id,
-            CategoryTag.id.in_(unique_ids),
-        )
-    ).all()
-    if len(tags) != len(unique_ids):
+    tags = [graph.tags.get(tag_id) for tag_id in unique_ids]
+    if any(t is None for t in tags):
         raise HTTPException(status_code=400, detail="Invalid tagIds")
 
-    tag_by_id = {int(t.id): t for t in tags}
     for t in tags:
         if not t.is_active:
             raise HTTPException(status_code=400, detail="Tag is inactive")
         if t.category_id != top_level.id:
             raise HTTPException(status_code=400, detail="Tag does not belong to selected category")
 
-    return unique_ids, [tag_by_id[tag_id].name for tag_id in unique_ids]
+    return unique_ids, [t.name for t in tags]
 
 
 def _load_tx_tags(db: Session, tx_ids: list[int]) -> tuple[dict[int, list[int]], dict[int, list[str]]]:
@@ -112,7 +100,7 @@ def _load_tx_tags(db: Session, tx_ids: list[int]) -> tuple[dict[int, list[int]],
 
 
 @router.get("", response_model=TransactionListOut)
-def list_transactions(
+async def list_transactions(
     type: str = "all",
     fundingSource: str = "all",
     bankAccountId: int | None = None,
@@ -123,8 +111,8 @@ def list_transactions(
     sortOrder: str = "asc",
     page: int = 1,
     pageSize: int = 50,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ) -> TransactionListOut:
     if type not in ("all", "income", "expense", "transfer", "refund"):
         raise HTTPException(status_code=400, detail="Invalid type")
@@ -196,10 +184,10 @@ def list_transactions(
 
     base = select(Transaction).where(*filters)
 
-    total = int(db.scalar(select(func.count()).select_from(base.subquery())) or 0)
+    total = int(await db.scalar(select(func.count()).select_from(base.subquery())) or 0)
 
     income_sum = int(
-        db.scalar(
+        await db.scalar(
             select(func.coalesce(func.sum(Transaction.amount_cents), 0)).where(
                 *common_filters,
                 Transaction.type == "income",
@@ -208,7 +196,7 @@ def list_transactions(
         or 0
     )
     expense_sum = int(
-        db.scalar(
+        await db.scalar(
             select(func.coalesce(func.sum(Transaction.amount_cents), 0)).where(
                 *common_filters,
                 Transaction.type == "expense",
@@ -228,7 +216,7 @@ def list_transactions(
         .subquery()
     )
     refund_sum = int(
-        db.scalar(
+        await db.scalar(
             select(func.coalesce(func.sum(Transaction.amount_cents), 0)).where(
                 Transaction.user_id == current_user.id,
                 Transaction.type == "refund",
@@ -244,19 +232,19 @@ def list_transactions(
     else:
         expense_cents = 0
 
-    rows = db.scalars(
+    rows = (await db.scalars(
         base.order_by(occurred_order, id_order)
         .offset((page - 1) * pageSize)
         .limit(pageSize)
-    ).all()
+    )).all()
 
     tx_ids = [int(r.id) for r in rows]
-    tag_map, tag_name_map = _load_tx_tags(db, tx_ids)
+    tag_map, tag_name_map = await db.run_sync(_load_tx_tags, tx_ids)
 
     refundable_ids = [int(r.id) for r in rows if r.type == "expense"]
     refund_sum_map: dict[int, int] = {}
     if refundable_ids:
-        refund_rows = db.execute(
+        refund_rows = (await db.execute(
             select(Transaction.refund_of_transaction_id, func.coalesce(func.sum(Transaction.amount_cents), 0))
             .where(
                 Transaction.user_id == current_user.id,
@@ -264,7 +252,7 @@ def list_transactions(
                 Transaction.refund_of_transaction_id.in_(refundable_ids),
             )
             .group_by(Transaction.refund_of_transaction_id)
-        ).all()
+        )).all()
         for refund_of_id, amount in refund_rows:
             if refund_of_id is None:
                 continue
@@ -273,7 +261,7 @@ def list_transactions(
     # Refund children for items in this page
     refund_items: list[TransactionOut] = []
     if refundable_ids:
-        refund_rows = db.scalars(
+        refund_rows = (await db.scalars(
             select(Transaction)
             .where(
                 Transaction.user_id == current_user.id,
@@ -281,7 +269,7 @@ def list_transactions(
                 Transaction.refund_of_transaction_id.in_(refundable_ids),
             )
             .order_by(occurred_order, id_order)
-        ).all()
+        )).all()
         refund_items = [
             TransactionOut(
                 id=r.id,
@@ -332,10 +320,11 @@ def list_transactions(
 
 
 @router.post("", response_model=TransactionOut)
+@retry_on_transient_errors
 def create_transaction(
     payload: TransactionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_balance_db),
+    current_user: User = Depends(get_current_user_balance),
 ) -> TransactionOut:
     category = _ensure_leaf_category(db, current_user, payload.categoryId, payload.type)
 
@@ -355,7 +344,7 @@ def create_transaction(
     else:
         if payload.bankAccountId is None:
             raise HTTPException(status_code=400, detail="Bank fundingSource requires bankAccountId")
-        bank = db.get(BankAccount, payload.bankAccountId)
+        bank = lock_bank_accounts(db, [payload.bankAccountId]).get(payload.bankAccountId)
         if not bank or bank.user_id != current_user.id or not bank.is_active:
             raise HTTPException(status_code=400, detail="Invalid bankAccountId")
         bank_account_id = bank.id
@@ -422,11 +411,12 @@ def create_transaction(
 
 
 @router.post("/{tx_id}/refund", response_model=TransactionOut)
+@retry_on_transient_errors
 def create_refund(
     tx_id: int,
     payload: RefundCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_balance_db),
+    current_user: User = Depends(get_current_user_balance),
 ) -> TransactionOut:
     """Create a refund record for a bank-funded expense.
 
@@ -447,6 +437,11 @@ def create_refund(
     if getattr(original, "refund_of_transaction_id", None) is not None:
         raise HTTPException(status_code=400, detail="Refund transaction cannot be refunded")
 
+    # Lock the account before summing existing refunds so concurrent refunds serialize here.
+    bank = lock_bank_accounts(db, [original.bank_account_id]).get(original.bank_account_id)
+    if not bank or bank.user_id != current_user.id:
+        raise HTTPException(status_code=400, detail="Invalid bankAccountId")
+
     refunded_sum = db.scalar(
         select(func.coalesce(func.sum(Transaction.amount_cents), 0)).where(
             Transaction.user_id == current_user.id,
@@ -471,10 +466,6 @@ def create_refund(
         if refund_cents > remaining:
             raise HTTPException(status_code=400, detail="Refund amount exceeds remaining")
 
-    bank = db.get(BankAccount, original.bank_account_id)
-    if not bank or bank.user_id != current_user.id:
-        raise HTTPException(status_code=400, detail="Invalid bankAccountId")
-
     # refund increases available balance
     bank.balance_cents += refund_cents
 
@@ -532,6 +523,7 @@ def create_refund(
 
 
 @router.patch("/{tx_id}", response_model=TransactionOut)
+@retry_on_transient_errors
 def update_transaction(
     tx_id: int,
     payload: TransactionUpdate,
@@ -564,7 +556,7 @@ def update_transaction(
         category = _ensure_leaf_category(db, current_user, payload.categoryId, row.type)
         row.category_id = category.id
     elif row.category_id is not None:
-        category = db.get(Category, row.category_id)
+        category = category_graph(db, current_user.id).get(row.category_id)
 
     tag_ids: list[int] = []
     tag_names: list[str] = []
@@ -622,10 +614,11 @@ def update_transaction(
 
 
 @router.delete("/{tx_id}")
+@retry_on_transient_errors
 def delete_transaction(
     tx_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_balance_db),
+    current_user: User = Depends(get_current_user_balance),
 ) -> dict:
     row = db.get(Transaction, tx_id)
     if not row or row.user_id != current_user.id:
@@ -636,6 +629,9 @@ def delete_transaction(
     before_tag_names = before_tag_name_map.get(row.id, [])
     before = build_transaction_snapshot(row, tag_ids=before_tag_ids, tag_names=before_tag_names)
 
+    # Lock affected accounts (ascending id) before checking refunds and balances.
+    accounts = lock_bank_accounts(db, [row.bank_account_id, getattr(row, "to_bank_account_id", None)])
+
     # Prevent deleting a payment that has refunds (keeps linkage and avoids FK errors)
     if getattr(row, "refund_of_transaction_id", None) is None:
         has_refund = (
@@ -657,8 +653,8 @@ def delete_transaction(
         if row.bank_account_id is None or getattr(row, "to_bank_account_id", None) is None:
             raise HTTPException(status_code=400, detail="Invalid transfer")
 
-        from_acct = db.get(BankAccount, row.bank_account_id)
-        to_acct = db.get(BankAccount, row.to_bank_account_id)
+        from_acct = accounts.get(row.bank_account_id)
+        to_acct = accounts.get(row.to_bank_account_id)
         if not from_acct or from_acct.user_id != current_user.id:
             raise HTTPException(status_code=400, detail="Invalid fromBankAccountId")
         if not to_acct or to_acct.user_id != current_user.id:
@@ -673,7 +669,7 @@ def delete_transaction(
         db.add_all([from_acct, to_acct])
 
     elif row.funding_source == "bank" and row.bank_account_id is not None:
-        bank = db.get(BankAccount, row.bank_account_id)
+        bank = accounts.get(row.bank_account_id)
         if not bank or bank.user_id != current_user.id:
             raise HTTPException(status_code=400, detail="Invalid bankAccountId")
 
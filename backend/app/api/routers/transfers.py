@@ -3,10 +3,10 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_balance_db, get_current_user_balance
 from app.core.audit_log import add_transaction_audit_log, build_transaction_snapshot
 from app.core.datetime_utils import as_utc, to_utc_naive
-from app.models.bank_account import BankAccount
+from app.db.unit_of_work import lock_bank_accounts, retry_on_transient_errors
 from app.models.transaction import Transaction
 from app.models.user import User
 from app.schemas.transfer import TransferCreate
@@ -16,16 +16,19 @@ router = APIRouter(prefix="/ledger/transfers", tags=["ledger"])
 
 
 @router.post("", response_model=TransactionOut)
+@retry_on_transient_errors
 def create_transfer(
     payload: TransferCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_balance_db),
+    current_user: User = Depends(get_current_user_balance),
 ) -> TransactionOut:
     if payload.fromBankAccountId == payload.toBankAccountId:
         raise HTTPException(status_code=400, detail="fromBankAccountId must not equal toBankAccountId")
 
-    from_acct = db.get(BankAccount, payload.fromBankAccountId)
-    to_acct = db.get(BankAccount, payload.toBankAccountId)
+    # Both accounts are locked in ascending id order regardless of transfer direction.
+    accounts = lock_bank_accounts(db, [payload.fromBankAccountId, payload.toBankAccountId])
+    from_acct = accounts.get(payload.fromBankAccountId)
+    to_acct = accounts.get(payload.toBankAccountId)
 
     if not from_acct or from_acct.user_id != current_user.id or not from_acct.is_active:
         raise HTTPException(status_code=400, detail="Invalid fromBankAccountId")
@@ -3,43 +3,28 @@ from __future__ import annotations
 from datetime import date, datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import delete, select
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_current_user_read, get_db, get_read_db
+from app.core.datetime_utils import month_bounds
+from app.db.unit_of_work import retry_on_transient_errors
 from app.models.commute_reservation import CommuteReservation
 from app.models.travel_plan import TravelPlan
 from app.models.user import User
-from app.schemas.travel_plan import TravelPlanDayOut, TravelPlanMonthOut, TravelPlanUpsert
+from app.schemas.travel_plan import TravelPlanDayOut, TravelPlanMonthOut, TravelPlanMonthUpsert, TravelPlanUpsert
 
 router = APIRouter(prefix="/tools/travel-plans", tags=["tools"])
 
 
-def _month_bounds(year: int, month: int) -> tuple[date, date]:
-    if month < 1 or month > 12:
-        raise HTTPException(status_code=400, detail="Invalid month")
-
-    start = date(year, month, 1)
-    if month == 12:
-        end = date(year + 1, 1, 1)
-    else:
-        end = date(year, month + 1, 1)
-    return start, end
-
-
-@router.get("", response_model=TravelPlanMonthOut)
-def get_month(
-    year: int,
-    month: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> TravelPlanMonthOut:
-    start, end = _month_bounds(year, month)
+def _month_out(db: Session, user_id: int, year: int, month: int) -> TravelPlanMonthOut:
+    start, end = month_bounds(year, month)
 
     rows = db.scalars(
         select(TravelPlan)
         .where(
-            TravelPlan.user_id == current_user.id,
+            TravelPlan.user_id == user_id,
             TravelPlan.plan_date >= start,
             TravelPlan.plan_date < end,
         )
@@ -53,6 +38,126 @@ def get_month(
     return TravelPlanMonthOut(year=year, month=month, items=items)
 
 
+@router.get("", response_model=TravelPlanMonthOut)
+def get_month(
+    year: int,
+    month: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_read),
+) -> TravelPlanMonthOut:
+    return _month_out(db, current_user.id, year, month)
+
+
+# One statement applies the whole diff: matched days are updated or (when cleared)
+# deleted, unmatched days are inserted unless cleared. HOLDLOCK keeps a concurrent
+# writer from inserting the same day between the match and the insert.
+_MERGE_MONTH_SQL = """
+MERGE travel_plans WITH (HOLDLOCK) AS target
+USING (VALUES {values}) AS source (plan_date, is_rest_day, am, pm, is_clear)
+ON target.user_id = :user_id AND target.plan_date = source.plan_date
+WHEN MATCHED AND source.is_clear = 1 THEN DELETE
+WHEN MATCHED THEN
+    UPDATE SET is_rest_day = source.is_rest_day, am = source.am, pm = source.pm, updated_at = :now
+WHEN NOT MATCHED AND source.is_clear = 0 THEN
+    INSERT (user_id, plan_date, is_rest_day, am, pm, updated_at)
+    VALUES (:user_id, source.plan_date, source.is_rest_day, source.am, source.pm, :now);
+"""
+
+
+def _merge_month_mssql(db: Session, user_id: int, days: list[dict], now: datetime) -> None:
+    values = ", ".join(
+        f"(CAST(:d{i} AS DATE), CAST(:r{i} AS BIT), CAST(:am{i} AS NVARCHAR(500)), CAST(:pm{i} AS NVARCHAR(500)), :c{i})"
+        for i in range(len(days))
+    )
+    params: dict = {"user_id": user_id, "now": now}
+    for i, day in enumerate(days):
+        params[f"d{i}"] = day["date"]
+        params[f"r{i}"] = int(day["is_rest_day"])
+        params[f"am{i}"] = day["am"]
+        params[f"pm{i}"] = day["pm"]
+        params[f"c{i}"] = int(day["clear"])
+    db.execute(text(_MERGE_MONTH_SQL.format(values=values)), params)
+
+
+def _upsert_month_sqlite(db: Session, user_id: int, days: list[dict], now: datetime) -> None:
+    cleared = [day["date"] for day in days if day["clear"]]
+    if cleared:
+        db.execute(delete(TravelPlan).where(TravelPlan.user_id == user_id, TravelPlan.plan_date.in_(cleared)))
+    rows = [
+        {
+            "user_id": user_id,
+            "plan_date": day["date"],
+            "is_rest_day": day["is_rest_day"],
+            "am": day["am"],
+            "pm": day["pm"],
+            "updated_at": now,
+        }
+        for day in days
+        if not day["clear"]
+    ]
+    if rows:
+        stmt = sqlite_insert(TravelPlan).values(rows)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[TravelPlan.user_id, TravelPlan.plan_date],
+                set_={
+                    "is_rest_day": stmt.excluded.is_rest_day,
+                    "am": stmt.excluded.am,
+                    "pm": stmt.excluded.pm,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+
+
+@router.put("/month", response_model=TravelPlanMonthOut)
+@retry_on_transient_errors
+def upsert_month(
+    payload: TravelPlanMonthUpsert,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> TravelPlanMonthOut:
+    """Apply a month's diff in one transaction: one reservation lookup, one set-based write."""
+    start, end = month_bounds(payload.year, payload.month)
+
+    days: list[dict] = []
+    seen: set[date] = set()
+    for item in payload.items:
+        if not start <= item.date < end:
+            raise HTTPException(status_code=400, detail="Date is outside the month")
+        if item.date in seen:
+            raise HTTPException(status_code=400, detail="Duplicate date")
+        seen.add(item.date)
+
+        is_rest_day = bool(item.is_rest_day)
+        am = (item.am or "").strip() or None
+        pm = (item.pm or "").strip() or None
+        if is_rest_day and (am is not None or pm is not None):
+            raise HTTPException(status_code=400, detail="Rest day cannot have plans")
+        clear = not is_rest_day and am is None and pm is None
+        days.append({"date": item.date, "is_rest_day": is_rest_day, "am": am, "pm": pm, "clear": clear})
+
+    rest_dates = [day["date"] for day in days if day["is_rest_day"]]
+    if rest_dates:
+        reserved = db.scalar(
+            select(CommuteReservation.ride_date)
+            .where(CommuteReservation.user_id == current_user.id, CommuteReservation.ride_date.in_(rest_dates))
+            .limit(1)
+        )
+        if reserved is not None:
+            raise HTTPException(status_code=400, detail="This date already has commute reservations and cannot be marked as a rest day")
+
+    if days:
+        now_utc_naive = datetime.now(timezone.utc).replace(tzinfo=None)
+        if db.get_bind().dialect.name == "mssql":
+            _merge_month_mssql(db, current_user.id, days, now_utc_naive)
+        else:
+            _upsert_month_sqlite(db, current_user.id, days, now_utc_naive)
+        db.commit()
+
+    return _month_out(db, current_user.id, payload.year, payload.month)
+
+
 @router.put("", response_model=TravelPlanDayOut)
 def upsert_day(
     payload: TravelPlanUpsert,
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import functools
+import gzip
+import io
+import json
+import logging
+import os
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.audit_log import (
+    apply_category_merge,
+    is_category_merge,
+    parse_snapshot,
+    snapshot_columns,
+    snapshot_projection,
+    stored_snapshots,
+)
+from app.core.config import settings
+from app.models.transaction_audit_log import TransactionAuditLog
+
+logger = logging.getLogger(__name__)
+
+# Cold storage for transaction_audit_logs: one compressed JSONL segment per UTC month
+# plus index.json. Segments hold full snapshots (deltas are expanded on the way out),
+# so an archived month can be read without the rest of the history.
+
+_INDEX_FILE = "index.json"
+_SUFFIXES = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+_RECORD_COLUMNS = (
+    "id",
+    "action",
+    "actor_user_id",
+    "target_user_id",
+    "transaction_id",
+    "tx_type",
+    "amount_cents",
+    "category_id",
+    "bank_account_id",
+    "note_prefix",
+    "before_json",
+    "after_json",
+)
+
+
+def archive_dir() -> Path:
+    path = Path(settings.audit_archive_dir)
+    if path.is_absolute():
+        return path
+    backend_dir = Path(__file__).resolve().parents[2]
+    return (backend_dir / path).resolve()
+
+
+def _month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def _next_month(dt: datetime) -> datetime:
+    return datetime(dt.year + 1, 1, 1) if dt.month == 12 else datetime(dt.year, dt.month + 1, 1)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as exc:  # optional dependency
+        raise RuntimeError("audit_archive_compression=zstd requires the 'zstandard' package") from exc
+    return zstandard
+
+
+def _write_bytes(path: Path, payload: bytes) -> None:
+    if path.name.endswith(_SUFFIXES["zstd"]):
+        data = _zstd().ZstdCompressor(level=10).compress(payload)
+    else:
+        data = gzip.compress(payload, compresslevel=6)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_bytes(path: Path) -> bytes:
+    raw = path.read_bytes()
+    if path.name.endswith(_SUFFIXES["zstd"]):
+        return _zstd().ZstdDecompressor().decompressobj().decompress(raw)
+    return gzip.decompress(raw)
+
+
+def load_index() -> dict[str, Any]:
+    path = archive_dir() / _INDEX_FILE
+    if not path.exists():
+        return {"archivedBefore": None, "segments": []}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_index(index: dict[str, Any]) -> None:
+    directory = archive_dir()
+    tmp = directory / (_INDEX_FILE + ".tmp")
+    tmp.write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, directory / _INDEX_FILE)
+
+
+def archived_before() -> datetime | None:
+    """Rows created before this instant may live in the archive instead of the table."""
+    value = load_index().get("archivedBefore")
+    return datetime.fromisoformat(value) if value else None
+
+
+@functools.lru_cache(maxsize=8)
+def _segment_records(path: str, mtime_ns: int) -> tuple[dict[str, Any], ...]:
+    # Keyed on mtime so a rewritten segment is never served stale.
+    _ = mtime_ns
+    records = []
+    for line in io.StringIO(_read_bytes(Path(path)).decode("utf-8")):
+        if line.strip():
+            record = json.loads(line)
+            record["created_at"] = datetime.fromisoformat(record["created_at"])
+            if "amount_cents" not in record:
+                # Segments written before the projection columns existed.
+                snapshot = parse_snapshot(record["after_json"] or record["before_json"])
+                record.update(snapshot_projection(snapshot))
+            records.append(record)
+    return tuple(records)
+
+
+def _load_segment(path: Path) -> tuple[dict[str, Any], ...]:
+    if not path.exists():
+        return ()
+    return _segment_records(str(path), path.stat().st_mtime_ns)
+
+
+def _to_log(record: dict[str, Any]) -> TransactionAuditLog:
+    # Transient instance, never added to a session: lets callers treat archived and live rows alike.
+    return TransactionAuditLog(**{k: record[k] for k in _RECORD_COLUMNS}, created_at=record["created_at"], is_delta=False)
+
+
+def iter_archived_logs(
+    *,
+    filters: dict[str, Any],
+    start: datetime | None,
+    end: datetime | None,
+    order: str = "asc",
+    after: tuple[datetime, int] | None = None,
+    note_prefix: str | None = None,
+) -> Iterator[TransactionAuditLog]:
+    """Archived rows matching column equality `filters` and the [start, end] range, in (created_at, id) order.
+
+    `after` is a keyset position: only rows strictly after it (in `order`) are returned.
+    `note_prefix` matches the start of the note_prefix column, like the live LIKE search.
+    """
+    directory = archive_dir()
+    segments = sorted(load_index().get("segments", []), key=lambda s: s["month"], reverse=order == "desc")
+    for segment in segments:
+        first = datetime.fromisoformat(segment["firstCreatedAt"])
+        last = datetime.fromisoformat(segment["lastCreatedAt"])
+        if (start is not None and last < start) or (end is not None and first > end):
+            continue
+        if after is not None and ((order == "asc" and last < after[0]) or (order == "desc" and first > after[0])):
+            continue
+        records = _load_segment(directory / segment["file"])
+        for record in reversed(records) if order == "desc" else records:
+            key = (record["created_at"], record["id"])
+            if after is not None and (key <= after if order == "asc" else key >= after):
+                continue
+            if start is not None and record["created_at"] < start:
+                continue
+            if end is not None and record["created_at"] > end:
+                continue
+            if any(record.get(column) != value for column, value in filters.items()):
+                continue
+            if note_prefix is not None and not (record.get("note_prefix") or "").startswith(note_prefix):
+                continue
+            yield _to_log(record)
+
+
+def count_archived_logs(
+    *,
+    filters: dict[str, Any],
+    start: datetime | None,
+    end: datetime | None,
+    cap: int | None = None,
+    note_prefix: str | None = None,
+) -> int:
+    if not filters and start is None and end is None and note_prefix is None:
+        total = sum(int(s["rows"]) for s in load_index().get("segments", []))
+        return total if cap is None else min(total, cap + 1)
+    count = 0
+    for _ in iter_archived_logs(filters=filters, start=start, end=end, note_prefix=note_prefix):
+        count += 1
+        if cap is not None and count > cap:
+            break
+    return count
+
+
+def _record(row: TransactionAuditLog, before: dict[str, Any] | None, after: dict[str, Any] | None) -> dict[str, Any]:
+    record = {k: getattr(row, k) for k in _RECORD_COLUMNS}
+    record["created_at"] = row.created_at.isoformat()
+    record["before_json"] = json.dumps(before, ensure_ascii=False) if before is not None else None
+    record["after_json"] = json.dumps(after, ensure_ascii=False) if after is not None else None
+    return record
+
+
+def _rebase_live_deltas(db: Session, month_end: datetime, latest: dict[int, dict[str, Any] | None]) -> None:
+    """Expand each transaction's first remaining delta row so live history never depends on the archive."""
+    tx_ids = [tx_id for tx_id, state in latest.items() if state is not None]
+    for i in range(0, len(tx_ids), 500):
+        chunk = tx_ids[i : i + 500]
+        rows = db.scalars(
+            select(TransactionAuditLog)
+            .where(TransactionAuditLog.transaction_id.in_(chunk), TransactionAuditLog.created_at >= month_end)
+            .order_by(TransactionAuditLog.created_at.asc(), TransactionAuditLog.id.asc())
+        ).all()
+        seen: set[int] = set()
+        for row in rows:
+            if row.transaction_id in seen:
+                continue
+            seen.add(row.transaction_id)
+            if not row.is_delta:
+                continue
+            stored_before, stored_after = stored_snapshots(row)
+            after = {**(latest[row.transaction_id] or {}), **(stored_after or {})}
+            before = {**after, **(stored_before or {})}
+            for column, value in snapshot_columns(before, after).items():
+                setattr(row, column, value)
+            row.is_delta = False
+        db.commit()
+
+
+def _write_segment(
+    db: Session, month: datetime, *, compression: str
+) -> tuple[dict[str, Any], list[int], dict[int, dict[str, Any] | None]]:
+    month_end = _next_month(month)
+    rows = db.scalars(
+        select(TransactionAuditLog)
+        .where(TransactionAuditLog.created_at >= month, TransactionAuditLog.created_at < month_end)
+        .order_by(TransactionAuditLog.created_at.asc(), TransactionAuditLog.id.asc())
+    ).all()
+
+    # The earliest live row of every transaction holds a full snapshot, so replaying
+    # this month alone is enough to expand its deltas.
+    latest: dict[int, dict[str, Any] | None] = {}
+    records: dict[int, dict[str, Any]] = {}
+    for row in rows:
+        before, after = stored_snapshots(row)
+        if is_category_merge(row, after):
+            apply_category_merge(latest, after)
+        if row.is_delta:
+            after = {**(latest.get(row.transaction_id) or {}), **(after or {})}
+            before = {**after, **(before or {})}
+        if row.transaction_id is not None:
+            latest[row.transaction_id] = after
+        records[int(row.id)] = _record(row, before, after)
+
+    path = archive_dir() / f"{month:%Y-%m}{_SUFFIXES[compression]}"
+    # A previous run may have written this segment and crashed before deleting; merge by id.
+    for existing in _load_segment(path):
+        records.setdefault(int(existing["id"]), {**existing, "created_at": existing["created_at"].isoformat()})
+    ordered = sorted(records.values(), key=lambda r: (r["created_at"], r["id"]))
+    payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in ordered).encode("utf-8")
+    _write_bytes(path, payload)
+
+    segment = {
+        "month": f"{month:%Y-%m}",
+        "file": path.name,
+        "rows": len(ordered),
+        "minId": min(r["id"] for r in ordered),
+        "maxId": max(r["id"] for r in ordered),
+        "firstCreatedAt": ordered[0]["created_at"],
+        "lastCreatedAt": ordered[-1]["created_at"],
+    }
+    ids = [int(row.id) for row in rows]
+    db.rollback()
+    return segment, ids, latest
+
+
+def _delete_archived(db: Session, ids: list[int], *, batch_size: int) -> None:
+    # Delete exactly the archived ids, a small batch per transaction, so SQL Server keeps
+    # row locks (no escalation) and rows that arrive late for an archived month are never lost.
+    for i in range(0, len(ids), batch_size):
+        db.execute(delete(TransactionAuditLog).where(TransactionAuditLog.id.in_(ids[i : i + batch_size])))
+        db.commit()
+
+
+def archive_audit_logs(
+    db: Session,
+    *,
+    retention_days: int | None = None,
+    now: datetime | None = None,
+    dry_run: bool = False,
+) -> list[dict[str, Any]]:
+    """Move whole UTC months older than the retention horizon into archive segments."""
+    compression = settings.audit_archive_compression
+    if compression not in _SUFFIXES:
+        raise RuntimeError(f"Unsupported audit_archive_compression: {compression}")
+    if compression == "zstd":
+        _zstd()
+
+    days = settings.audit_retention_days if retention_days is None else retention_days
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = _month_start(now - timedelta(days=days))
+
+    oldest = db.scalar(select(func.min(TransactionAuditLog.created_at)).where(TransactionAuditLog.created_at < cutoff))
+    if oldest is None:
+        return []
+
+    months = []
+    month = _month_start(oldest)
+    while month < cutoff:
+        months.append(month)
+        month = _next_month(month)
+    if dry_run:
+        return [{"month": f"{m:%Y-%m}"} for m in months]
+
+    archive_dir().mkdir(parents=True, exist_ok=True)
+    index = load_index()
+    by_month = {s["month"]: s for s in index.get("segments", [])}
+    written = []
+    for month in months:
+        has_rows = db.scalar(
+            select(TransactionAuditLog.id)
+            .where(TransactionAuditLog.created_at >= month, TransactionAuditLog.created_at < _next_month(month))
+            .limit(1)
+        )
+        if has_rows is None:
+            continue
+        segment, ids, latest = _write_segment(db, month, compression=compression)
+
+        # Publish the segment before deleting anything: readers may briefly see a row in both
+        # places (they dedupe by id) but never in neither.
+        by_month[segment["month"]] = segment
+        index["segments"] = sorted(by_month.values(), key=lambda s: s["month"])
+        horizon = _next_month(month).isoformat()
+        index["archivedBefore"] = max(index.get("archivedBefore") or horizon, horizon)
+        _save_index(index)
+
+        _rebase_live_deltas(db, _next_month(month), latest)
+        _delete_archived(db, ids, batch_size=max(1, settings.audit_archive_delete_batch_size))
+        written.append(segment)
+        logger.info("Archived %s audit log rows for %s", segment["rows"], segment["month"])
+    return written
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import json
+import zlib
+from collections.abc import Iterable
 from typing import Any
 
+from sqlalchemy import JSON, select, type_coerce
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.datetime_utils import as_utc
 from app.models.transaction import Transaction
 from app.models.transaction_audit_log import TransactionAuditLog
+from app.models.transaction_audit_outbox import TransactionAuditOutbox
 
 
 def _dt_iso(dt) -> str | None:
@@ -41,6 +46,145 @@ def build_transaction_snapshot(
     }
 
 
+NOTE_PREFIX_LENGTH = 32
+
+
+def snapshot_projection(snapshot: dict[str, Any] | None) -> dict[str, Any]:
+    """Indexed search columns of an audit row, taken from a full transaction snapshot."""
+    snapshot = snapshot or {}
+    note = snapshot.get("note")
+    return {
+        "amount_cents": int(snapshot["amountCents"]) if snapshot.get("amountCents") is not None else None,
+        "category_id": int(snapshot["categoryId"]) if snapshot.get("categoryId") is not None else None,
+        "bank_account_id": int(snapshot["bankAccountId"]) if snapshot.get("bankAccountId") is not None else None,
+        "note_prefix": str(note)[:NOTE_PREFIX_LENGTH] if note else None,
+    }
+
+
+def audit_log_values(
+    *,
+    action: str,
+    actor_user_id: int,
+    target_user_id: int,
+    transaction_id: int | None,
+    tx_type: str | None,
+    before: dict[str, Any] | None,
+    after: dict[str, Any] | None,
+    delta: bool = False,
+    projection: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Column values of a transaction_audit_logs row (shared by the inline and outbox paths)."""
+    return {
+        **(projection if projection is not None else snapshot_projection(after if after is not None else before)),
+        "action": action,
+        "actor_user_id": int(actor_user_id),
+        "target_user_id": int(target_user_id),
+        "transaction_id": int(transaction_id) if transaction_id is not None else None,
+        "tx_type": str(tx_type) if tx_type is not None else None,
+        **snapshot_columns(before, after),
+        "is_delta": bool(delta),
+    }
+
+
+# Compact snapshot encoding (IBOOKS_AUDIT_SNAPSHOT_ENCODING=binary): a version byte followed by
+# zlib-compressed JSON of [presence bitmask, values of present fields in schema order, extras].
+# Key names are never stored, and partial (delta) snapshots only pay for the fields they hold.
+# Append new fields to a new version tuple; never reorder an existing one.
+_SNAPSHOT_SCHEMAS: dict[int, tuple[str, ...]] = {
+    1: (
+        "id",
+        "userId",
+        "type",
+        "amountCents",
+        "occurredAt",
+        "createdAt",
+        "categoryId",
+        "fundingSource",
+        "bankAccountId",
+        "toBankAccountId",
+        "refundOfTransactionId",
+        "note",
+        "tagIds",
+        "tagNames",
+    ),
+}
+_SNAPSHOT_VERSION = 1
+
+
+def encode_snapshot(snapshot: dict[str, Any]) -> bytes:
+    fields = _SNAPSHOT_SCHEMAS[_SNAPSHOT_VERSION]
+    mask = 0
+    values: list[Any] = []
+    for bit, name in enumerate(fields):
+        if name in snapshot:
+            mask |= 1 << bit
+            values.append(snapshot[name])
+    extras = {k: v for k, v in snapshot.items() if k not in fields}
+    payload: list[Any] = [mask, *values]
+    if extras:
+        payload.append(extras)
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return bytes([_SNAPSHOT_VERSION]) + zlib.compress(raw, 6)
+
+
+def decode_snapshot(data: bytes) -> dict[str, Any]:
+    fields = _SNAPSHOT_SCHEMAS[data[0]]
+    payload = json.loads(zlib.decompress(data[1:]).decode("utf-8"))
+    mask, values = payload[0], iter(payload[1:])
+    snapshot = {name: next(values) for bit, name in enumerate(fields) if mask & (1 << bit)}
+    extras = next(values, None)
+    if isinstance(extras, dict):
+        snapshot.update(extras)
+    return snapshot
+
+
+def snapshot_columns(before: dict[str, Any] | None, after: dict[str, Any] | None) -> dict[str, Any]:
+    """before/after column values in the configured snapshot encoding."""
+    if settings.audit_snapshot_encoding == "binary":
+        return {
+            "before_json": None,
+            "after_json": None,
+            "before_bin": encode_snapshot(before) if before is not None else None,
+            "after_bin": encode_snapshot(after) if after is not None else None,
+        }
+    return {
+        "before_json": json.dumps(before, ensure_ascii=False) if before is not None else None,
+        "after_json": json.dumps(after, ensure_ascii=False) if after is not None else None,
+        "before_bin": None,
+        "after_bin": None,
+    }
+
+
+def stored_snapshots(row: TransactionAuditLog) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+    """Decoded before/after of an audit row as stored (field diffs for delta rows), whatever the encoding."""
+    before = row.before_bin if row.before_bin is not None else row.before_json
+    after = row.after_bin if row.after_bin is not None else row.after_json
+    return parse_snapshot(before), parse_snapshot(after)
+
+
+def snapshot_diff(
+    before: dict[str, Any], after: dict[str, Any]
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Old and new values of the fields that differ between two snapshots."""
+    changed = [k for k in after if before.get(k) != after[k]]
+    changed += [k for k in before if k not in after]
+    return {k: before.get(k) for k in changed}, {k: after.get(k) for k in changed}
+
+
+def _has_audit_history(db: Session, transaction_id: int) -> bool:
+    # A delta is only useful if an earlier row (normally the create) holds the full
+    # snapshot; transactions older than the audit log get a full first update instead.
+    found = db.scalar(
+        select(TransactionAuditLog.id).where(TransactionAuditLog.transaction_id == transaction_id).limit(1)
+    )
+    if found is not None:
+        return True
+    # Outbox mode: the create may still be queued. The outbox is small (drained every
+    # poll), so reading the id out of each payload is a cheap scan.
+    queued = type_coerce(TransactionAuditOutbox.payload, JSON)["transaction_id"].as_integer()
+    return db.scalar(select(TransactionAuditOutbox.id).where(queued == transaction_id).limit(1)) is not None
+
+
 def add_transaction_audit_log(
     db: Session,
     *,
@@ -51,23 +195,47 @@ def add_transaction_audit_log(
     tx_type: str | None,
     before: dict[str, Any] | None,
     after: dict[str, Any] | None,
-) -> TransactionAuditLog:
-    row = TransactionAuditLog(
-        action=action,
-        actor_user_id=int(actor_user_id),
-        target_user_id=int(target_user_id),
-        transaction_id=int(transaction_id) if transaction_id is not None else None,
-        tx_type=str(tx_type) if tx_type is not None else None,
-        before_json=json.dumps(before, ensure_ascii=False) if before is not None else None,
-        after_json=json.dumps(after, ensure_ascii=False) if after is not None else None,
-    )
+) -> TransactionAuditLog | TransactionAuditOutbox:
+    record = {
+        "action": action,
+        "actor_user_id": int(actor_user_id),
+        "target_user_id": int(target_user_id),
+        "transaction_id": int(transaction_id) if transaction_id is not None else None,
+        "tx_type": str(tx_type) if tx_type is not None else None,
+        "before": before,
+        "after": after,
+        "delta": False,
+        # Taken from the full snapshot, before an update is reduced to a diff.
+        "projection": snapshot_projection(after if after is not None else before),
+    }
+    if (
+        action == "update"
+        and before is not None
+        and after is not None
+        and transaction_id is not None
+        and _has_audit_history(db, int(transaction_id))
+    ):
+        record["before"], record["after"] = snapshot_diff(before, after)
+        record["delta"] = True
+
+    if settings.audit_log_mode == "outbox":
+        # One narrow insert in the request transaction: the record commits (or rolls back)
+        # together with the ledger change, and the background writer does the rest.
+        row = TransactionAuditOutbox(payload=json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+    else:
+        row = TransactionAuditLog(**audit_log_values(**record))
     db.add(row)
     return row
 
 
-def parse_snapshot(value: str | None) -> dict[str, Any] | None:
+def parse_snapshot(value: str | bytes | None) -> dict[str, Any] | None:
     if value is None:
         return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        try:
+            return decode_snapshot(bytes(value))
+        except Exception:
+            return {"raw": bytes(value).hex()}
     try:
         parsed = json.loads(value)
         if isinstance(parsed, dict):
@@ -75,3 +243,87 @@ def parse_snapshot(value: str | None) -> dict[str, Any] | None:
         return {"value": parsed}
     except Exception:
         return {"raw": value}
+
+
+# Category merges (POST /config/categories/{id}/merge-into/{target}) are audited as summary
+# rows with no transaction_id: before/after hold {"categoryId", "transactionIds", "tagIdMap"},
+# the after side mapping old tag ids to new ones and the before side the reverse.
+
+
+def category_merge_summary(
+    *, source_id: int, target_id: int, transaction_ids: list[int], tag_id_map: dict[int, int]
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    before = {
+        "categoryId": int(source_id),
+        "transactionIds": [int(x) for x in transaction_ids],
+        "tagIdMap": {str(new): int(old) for old, new in tag_id_map.items()},
+    }
+    after = {
+        "categoryId": int(target_id),
+        "transactionIds": [int(x) for x in transaction_ids],
+        "tagIdMap": {str(old): int(new) for old, new in tag_id_map.items()},
+    }
+    return before, after
+
+
+def is_category_merge(row: TransactionAuditLog, after: dict[str, Any] | None) -> bool:
+    return row.transaction_id is None and isinstance(after, dict) and "transactionIds" in after
+
+
+def apply_category_merge(state: dict[Any, dict[str, Any] | None], change: dict[str, Any]) -> None:
+    """Apply one side of a merge summary to full snapshots keyed by transaction id."""
+    tag_map = {int(k): int(v) for k, v in (change.get("tagIdMap") or {}).items()}
+    for tx_id in change.get("transactionIds") or []:
+        snapshot = state.get(int(tx_id))
+        if snapshot is None:
+            continue
+        updated = {**snapshot, "categoryId": change.get("categoryId")}
+        if tag_map and snapshot.get("tagIds"):
+            updated["tagIds"] = [tag_map.get(int(t), int(t)) for t in snapshot["tagIds"]]
+        state[int(tx_id)] = updated
+
+
+# Balance corrections (scripts/reconcile_balances.py --repair) are audited as summary rows
+# with no transaction_id and no tx_type: before/after hold {"bankAccountId", "balanceCents"},
+# the after side adding "reason" and the ledger components the new balance came from.
+# Replays skip them; they do not touch any transaction.
+
+
+def balance_correction_summary(
+    *, bank_account_id: int, before_cents: int, after_cents: int, components: dict[str, int]
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    before = {"bankAccountId": int(bank_account_id), "balanceCents": int(before_cents)}
+    after = {
+        "bankAccountId": int(bank_account_id),
+        "balanceCents": int(after_cents),
+        "reason": "reconcile",
+        **{k: int(v) for k, v in components.items()},
+    }
+    return before, after
+
+
+def reconstruct_snapshots(
+    history: Iterable[TransactionAuditLog],
+) -> dict[int, tuple[dict[str, Any] | None, dict[str, Any] | None]]:
+    """Full (before, after) views keyed by audit log id.
+
+    `history` must hold every row of the transactions involved, plus the category merge
+    summaries of their users, ordered by (created_at, id); delta rows are replayed on top
+    of the latest full view. If a transaction has no full snapshot yet, delta rows yield
+    the changed fields only.
+    """
+    latest: dict[int | None, dict[str, Any] | None] = {}
+    views: dict[int, tuple[dict[str, Any] | None, dict[str, Any] | None]] = {}
+    for row in history:
+        before, after = stored_snapshots(row)
+        if is_category_merge(row, after):
+            apply_category_merge(latest, after)
+            views[int(row.id)] = (before, after)
+            continue
+        if row.is_delta:
+            base = latest.get(row.transaction_id)
+            after = {**(base or {}), **(after or {})}
+            before = {**after, **(before or {})}
+        views[int(row.id)] = (before, after)
+        latest[row.transaction_id] = after
+    return views
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core import metrics
+from app.core.audit_log import audit_log_values
+from app.models.transaction_audit_log import TransactionAuditLog
+from app.models.transaction_audit_outbox import TransactionAuditOutbox
+
+logger = logging.getLogger(__name__)
+
+# SQL Server caps a statement at 2100 parameters and a VALUES list at 1000 rows.
+_MAX_STATEMENT_PARAMS = 2000
+_MAX_VALUES_ROWS = 1000
+
+
+def _rows_per_insert() -> int:
+    columns = len(TransactionAuditLog.__table__.columns) - 1  # id is generated
+    return max(1, min(_MAX_VALUES_ROWS, _MAX_STATEMENT_PARAMS // columns))
+
+
+def drain_audit_outbox(db: Session, *, batch_size: int) -> int:
+    """Move up to `batch_size` outbox records into transaction_audit_logs.
+
+    The copy and the outbox delete commit together, so a crash at any point either
+    leaves the records in the outbox (retried on the next drain) or fully moved.
+    READPAST lets several app processes drain concurrently without blocking each other.
+    """
+    records = db.scalars(
+        select(TransactionAuditOutbox)
+        .with_hint(TransactionAuditOutbox, "WITH (UPDLOCK, READPAST, ROWLOCK)", "mssql")
+        .order_by(TransactionAuditOutbox.id.asc())
+        .limit(batch_size)
+    ).all()
+    if not records:
+        db.rollback()
+        return 0
+
+    values = []
+    for record in records:
+        payload = json.loads(record.payload)
+        values.append(
+            {
+                **audit_log_values(
+                    action=payload["action"],
+                    actor_user_id=payload["actor_user_id"],
+                    target_user_id=payload["target_user_id"],
+                    transaction_id=payload["transaction_id"],
+                    tx_type=payload["tx_type"],
+                    before=payload["before"],
+                    after=payload["after"],
+                    delta=payload.get("delta", False),
+                    projection=payload.get("projection"),
+                ),
+                "created_at": record.created_at,
+            }
+        )
+
+    chunk = _rows_per_insert()
+    for start in range(0, len(values), chunk):
+        db.execute(insert(TransactionAuditLog).values(values[start : start + chunk]))
+    db.execute(
+        delete(TransactionAuditOutbox).where(TransactionAuditOutbox.id.in_([r.id for r in records]))
+    )
+    db.commit()
+    metrics.inc("audit_outbox.drained", len(records))
+    return len(records)
+
+
+def flush_audit_outbox(session_factory: sessionmaker, *, batch_size: int) -> int:
+    """Deliver every queued record now, for readers that replay the audit log.
+
+    Without this, records still in the outbox are invisible to ledger-at replay and
+    to archiving. Records a concurrent drain holds are skipped (READPAST); that drain
+    commits them itself.
+    """
+    batch_size = max(1, batch_size)
+    total = 0
+    with session_factory() as db:
+        while True:
+            moved = drain_audit_outbox(db, batch_size=batch_size)
+            total += moved
+            if moved < batch_size:
+                return total
+
+
+class AuditOutboxWriter:
+    """Background thread that drains the audit outbox until stopped."""
+
+    def __init__(self, session_factory: sessionmaker, *, batch_size: int, poll_seconds: float) -> None:
+        self._session_factory = session_factory
+        self._batch_size = max(1, batch_size)
+        self._poll_seconds = max(0.05, poll_seconds)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-outbox-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread, then flush whatever is left so a clean shutdown leaves no backlog."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.drain_all()
+
+    def drain_all(self) -> int:
+        total = 0
+        while True:
+            moved = self._drain_once()
+            total += moved
+            if moved < self._batch_size:
+                return total
+
+    def _drain_once(self) -> int:
+        db = self._session_factory()
+        try:
+            return drain_audit_outbox(db, batch_size=self._batch_size)
+        except Exception:
+            db.rollback()
+            metrics.inc("audit_outbox.drain_errors")
+            logger.exception("Audit outbox drain failed; records stay queued for the next attempt")
+            return 0
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # Keep draining while full batches come back; otherwise wait for the next poll.
+            if self._drain_once() < self._batch_size:
+                self._stop.wait(self._poll_seconds)
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+from datetime import datetime
+import logging
+
+from sqlalchemy import case, delete, event, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import ORMExecuteState, Session, attributes
+
+from app.db.session import SessionLocal
+from app.db.unit_of_work import lock_bank_account_rows, lock_bank_accounts
+from app.models.bank_account import BankAccount
+from app.models.bank_account_balance_checkpoint import BankAccountBalanceCheckpoint
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+# Balance history: balance(t) = base + effects(occurred_at < t), where base is what the
+# transactions do not explain (opening balance, manual edits), as in
+# app/core/ledger_history.balance_effects.
+#
+# Monthly checkpoints store effects(< month start) per account, so any instant costs one
+# checkpoint plus at most one month of rows. They are filled lazily on read, in a short
+# primary transaction separate from the read session, and a transaction write drops every
+# checkpoint after its occurred_at; deleting checkpoints is always safe. Fills and writes
+# serialize on the bank_accounts row lock, so no fill can store a month that a concurrent
+# write has already invalidated.
+#
+# Invalidation only sees what goes through a Session's unit of work: the listener below is
+# registered on the Session class, so sync and async sessions alike are covered, but a bulk
+# UPDATE/DELETE statement never appears in after_flush. Bulk ORM statements on Transaction
+# are therefore refused unless they carry the HISTORY_UNAFFECTED execution option (the
+# caller vouches that no history field changes). Core statements run on a raw Connection
+# are invisible to all of this; never write transactions that way.
+
+# Fields whose change moves an account's balance history.
+_EFFECT_FIELDS = ("type", "amount_cents", "funding_source", "bank_account_id", "to_bank_account_id", "occurred_at")
+
+# Execution option that lets a bulk UPDATE/DELETE on a guarded model run.
+HISTORY_UNAFFECTED = "history_unaffected"
+
+
+def month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(dt: datetime) -> datetime:
+    if dt.month == 12:
+        return dt.replace(year=dt.year + 1, month=1)
+    return dt.replace(month=dt.month + 1)
+
+
+def _effect(account_id: int):
+    # SQL mirror of ledger_history.balance_effects for one account.
+    amount = Transaction.amount_cents
+    return case(
+        (Transaction.type == "transfer", case((Transaction.bank_account_id == account_id, -amount), else_=amount)),
+        (Transaction.funding_source != "bank", 0),
+        (Transaction.type == "expense", -amount),
+        (Transaction.type.in_(("income", "refund")), amount),
+        else_=0,
+    )
+
+
+def _account_filter(account: BankAccount) -> list:
+    return [
+        Transaction.user_id == account.user_id,
+        or_(Transaction.bank_account_id == account.id, Transaction.to_bank_account_id == account.id),
+    ]
+
+
+def _sum_effects(db: Session, account: BankAccount, start: datetime | None, end: datetime | None) -> int:
+    filters = _account_filter(account)
+    if start is not None:
+        filters.append(Transaction.occurred_at >= start)
+    if end is not None:
+        filters.append(Transaction.occurred_at < end)
+    return int(db.scalar(select(func.coalesce(func.sum(_effect(account.id)), 0)).where(*filters)) or 0)
+
+
+def first_transaction_at(db: Session, account: BankAccount) -> datetime | None:
+    # One seek per (account, occurred_at) index instead of a MIN over an OR.
+    candidates = [
+        db.scalar(
+            select(func.min(Transaction.occurred_at)).where(
+                Transaction.user_id == account.user_id, column == account.id
+            )
+        )
+        for column in (Transaction.bank_account_id, Transaction.to_bank_account_id)
+    ]
+    candidates = [c for c in candidates if c is not None]
+    return min(candidates) if candidates else None
+
+
+def _stored_checkpoints(db: Session, account_id: int, upto: datetime) -> dict[datetime, int]:
+    return {
+        as_of: int(ledger_cents)
+        for as_of, ledger_cents in db.execute(
+            select(BankAccountBalanceCheckpoint.as_of, BankAccountBalanceCheckpoint.ledger_cents).where(
+                BankAccountBalanceCheckpoint.bank_account_id == account_id,
+                BankAccountBalanceCheckpoint.as_of <= upto,
+            )
+        ).all()
+    }
+
+
+def _missing_checkpoints(
+    db: Session, account: BankAccount, stored: dict[datetime, int], upto: datetime
+) -> dict[datetime, int]:
+    # Months after the last stored checkpoint (or from the first transaction), one month of rows each.
+    created: dict[datetime, int] = {}
+    if stored:
+        cursor = max(stored)
+        value = stored[cursor]
+    else:
+        first = first_transaction_at(db, account)
+        cursor = min(month_start(first), upto) if first is not None else upto
+        value = 0
+        created[cursor] = value
+    while cursor < upto:
+        following = next_month(cursor)
+        value += _sum_effects(db, account, cursor, following)
+        created[following] = value
+        cursor = following
+    return created
+
+
+def ensure_checkpoints(account_id: int, upto: datetime) -> None:
+    """Store the missing checkpoints of an account from its first month through `upto`.
+
+    Runs in a short transaction of its own on the primary, apart from the caller's
+    (read) session, holding the account row lock: writers take the same lock before
+    they flush (see _lock_changed_accounts), so a fill never computes months from rows
+    a concurrent write is about to change and then stores them after that write's
+    invalidation. If a concurrent fill stores some of the same months first, ours are
+    dropped.
+    """
+    with SessionLocal() as db:
+        account = lock_bank_accounts(db, [account_id]).get(account_id)
+        if account is None:
+            return
+        created = _missing_checkpoints(db, account, _stored_checkpoints(db, account_id, upto), upto)
+        if not created:
+            return
+        db.add_all(
+            BankAccountBalanceCheckpoint(bank_account_id=account_id, as_of=as_of, ledger_cents=ledger_cents)
+            for as_of, ledger_cents in created.items()
+        )
+        try:
+            db.commit()
+        except IntegrityError:
+            # uq_bank_account_balance_checkpoints_account_as_of: a concurrent fill won.
+            db.rollback()
+            logger.info("balance checkpoints of account %s were filled concurrently", account_id)
+
+
+def snapshot_checkpoints(db: Session, account: BankAccount, upto: datetime) -> dict[datetime, int]:
+    """Checkpoints of `account` through `upto` as `db` sees them.
+
+    Balances, checkpoints and effects must all come from one snapshot. A replica that
+    has not caught up with ensure_checkpoints yet lacks the newest months; those are
+    replayed in memory from its own rows instead of taken from the primary.
+    """
+    stored = _stored_checkpoints(db, int(account.id), upto)
+    return {**stored, **_missing_checkpoints(db, account, stored, upto)}
+
+
+def _checkpoint_value(checkpoints: dict[datetime, int], as_of: datetime) -> int:
+    # Months before the first checkpoint precede every transaction of the account.
+    return checkpoints.get(as_of, 0)
+
+
+def base_cents(db: Session, account: BankAccount, checkpoints: dict[datetime, int], upto: datetime) -> int:
+    """The part of the stored balance that no transaction explains."""
+    return int(account.balance_cents) - checkpoints[upto] - _sum_effects(db, account, upto, None)
+
+
+def cumulative_window(
+    db: Session, account: BankAccount, checkpoints: dict[datetime, int], closes: list[datetime]
+) -> list[int]:
+    """effects(< t) for each ascending instant in `closes`, from one windowed running sum.
+
+    The scan starts at the checkpoint at or before the first instant, so at most one
+    month of rows outside the requested range is read.
+    """
+    if not closes:
+        return []
+    upto = max(checkpoints)
+    anchor = min(month_start(closes[0]), upto)
+    running = func.sum(_effect(account.id)).over(
+        order_by=(Transaction.occurred_at, Transaction.id),
+        rows=(None, 0),
+    )
+    rows = db.execute(
+        select(Transaction.occurred_at, running)
+        .where(*_account_filter(account), Transaction.occurred_at >= anchor, Transaction.occurred_at < closes[-1])
+        .order_by(Transaction.occurred_at, Transaction.id)
+    ).all()
+
+    base = _checkpoint_value(checkpoints, anchor)
+    result: list[int] = []
+    total = 0
+    i = 0
+    for close in closes:
+        while i < len(rows) and rows[i][0] < close:
+            total = int(rows[i][1] or 0)
+            i += 1
+        result.append(base + total)
+    return result
+
+
+def cumulative_points(
+    db: Session, account: BankAccount, checkpoints: dict[datetime, int], points: list[datetime]
+) -> list[int]:
+    """effects(< t) for sparse instants, each from its nearest checkpoint.
+
+    One query reads only the rows between every instant and its checkpoint.
+    """
+    upto = max(checkpoints)
+    gaps: list[tuple[datetime, datetime, int, int]] = []  # (start, end, sign, point index)
+    result: list[int] = []
+    for index, point in enumerate(points):
+        floor = min(month_start(point), upto)
+        ceil = next_month(floor)
+        if ceil in checkpoints and ceil - point < point - floor:
+            result.append(checkpoints[ceil])
+            gaps.append((point, ceil, -1, index))
+        else:
+            result.append(_checkpoint_value(checkpoints, floor))
+            gaps.append((floor, point, 1, index))
+
+    ranges = [(start, end) for start, end, _, _ in gaps if start < end]
+    if ranges:
+        rows = db.execute(
+            select(Transaction.occurred_at, _effect(account.id)).where(
+                *_account_filter(account),
+                or_(*((Transaction.occurred_at >= start) & (Transaction.occurred_at < end) for start, end in ranges)),
+            )
+        ).all()
+        for occurred_at, effect in rows:
+            for start, end, sign, index in gaps:
+                if start <= occurred_at < end:
+                    result[index] += sign * int(effect or 0)
+    return result
+
+
+def _history_values(obj: Transaction, field: str) -> list:
+    # Current and pre-flush values; after_flush still sees the unreset history.
+    return [v for v in attributes.get_history(obj, field).sum() if v is not None]
+
+
+def changed_accounts(session: Session) -> dict[int, datetime]:
+    """Accounts whose history this flush changes, with the earliest occurred_at involved.
+
+    Call from before_flush or after_flush, while attribute history still holds the
+    pre-flush values.
+    """
+    earliest: dict[int, datetime] = {}
+    changed = [
+        obj
+        for obj in session.dirty
+        if isinstance(obj, Transaction) and any(attributes.get_history(obj, f).has_changes() for f in _EFFECT_FIELDS)
+    ]
+    for obj in (*session.new, *session.deleted, *changed):
+        if not isinstance(obj, Transaction):
+            continue
+        times = _history_values(obj, "occurred_at")
+        if not times:
+            continue
+        when = min(times)
+        for account_id in (*_history_values(obj, "bank_account_id"), *_history_values(obj, "to_bank_account_id")):
+            earliest[int(account_id)] = min(earliest.get(int(account_id), when), when)
+    return earliest
+
+
+def refuse_unchecked_bulk_write(state: ORMExecuteState, models: tuple[type, ...]) -> None:
+    """Raise for a bulk UPDATE/DELETE on one of `models` that after_flush invalidation cannot see."""
+    if not (state.is_update or state.is_delete) or state.execution_options.get(HISTORY_UNAFFECTED):
+        return
+    mapper = state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, models):
+        raise RuntimeError(
+            f"Bulk {'UPDATE' if state.is_update else 'DELETE'} on {mapper.class_.__name__} bypasses cache "
+            f"invalidation; use the unit of work, or execution_options({HISTORY_UNAFFECTED}=True) when it "
+            "changes no field a balance checkpoint or card statement depends on"
+        )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _guard_transaction_bulk_writes(state: ORMExecuteState) -> None:
+    refuse_unchecked_bulk_write(state, (Transaction,))
+
+
+@event.listens_for(Session, "before_flush")
+def _lock_changed_accounts(session: Session, flush_context, instances) -> None:
+    # Before any row is written, so a fill holding the lock never waits on our rows.
+    accounts = changed_accounts(session)
+    if accounts:
+        lock_bank_account_rows(session.connection(), accounts)
+
+
+@event.listens_for(Session, "after_flush")
+def _drop_stale_checkpoints(session: Session, flush_context) -> None:
+    earliest = changed_accounts(session)
+    if earliest:
+        connection = session.connection()
+        for account_id, when in earliest.items():
+            connection.execute(
+                delete(BankAccountBalanceCheckpoint).where(
+                    BankAccountBalanceCheckpoint.bank_account_id == account_id,
+                    BankAccountBalanceCheckpoint.as_of > when,
+                )
+            )
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import BigInteger, and_, case, cast, func, literal_column, select, union_all, update
+from sqlalchemy.orm import Session
+
+from app.core.audit_log import add_transaction_audit_log, balance_correction_summary
+from app.models.bank_account import BankAccount
+from app.models.transaction import Transaction
+
+# Balance reconciliation. bank_accounts.balance_cents is adjusted incrementally by the
+# transaction, refund, transfer and delete routes; it should always equal
+#   opening_balance_cents + income + refunds + transfers in - expenses - transfers out
+# over the account's transactions. Accounts are checked in chunks of consecutive ids,
+# each with one grouped aggregate over the chunk's transactions.
+
+COMPONENTS = ("incomeCents", "expenseCents", "refundCents", "transferInCents", "transferOutCents")
+
+
+def _ledger_components(db: Session, first_id: int, last_id: int) -> dict[int, dict[str, int]]:
+    amount = cast(Transaction.amount_cents, BigInteger)
+    by_bank = Transaction.funding_source == "bank"
+    zero = literal_column("0")
+    # Each transaction contributes one row to its account, and transfers one more to the
+    # destination; a single GROUP BY then yields every component of every account.
+    outgoing = select(
+        Transaction.bank_account_id.label("account_id"),
+        case((and_(by_bank, Transaction.type == "income"), amount), else_=0).label("income"),
+        case((and_(by_bank, Transaction.type == "expense"), amount), else_=0).label("expense"),
+        case((and_(by_bank, Transaction.type == "refund"), amount), else_=0).label("refund"),
+        zero.label("transfer_in"),
+        case((Transaction.type == "transfer", amount), else_=0).label("transfer_out"),
+    ).where(Transaction.bank_account_id.between(first_id, last_id))
+    incoming = select(
+        Transaction.to_bank_account_id.label("account_id"),
+        zero.label("income"),
+        zero.label("expense"),
+        zero.label("refund"),
+        amount.label("transfer_in"),
+        zero.label("transfer_out"),
+    ).where(Transaction.type == "transfer", Transaction.to_bank_account_id.between(first_id, last_id))
+    rows = union_all(outgoing, incoming).subquery()
+
+    grouped = db.execute(
+        select(
+            rows.c.account_id,
+            func.sum(rows.c.income),
+            func.sum(rows.c.expense),
+            func.sum(rows.c.refund),
+            func.sum(rows.c.transfer_in),
+            func.sum(rows.c.transfer_out),
+        ).group_by(rows.c.account_id)
+    ).all()
+    return {int(account_id): dict(zip(COMPONENTS, (int(v or 0) for v in sums))) for account_id, *sums in grouped}
+
+
+def expected_balance(opening_cents: int, components: dict[str, int]) -> int:
+    return (
+        int(opening_cents)
+        + components["incomeCents"]
+        + components["refundCents"]
+        + components["transferInCents"]
+        - components["expenseCents"]
+        - components["transferOutCents"]
+    )
+
+
+def reconcile_chunk(
+    db: Session,
+    *,
+    after_id: int,
+    limit: int,
+    repair: bool = False,
+    actor_user_id: int | None = None,
+    user_ids: list[int] | None = None,
+) -> tuple[list[dict[str, Any]], int | None]:
+    """Check up to `limit` accounts with id > `after_id`.
+
+    Returns the drifted accounts and the last id checked (None once every account has
+    been seen). With `repair`, drifted balances are set to the expected value and each
+    correction is audited; the caller commits.
+    """
+    if repair and actor_user_id is None:
+        raise ValueError("repair requires actor_user_id")
+
+    query = select(
+        BankAccount.id, BankAccount.user_id, BankAccount.balance_cents, BankAccount.opening_balance_cents
+    ).where(BankAccount.id > after_id)
+    if user_ids:
+        query = query.where(BankAccount.user_id.in_(user_ids))
+    accounts = db.execute(query.order_by(BankAccount.id.asc()).limit(limit)).all()
+    if not accounts:
+        return [], None
+
+    totals = _ledger_components(db, int(accounts[0].id), int(accounts[-1].id))
+    drifts: list[dict[str, Any]] = []
+    for account in accounts:
+        components = totals.get(int(account.id)) or dict.fromkeys(COMPONENTS, 0)
+        expected = expected_balance(account.opening_balance_cents, components)
+        if expected == int(account.balance_cents):
+            continue
+        drift = {
+            "bankAccountId": int(account.id),
+            "userId": int(account.user_id),
+            "balanceCents": int(account.balance_cents),
+            "expectedCents": expected,
+            "driftCents": int(account.balance_cents) - expected,
+            **components,
+            "repaired": False,
+        }
+        if repair:
+            # Only while the balance is still the one read; a concurrent write waits for the next run.
+            # balance_cents is read live, never cached, so no checkpoint or statement goes stale.
+            result = db.execute(
+                update(BankAccount)
+                .where(BankAccount.id == account.id, BankAccount.balance_cents == account.balance_cents)
+                .values(balance_cents=expected)
+                .execution_options(synchronize_session=False, history_unaffected=True)
+            )
+            if result.rowcount == 1:
+                before, after = balance_correction_summary(
+                    bank_account_id=int(account.id),
+                    before_cents=int(account.balance_cents),
+                    after_cents=expected,
+                    components=components,
+                )
+                add_transaction_audit_log(
+                    db,
+                    action="update",
+                    actor_user_id=int(actor_user_id),
+                    target_user_id=int(account.user_id),
+                    transaction_id=None,
+                    tx_type=None,
+                    before=before,
+                    after=after,
+                )
+                drift["repaired"] = True
+        drifts.append(drift)
+    return drifts, int(accounts[-1].id)
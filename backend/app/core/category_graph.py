@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+
+from sqlalchemy import and_, event, select
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.models.category import Category
+from app.models.category_tag import CategoryTag
+
+# Per-user category tree and tags, cached so write-path validation (leaf checks, tag
+# ownership, cycle checks) costs no extra round trips. Process-local like
+# app/db/routing.py: a committed Category/CategoryTag change on any Session (the listeners
+# are on the Session class, so async sessions count) drops the owner's entry, and the next
+# lookup reloads it in one query. A bulk INSERT/UPDATE/DELETE statement on either model
+# never reaches after_flush and names no owner, so committing one drops every cached
+# graph. Core statements on a raw Connection are not seen at all.
+
+# Key in Session.info holding the user ids whose categories/tags this transaction changed.
+_DIRTY_KEY = "ibooks_category_graph_dirty"
+# Key in Session.info set when this transaction ran a bulk statement on categories/tags.
+_DIRTY_ALL_KEY = "ibooks_category_graph_dirty_all"
+
+_lock = threading.Lock()
+_graphs: dict[int, CategoryGraph] = {}
+# Bumped on every invalidation, so a load that raced with a write is not cached.
+_generations: dict[int, int] = {}
+# Bumped when every graph is dropped at once.
+_epoch = 0
+
+
+class CategoryNode:
+    __slots__ = ("id", "type", "name", "parent_id", "sort_key", "is_active", "child_ids")
+
+    def __init__(self, row) -> None:
+        self.id = int(row.id)
+        self.type = str(row.type)
+        self.name = str(row.name)
+        self.parent_id = int(row.parent_id) if row.parent_id is not None else None
+        self.sort_key = str(row.sort_key)
+        self.is_active = bool(row.is_active)
+        self.child_ids: list[int] = []
+
+
+class TagNode:
+    __slots__ = ("id", "category_id", "name", "is_active")
+
+    def __init__(self, tag_id: int, category_id: int, name: str, is_active: bool) -> None:
+        self.id = tag_id
+        self.category_id = category_id
+        self.name = name
+        self.is_active = is_active
+
+
+class CategoryGraph:
+    """Immutable view of one user's categories and tags."""
+
+    def __init__(self, categories: Iterable, tags: Iterable[TagNode]) -> None:
+        self.nodes: dict[int, CategoryNode] = {}
+        for row in categories:
+            self.nodes[int(row.id)] = CategoryNode(row)
+        for node in self.nodes.values():
+            if node.parent_id in self.nodes:
+                self.nodes[node.parent_id].child_ids.append(node.id)
+
+        self.tags: dict[int, TagNode] = {t.id: t for t in tags}
+
+        # Top-level ancestor = the first-level category (child of a root) above each node;
+        # None for roots. Nodes whose parent chain leaves the user's tree are orphans.
+        self._top_level: dict[int, int | None] = {}
+        self._orphans: set[int] = set()
+        for node_id in self.nodes:
+            self._resolve(node_id)
+
+    def _resolve(self, node_id: int) -> None:
+        chain: list[int] = []
+        cursor = node_id
+        while cursor not in self._top_level and cursor not in self._orphans:
+            node = self.nodes.get(cursor)
+            if node is None or cursor in chain:
+                self._orphans.update(chain)
+                return
+            parent = self.nodes.get(node.parent_id) if node.parent_id is not None else None
+            if node.parent_id is None or (parent is not None and parent.parent_id is None):
+                self._top_level[cursor] = cursor if node.parent_id is not None else None
+                break
+            chain.append(cursor)
+            cursor = node.parent_id
+        # Everything on the walked chain shares the ancestor found at its end.
+        if cursor in self._orphans:
+            self._orphans.update(chain)
+        else:
+            for item in chain:
+                self._top_level[item] = self._top_level[cursor]
+
+    def get(self, category_id: int) -> CategoryNode | None:
+        return self.nodes.get(int(category_id))
+
+    def is_leaf(self, category_id: int) -> bool:
+        node = self.nodes.get(int(category_id))
+        return node is not None and not node.child_ids
+
+    def has_active_child(self, category_id: int) -> bool:
+        node = self.nodes.get(int(category_id))
+        return node is not None and any(self.nodes[c].is_active for c in node.child_ids)
+
+    def is_orphan(self, category_id: int) -> bool:
+        return int(category_id) in self._orphans
+
+    def top_level(self, category_id: int) -> CategoryNode | None:
+        top_level_id = self._top_level.get(int(category_id))
+        return self.nodes.get(top_level_id) if top_level_id is not None else None
+
+    def children(self, parent_id: int | None, type: str) -> list[CategoryNode]:
+        """Children of `parent_id` (the roots of `type` for None), in display order."""
+        if parent_id is None:
+            nodes = [n for n in self.nodes.values() if n.parent_id is None and n.type == type]
+        else:
+            parent = self.nodes.get(int(parent_id))
+            nodes = [self.nodes[c] for c in parent.child_ids if self.nodes[c].type == type] if parent else []
+        return sorted(nodes, key=lambda n: (n.sort_key, n.id))
+
+    def ancestor_ids(self, category_id: int) -> list[int]:
+        result: list[int] = []
+        node = self.nodes.get(int(category_id))
+        while node is not None and node.parent_id is not None and node.parent_id not in result:
+            result.append(node.parent_id)
+            node = self.nodes.get(node.parent_id)
+        return result
+
+
+def _load(db: Session, user_id: int) -> CategoryGraph:
+    rows = db.execute(
+        select(
+            Category.id,
+            Category.type,
+            Category.name,
+            Category.parent_id,
+            Category.sort_key,
+            Category.is_active,
+            CategoryTag.id.label("tag_id"),
+            CategoryTag.name.label("tag_name"),
+            CategoryTag.is_active.label("tag_is_active"),
+        )
+        .outerjoin(CategoryTag, and_(CategoryTag.category_id == Category.id, CategoryTag.user_id == Category.user_id))
+        .where(Category.user_id == user_id)
+    ).all()
+
+    categories = {int(r.id): r for r in rows}
+    tags = [
+        TagNode(int(r.tag_id), int(r.id), str(r.tag_name), bool(r.tag_is_active)) for r in rows if r.tag_id is not None
+    ]
+    return CategoryGraph(categories.values(), tags)
+
+
+def category_graph(db: Session, user_id: int) -> CategoryGraph:
+    """Category graph of `user_id`, loaded through `db` on a cache miss."""
+    user_id = int(user_id)
+    with _lock:
+        graph = _graphs.get(user_id)
+        generation = (_epoch, _generations.get(user_id, 0))
+    if graph is not None:
+        return graph
+
+    graph = _load(db, user_id)
+    # Never cache a view that includes this transaction's own uncommitted changes.
+    if user_id not in db.info.get(_DIRTY_KEY, ()) and not db.info.get(_DIRTY_ALL_KEY):
+        with _lock:
+            if (_epoch, _generations.get(user_id, 0)) == generation:
+                _graphs[user_id] = graph
+    return graph
+
+
+def invalidate_category_graph(user_id: int) -> None:
+    with _lock:
+        _graphs.pop(int(user_id), None)
+        _generations[int(user_id)] = _generations.get(int(user_id), 0) + 1
+
+
+def invalidate_all_category_graphs() -> None:
+    global _epoch
+    with _lock:
+        _graphs.clear()
+        _epoch += 1
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_category_writes(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        mapper = state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, (Category, CategoryTag)):
+            state.session.info[_DIRTY_ALL_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_category_writes(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Category, CategoryTag)) and obj.user_id is not None:
+            session.info.setdefault(_DIRTY_KEY, set()).add(int(obj.user_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    if session.info.pop(_DIRTY_ALL_KEY, False):
+        invalidate_all_category_graphs()
+    for user_id in session.info.pop(_DIRTY_KEY, ()):
+        invalidate_category_graph(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
+    session.info.pop(_DIRTY_ALL_KEY, None)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.commute_reservation import CommuteReservation
+from app.schemas.commute_card import CommuteReservationOut
+
+# A user has at most one reservation per (ride_date, travel_slot), card or ticket alike.
+# uq_commute_reservations_user_date_slot enforces it, so writes flush and turn a violation
+# into the usual 400 instead of checking the slot first.
+
+
+def reservation_out(row: CommuteReservation) -> CommuteReservationOut:
+    return CommuteReservationOut(
+        id=row.id,
+        card_id=row.card_id,
+        ride_date=row.ride_date,
+        departure_time=row.departure_time,
+        travel_slot=row.travel_slot,  # type: ignore[arg-type]
+        direction=row.direction,  # type: ignore[arg-type]
+        train_no=row.train_no,
+        carriage_no=row.carriage_no,
+        seat_no=row.seat_no,
+        created_at=row.created_at,
+    )
+
+
+def slot_conflict_error(travel_slot: str) -> HTTPException:
+    label = "上午" if travel_slot == "am" else "下午"
+    return HTTPException(status_code=400, detail=f"该日期的{label}已经有预约了")
+
+
+def flush_reservations(db: Session, *, user_id: int, slots: Iterable[tuple[date, str]]) -> None:
+    """Flush pending reservation writes, reporting a taken slot as a 400.
+
+    On a violation the session is rolled back and one query finds the slot that was
+    taken; any other integrity error is re-raised.
+    """
+    slots = list(slots)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        taken = db.scalar(
+            select(CommuteReservation.travel_slot)
+            .where(
+                CommuteReservation.user_id == user_id,
+                or_(
+                    *(
+                        and_(CommuteReservation.ride_date == ride_date, CommuteReservation.travel_slot == travel_slot)
+                        for ride_date, travel_slot in slots
+                    )
+                ),
+            )
+            .limit(1)
+        )
+        if taken is None:
+            raise
+        raise slot_conflict_error(taken)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Negotiated response compression. JSON API responses at least `minimum_size` bytes are
+# compressed with brotli or gzip; every other response passes through untouched. Static
+# assets are not compressed here: the frontend build writes .br/.gz siblings that
+# app.core.static_files serves as-is.
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; without it responses fall back to gzip only
+    brotli = None
+
+
+def accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """Content codings from an Accept-Encoding header, with their q-values."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def preferred_encodings(accept_encoding: str, available: tuple[str, ...]) -> list[str]:
+    """`available` codings the client accepts, best first; ties keep the order of `available`."""
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    ranked = [(accepted.get(coding, wildcard), -index, coding) for index, coding in enumerate(available)]
+    return [coding for q, _, coding in sorted(ranked, reverse=True) if q > 0]
+
+
+def _is_json(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.minimum_size <= 0 or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        choices = preferred_encodings(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        encoding = choices[0] if choices else None
+        start: Message | None = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not _is_json(headers.get("content-type", ""))
+                    or "no-transform" in headers.get("cache-control", "").lower()
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            # API JSON is sent in one piece; buffer in case a route streams it.
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+
+            headers = MutableHeaders(scope=start)
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is not None and len(body) >= self.minimum_size:
+                body = self._compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                # The compressed bytes are a different representation of the same content.
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+            headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
@@ -13,6 +13,45 @@ class Settings(BaseSettings):
     db_user: str | None = None
     db_password: str | None = None
     db_driver: str = "ODBC Driver 17 for SQL Server"
+    # Optional full SQLAlchemy URL, overrides the ODBC fields above (e.g. sqlite:///./ibooks.db for local runs).
+    db_url: str | None = None
+    # Async engine pool used by read-only routers: bounds concurrent report queries at the DB, not at threads.
+    db_async_pool_size: int = 10
+    db_async_max_overflow: int = 20
+    # Optional read replica (full SQLAlchemy URL). Stats and list GETs are routed here when set.
+    db_read_url: str | None = None
+    # Bounded staleness: a user's reads stay on the primary for this long after their own write.
+    db_read_after_write_seconds: float = 5.0
+    # Connections opened per pool at startup so the first requests don't pay the ODBC connect cost.
+    db_prewarm_connections: int = 2
+    # Per-endpoint isolation on SQL Server (requires migration 0017_row_versioning); empty disables.
+    # Report/list reads use row versions; only balance-checking writes pay for SERIALIZABLE.
+    db_report_isolation_level: str = "SNAPSHOT"
+    db_balance_isolation_level: str = "SERIALIZABLE"
+    # Write routes are re-run on deadlock/timeout errors with jittered exponential backoff.
+    db_write_retry_attempts: int = 4
+    db_write_retry_base_delay_ms: int = 50
+    # "inline" writes audit rows in the request transaction; "outbox" appends a compact record
+    # (requires migration 0018) and a background writer moves it to transaction_audit_logs in batches.
+    audit_log_mode: str = "inline"
+    audit_outbox_batch_size: int = 200
+    audit_outbox_poll_seconds: float = 1.0
+    # "json" stores snapshots as NVARCHAR JSON; "binary" (requires migration 0023) stores a
+    # versioned positional array, zlib-compressed into VARBINARY. Reads decode both.
+    audit_snapshot_encoding: str = "json"
+    # `python -m scripts.archive_audit_logs` moves whole months older than the retention horizon
+    # into compressed JSONL segments (gzip, or zstd with the optional `zstandard` package).
+    audit_retention_days: int = 365
+    audit_archive_dir: str = "./audit_archive"
+    audit_archive_compression: str = "gzip"
+    audit_archive_delete_batch_size: int = 1000
+    # `python -m scripts.ledger_checkpoints` snapshots a user's ledger when the latest checkpoint
+    # is older than this; GET /api/admin/ledger-at replays audit rows from the nearest one.
+    ledger_checkpoint_interval_days: int = 7
+    # Credit card statements: the minimum due is this percentage of the statement balance,
+    # at least the floor (capped at the balance itself).
+    credit_card_min_payment_percent: int = 10
+    credit_card_min_payment_floor_cents: int = 10000
 
     jwt_secret: str = "change-me"
     jwt_expire_minutes: int = 60
@@ -30,5 +69,9 @@ class Settings(BaseSettings):
     # Path can be absolute or repo-root-relative (when running from backend/).
     frontend_dist_dir: str = "../frontend/dist"
 
+    # JSON responses at least this many bytes are compressed for clients that accept it
+    # (brotli with the optional `brotli` package, else gzip); 0 disables.
+    response_compression_min_bytes: int = 1024
+
 
 settings = Settings()
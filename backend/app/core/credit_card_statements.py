@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import calendar
+from datetime import date, datetime, timedelta, timezone, tzinfo
+import logging
+from typing import Any
+
+from sqlalchemy import and_, case, delete, event, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import ORMExecuteState, Session, attributes
+
+from app.core.balance_history import changed_accounts, first_transaction_at, refuse_unchecked_bulk_write
+from app.core.config import settings
+from app.core.datetime_utils import local_to_utc_naive, user_zone
+from app.db.session import SessionLocal
+from app.db.unit_of_work import lock_bank_account_rows, lock_bank_accounts
+from app.models.bank_account import BankAccount
+from app.models.credit_card_statement import CreditCardStatement
+from app.models.transaction import Transaction
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Credit card statements. A card with billing day B closes a cycle on day B of every month
+# (the last day in shorter months); a cycle runs from the day after the previous statement
+# date through the statement date, in the owner's time zone. Payment is due on repayment
+# day R: in the statement month when R > B, otherwise in the following month.
+#
+# Amounts are what the user owes, i.e. the negated account balance: charges are card
+# expenses and transfers out of the card, credits are income and refunds to it, payments
+# are transfers into it. Closed cycles are cached in credit_card_statements and chained
+# through previous_balance_cents, so a request aggregates only the open cycle; missing ones
+# are filled in a short primary transaction separate from the read session. Writes that
+# can change a cached cycle (transactions at or before it, the card's billing settings or
+# opening balance, the owner's time zone) drop the affected rows; fills and those writes
+# serialize on the card's bank_accounts row lock. As with balance checkpoints, only
+# unit-of-work writes are seen, from any Session; bulk ORM statements on BankAccount and
+# User are refused unless marked HISTORY_UNAFFECTED (see app/core/balance_history.py).
+
+# BankAccount fields whose change invalidates every cached cycle of the card.
+_CARD_FIELDS = ("kind", "billing_day", "repayment_day", "opening_balance_cents")
+
+
+def _day_in_month(year: int, month: int, day: int) -> date:
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _shift_month(day: date, months: int) -> tuple[int, int]:
+    index = day.year * 12 + day.month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def statement_date_on_or_after(day: date, billing_day: int) -> date:
+    candidate = _day_in_month(day.year, day.month, billing_day)
+    if candidate >= day:
+        return candidate
+    return _day_in_month(*_shift_month(day, 1), billing_day)
+
+
+def due_date_for(statement_date: date, billing_day: int, repayment_day: int) -> date:
+    if repayment_day > billing_day:
+        return _day_in_month(statement_date.year, statement_date.month, repayment_day)
+    return _day_in_month(*_shift_month(statement_date, 1), repayment_day)
+
+
+def minimum_due(statement_balance_cents: int) -> int:
+    if statement_balance_cents <= 0:
+        return 0
+    percent = -(-statement_balance_cents * settings.credit_card_min_payment_percent // 100)
+    return min(statement_balance_cents, max(percent, settings.credit_card_min_payment_floor_cents))
+
+
+def _local_midnight(day: date, zone: tzinfo) -> datetime:
+    return local_to_utc_naive(datetime(day.year, day.month, day.day), zone)
+
+
+def _cycle_totals(db: Session, account: BankAccount, start: datetime, end: datetime) -> tuple[int, int, int]:
+    amount = Transaction.amount_cents
+    own = Transaction.bank_account_id == account.id
+    by_bank = Transaction.funding_source == "bank"
+    charges = case(
+        (and_(own, Transaction.type == "transfer"), amount),
+        (and_(own, by_bank, Transaction.type == "expense"), amount),
+        else_=0,
+    )
+    credits = case((and_(own, by_bank, Transaction.type.in_(("income", "refund"))), amount), else_=0)
+    payments = case((and_(Transaction.type == "transfer", Transaction.to_bank_account_id == account.id), amount), else_=0)
+    row = db.execute(
+        select(
+            func.coalesce(func.sum(charges), 0),
+            func.coalesce(func.sum(credits), 0),
+            func.coalesce(func.sum(payments), 0),
+        ).where(
+            Transaction.user_id == account.user_id,
+            or_(own, Transaction.to_bank_account_id == account.id),
+            Transaction.occurred_at >= start,
+            Transaction.occurred_at < end,
+        )
+    ).one()
+    return int(row[0]), int(row[1]), int(row[2])
+
+
+def _build_cycle(
+    db: Session, account: BankAccount, zone: tzinfo, cycle_start: date, statement_date: date, previous: int
+) -> CreditCardStatement:
+    closes_at = _local_midnight(statement_date + timedelta(days=1), zone)
+    charges, credits, payments = _cycle_totals(db, account, _local_midnight(cycle_start, zone), closes_at)
+    return CreditCardStatement(
+        bank_account_id=int(account.id),
+        cycle_start=cycle_start,
+        statement_date=statement_date,
+        due_date=due_date_for(statement_date, account.billing_day, account.repayment_day),
+        closes_at=closes_at,
+        previous_balance_cents=previous,
+        charges_cents=charges,
+        credits_cents=credits,
+        payments_cents=payments,
+        statement_balance_cents=previous + charges - credits - payments,
+    )
+
+
+def _as_dict(row: CreditCardStatement, *, is_open: bool) -> dict[str, Any]:
+    return {
+        "cycle_start": row.cycle_start,
+        "statement_date": row.statement_date,
+        "due_date": row.due_date,
+        "closes_at": row.closes_at,
+        "previous_balance_cents": int(row.previous_balance_cents),
+        "charges_cents": int(row.charges_cents),
+        "credits_cents": int(row.credits_cents),
+        "payments_cents": int(row.payments_cents),
+        "statement_balance_cents": int(row.statement_balance_cents),
+        "is_open": is_open,
+    }
+
+
+def _cached_statements(db: Session, account_id: int, open_date: date) -> list[CreditCardStatement]:
+    return db.scalars(
+        select(CreditCardStatement)
+        .where(CreditCardStatement.bank_account_id == account_id, CreditCardStatement.statement_date < open_date)
+        .order_by(CreditCardStatement.statement_date.asc())
+    ).all()
+
+
+def closed_cycles(account_id: int, today: date) -> list[dict[str, Any]]:
+    """Closed cycles of a credit card, oldest first, filling the cache as needed.
+
+    Runs in a short transaction of its own on the primary, apart from the caller's
+    (read) session; the card and its owner's time zone are re-read there so a lagging
+    replica can never cache cycles built from stale settings. The card row stays locked
+    until the fill commits, and writers take the same lock before they flush (see
+    _lock_changed_cards), so no cycle computed before a concurrent backdated charge is
+    cached after that charge's invalidation. Missing cycles cost one aggregate each. If
+    a concurrent request caches some of the same cycles first, its rows are used and
+    ours only fill the gaps.
+    """
+    with SessionLocal() as db:
+        account = lock_bank_accounts(db, [account_id]).get(account_id)
+        if account is None or account.kind != "credit" or account.billing_day is None or account.repayment_day is None:
+            return []
+        zone = user_zone(db.scalar(select(User.time_zone).where(User.id == account.user_id)))
+        billing_day = int(account.billing_day)
+        open_date = statement_date_on_or_after(today, billing_day)
+        cached = _cached_statements(db, account_id, open_date)
+
+        if cached:
+            statement_date = statement_date_on_or_after(cached[-1].statement_date + timedelta(days=1), billing_day)
+            cycle_start = cached[-1].statement_date + timedelta(days=1)
+            previous = int(cached[-1].statement_balance_cents)
+        else:
+            first = first_transaction_at(db, account)
+            if first is None:
+                return []
+            first_day = first.replace(tzinfo=timezone.utc).astimezone(zone).date()
+            statement_date = statement_date_on_or_after(min(first_day, today), billing_day)
+            cycle_start = _day_in_month(*_shift_month(statement_date, -1), billing_day) + timedelta(days=1)
+            previous = -int(account.opening_balance_cents)
+
+        closed = [_as_dict(r, is_open=False) for r in cached]
+        if statement_date >= open_date:
+            return closed
+        created: list[CreditCardStatement] = []
+        while statement_date < open_date:
+            row = _build_cycle(db, account, zone, cycle_start, statement_date, previous)
+            created.append(row)
+            previous = row.statement_balance_cents
+            cycle_start = statement_date + timedelta(days=1)
+            statement_date = statement_date_on_or_after(cycle_start, billing_day)
+        closed.extend(_as_dict(r, is_open=False) for r in created)
+
+        db.add_all(created)
+        try:
+            db.commit()
+        except IntegrityError:
+            # uq_credit_card_statements_account_date: a concurrent fill won.
+            db.rollback()
+            logger.info("statements of card %s were cached concurrently", account_id)
+            by_date = {c["statement_date"]: c for c in closed}
+            for row in _cached_statements(db, account_id, open_date):
+                by_date[row.statement_date] = _as_dict(row, is_open=False)
+            return [by_date[d] for d in sorted(by_date)]
+        return closed
+
+
+def statement_cycles(db: Session, account: BankAccount, zone: tzinfo, today: date) -> list[dict[str, Any]]:
+    """Every cycle of a credit card, oldest first; the last one is the open cycle.
+
+    Closed cycles come from closed_cycles (cached, filled on the primary); only the open
+    cycle is aggregated here, on `db`, which may be a read session.
+    """
+    billing_day = int(account.billing_day)
+    closed = closed_cycles(int(account.id), today)
+    open_date = statement_date_on_or_after(today, billing_day)
+    if closed:
+        cycle_start = closed[-1]["statement_date"] + timedelta(days=1)
+        previous = closed[-1]["statement_balance_cents"]
+    else:
+        cycle_start = _day_in_month(*_shift_month(open_date, -1), billing_day) + timedelta(days=1)
+        previous = -int(account.opening_balance_cents)
+    open_cycle = _build_cycle(db, account, zone, cycle_start, open_date, previous)
+    return [*closed, _as_dict(open_cycle, is_open=True)]
+
+
+def payments_after_close(db: Session, account: BankAccount, cycles: list[dict[str, Any]], zone: tzinfo) -> list[int]:
+    """Transfers into the card between each cycle's close and the end of its due date."""
+    windows = [(c["closes_at"], _local_midnight(c["due_date"] + timedelta(days=1), zone)) for c in cycles]
+    paid = [0] * len(cycles)
+    if not windows:
+        return paid
+    rows = db.execute(
+        select(Transaction.occurred_at, Transaction.amount_cents).where(
+            Transaction.user_id == account.user_id,
+            Transaction.to_bank_account_id == account.id,
+            Transaction.type == "transfer",
+            Transaction.occurred_at >= min(w[0] for w in windows),
+            Transaction.occurred_at < max(w[1] for w in windows),
+        )
+    ).all()
+    for occurred_at, amount in rows:
+        for index, (start, end) in enumerate(windows):
+            if start <= occurred_at < end:
+                paid[index] += int(amount)
+    return paid
+
+
+def payment_status(cycle: dict[str, Any], paid_cents: int, today: date) -> str:
+    if cycle["is_open"]:
+        return "open"
+    balance = cycle["statement_balance_cents"]
+    if balance <= 0:
+        return "no_payment_due"
+    if paid_cents >= balance:
+        return "paid"
+    if paid_cents >= minimum_due(balance):
+        return "minimum_paid"
+    return "due" if today <= cycle["due_date"] else "overdue"
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _guard_card_bulk_writes(state: ORMExecuteState) -> None:
+    refuse_unchecked_bulk_write(state, (BankAccount, User))
+
+
+def _changed_card_settings(session: Session) -> tuple[list[int], list[int]]:
+    # (cards whose billing settings change, users whose time zone changes)
+    cards = [
+        int(obj.id)
+        for obj in session.dirty
+        if isinstance(obj, BankAccount) and any(attributes.get_history(obj, f).has_changes() for f in _CARD_FIELDS)
+    ]
+    users = [
+        int(obj.id)
+        for obj in session.dirty
+        if isinstance(obj, User) and attributes.get_history(obj, "time_zone").has_changes()
+    ]
+    return cards, users
+
+
+@event.listens_for(Session, "before_flush")
+def _lock_changed_cards(session: Session, flush_context, instances) -> None:
+    # Same lock as closed_cycles, taken before any row of this flush is written.
+    cards, users = _changed_card_settings(session)
+    account_ids = [*changed_accounts(session), *cards]
+    if not account_ids and not users:
+        return
+    connection = session.connection()
+    if users:
+        account_ids.extend(connection.scalars(select(BankAccount.id).where(BankAccount.user_id.in_(users))))
+    lock_bank_account_rows(connection, account_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _drop_stale_statements(session: Session, flush_context) -> None:
+    statements = CreditCardStatement.__table__
+    deletes = [
+        delete(statements).where(statements.c.bank_account_id == account_id, statements.c.closes_at > when)
+        for account_id, when in changed_accounts(session).items()
+    ]
+    cards, users = _changed_card_settings(session)
+    if cards:
+        deletes.append(delete(statements).where(statements.c.bank_account_id.in_(cards)))
+    if users:
+        user_cards = select(BankAccount.id).where(BankAccount.user_id.in_(users))
+        deletes.append(delete(statements).where(statements.c.bank_account_id.in_(user_cards)))
+    if deletes:
+        connection = session.connection()
+        for statement in deletes:
+            connection.execute(statement)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException
 
 
 def to_utc_naive(dt: datetime) -> datetime:
@@ -24,3 +27,32 @@ def as_utc(dt: datetime) -> datetime:
         return dt.astimezone(timezone.utc)
 
     return dt.replace(tzinfo=timezone.utc)
+
+
+def user_zone(time_zone: str | None) -> tzinfo:
+    """A user's local zone; unknown names fall back to UTC+8."""
+
+    try:
+        return ZoneInfo(time_zone or "Asia/Shanghai")
+    except ZoneInfoNotFoundError:
+        return timezone(timedelta(hours=8))
+
+
+def local_to_utc_naive(dt: datetime, zone: tzinfo) -> datetime:
+    """Interpret a naive local datetime in `zone` and convert it for DB storage."""
+
+    return dt.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def month_bounds(year: int, month: int) -> tuple[date, date]:
+    """[first day, first day of the next month) of a calendar month; 400 on a bad month."""
+
+    if month < 1 or month > 12:
+        raise HTTPException(status_code=400, detail="Invalid month")
+
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return start, end
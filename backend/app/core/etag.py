@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against one strong ETag (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    candidates = {item.strip().removeprefix("W/") for item in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
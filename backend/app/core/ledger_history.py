@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.audit_archive import archived_before, iter_archived_logs
+from app.core.audit_log import apply_category_merge, build_transaction_snapshot, is_category_merge, stored_snapshots
+from app.models.bank_account import BankAccount
+from app.models.category_tag import CategoryTag
+from app.models.ledger_checkpoint import LedgerCheckpoint
+from app.models.transaction import Transaction
+from app.models.transaction_audit_log import TransactionAuditLog
+from app.models.transaction_tag import TransactionTag
+
+# Point-in-time ledger: start from the checkpoint closest to the requested instant and
+# replay only the audit rows between the two, forwards or backwards.
+#
+# Replay steps set state (full snapshots, or field diffs merged onto the current state),
+# so re-applying a change the checkpoint already contains is a no-op. Windows are therefore
+# widened by this overlap to cover requests whose audit row was written before the
+# checkpoint read but committed after it.
+_CHECKPOINT_OVERLAP = timedelta(minutes=5)
+
+
+def balance_effects(snapshot: dict[str, Any]) -> dict[int, int]:
+    """Balance change (cents per bank account) a transaction applied when it was recorded."""
+    amount = int(snapshot.get("amountCents") or 0)
+    tx_type = snapshot.get("type")
+    bank_account_id = snapshot.get("bankAccountId")
+    if tx_type == "transfer":
+        to_bank_account_id = snapshot.get("toBankAccountId")
+        if bank_account_id is None or to_bank_account_id is None:
+            return {}
+        return {int(bank_account_id): -amount, int(to_bank_account_id): amount}
+    if snapshot.get("fundingSource") != "bank" or bank_account_id is None:
+        return {}
+    if tx_type in ("income", "refund"):
+        return {int(bank_account_id): amount}
+    if tx_type == "expense":
+        return {int(bank_account_id): -amount}
+    return {}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def build_live_state(db: Session, user_id: int) -> dict[str, Any]:
+    """Current ledger of a user in checkpoint form. Run under snapshot/report isolation."""
+    rows = db.scalars(select(Transaction).where(Transaction.user_id == user_id)).all()
+    tag_ids: dict[int, list[int]] = {}
+    tag_names: dict[int, list[str]] = {}
+    pairs = db.execute(
+        select(TransactionTag.transaction_id, TransactionTag.tag_id, CategoryTag.name)
+        .join(CategoryTag, CategoryTag.id == TransactionTag.tag_id)
+        .join(Transaction, Transaction.id == TransactionTag.transaction_id)
+        .where(Transaction.user_id == user_id)
+    ).all()
+    for tx_id, tag_id, tag_name in pairs:
+        tag_ids.setdefault(int(tx_id), []).append(int(tag_id))
+        tag_names.setdefault(int(tx_id), []).append(str(tag_name))
+
+    transactions = [
+        build_transaction_snapshot(r, tag_ids=tag_ids.get(r.id, []), tag_names=tag_names.get(r.id, []))
+        for r in rows
+    ]
+
+    # Whatever transactions do not explain (opening balance, manual edits) is the account's base.
+    explained: dict[int, int] = {}
+    for snapshot in transactions:
+        for account_id, delta in balance_effects(snapshot).items():
+            explained[account_id] = explained.get(account_id, 0) + delta
+    accounts = [
+        {
+            "id": int(a.id),
+            "bankName": a.bank_name,
+            "alias": a.alias,
+            "kind": a.kind,
+            "baseCents": int(a.balance_cents) - explained.get(int(a.id), 0),
+        }
+        for a in db.scalars(select(BankAccount).where(BankAccount.user_id == user_id)).all()
+    ]
+    return {"transactions": transactions, "accounts": accounts}
+
+
+def write_ledger_checkpoint(db: Session, user_id: int) -> LedgerCheckpoint:
+    as_of = _now()
+    state = build_live_state(db, user_id)
+    row = LedgerCheckpoint(
+        user_id=user_id,
+        as_of=as_of,
+        payload=json.dumps(state, ensure_ascii=False, separators=(",", ":")),
+    )
+    db.add(row)
+    db.commit()
+    return row
+
+
+def _window_logs(db: Session, user_id: int, start: datetime, end: datetime) -> list[TransactionAuditLog]:
+    """Audit rows of a user with start < created_at <= end, from the table and the archive."""
+    rows = list(
+        db.scalars(
+            select(TransactionAuditLog)
+            .where(
+                TransactionAuditLog.target_user_id == user_id,
+                TransactionAuditLog.created_at > start,
+                TransactionAuditLog.created_at <= end,
+            )
+            .order_by(TransactionAuditLog.created_at.asc(), TransactionAuditLog.id.asc())
+        ).all()
+    )
+    horizon = archived_before()
+    if horizon is not None and start < horizon:
+        live_ids = {int(r.id) for r in rows}
+        archived = [
+            r
+            for r in iter_archived_logs(filters={"target_user_id": user_id}, start=start, end=end)
+            if r.created_at > start and int(r.id) not in live_ids
+        ]
+        rows = sorted(archived + rows, key=lambda r: (r.created_at, r.id))
+    return rows
+
+
+def _replay_forward(state: dict[int, dict[str, Any]], logs: list[TransactionAuditLog]) -> None:
+    for log in logs:
+        _, after = stored_snapshots(log)
+        if is_category_merge(log, after):
+            apply_category_merge(state, after)
+            continue
+        if log.transaction_id is None:
+            continue
+        tx_id = int(log.transaction_id)
+        if log.action == "delete":
+            state.pop(tx_id, None)
+        elif log.is_delta:
+            state[tx_id] = {**state.get(tx_id, {}), **(after or {})}
+        elif after is not None:
+            state[tx_id] = after
+
+
+def _replay_backward(state: dict[int, dict[str, Any]], logs: list[TransactionAuditLog]) -> None:
+    for log in reversed(logs):
+        before, after = stored_snapshots(log)
+        if is_category_merge(log, after):
+            apply_category_merge(state, before)
+            continue
+        if log.transaction_id is None:
+            continue
+        tx_id = int(log.transaction_id)
+        if log.action == "create":
+            state.pop(tx_id, None)
+        elif log.is_delta:
+            state[tx_id] = {**state.get(tx_id, {}), **(before or {})}
+        elif before is not None:
+            state[tx_id] = before
+
+
+def ledger_at(db: Session, user_id: int, at: datetime) -> dict[str, Any]:
+    """Transactions and bank balances of `user_id` as they were at `at` (naive UTC)."""
+    previous = db.scalar(
+        select(LedgerCheckpoint)
+        .where(LedgerCheckpoint.user_id == user_id, LedgerCheckpoint.as_of <= at)
+        .order_by(LedgerCheckpoint.as_of.desc())
+        .limit(1)
+    )
+    following = db.scalar(
+        select(LedgerCheckpoint)
+        .where(LedgerCheckpoint.user_id == user_id, LedgerCheckpoint.as_of > at)
+        .order_by(LedgerCheckpoint.as_of.asc())
+        .limit(1)
+    )
+
+    # The live tables act as one more checkpoint at "now"; pick whichever start is closest.
+    now = _now()
+    candidates: list[tuple[timedelta, datetime, LedgerCheckpoint | None]] = [(abs(now - at), now, None)]
+    for checkpoint in (previous, following):
+        if checkpoint is not None:
+            candidates.append((abs(checkpoint.as_of - at), checkpoint.as_of, checkpoint))
+    _, as_of, checkpoint = min(candidates, key=lambda c: c[0])
+
+    base = json.loads(checkpoint.payload) if checkpoint is not None else build_live_state(db, user_id)
+    state = {int(t["id"]): t for t in base["transactions"]}
+
+    if as_of <= at:
+        logs = _window_logs(db, user_id, as_of - _CHECKPOINT_OVERLAP, at)
+        _replay_forward(state, logs)
+    else:
+        logs = _window_logs(db, user_id, at, as_of + _CHECKPOINT_OVERLAP)
+        _replay_backward(state, logs)
+
+    transactions = sorted(state.values(), key=lambda t: (t.get("occurredAt") or "", t["id"]), reverse=True)
+    totals: dict[int, int] = {}
+    for snapshot in transactions:
+        for account_id, delta in balance_effects(snapshot).items():
+            totals[account_id] = totals.get(account_id, 0) + delta
+    balances = [
+        {**{k: v for k, v in a.items() if k != "baseCents"}, "balanceCents": a["baseCents"] + totals.get(a["id"], 0)}
+        for a in base["accounts"]
+    ]
+    return {
+        "checkpointAsOf": as_of if checkpoint is not None else None,
+        "replayedLogs": len(logs),
+        "transactions": transactions,
+        "balances": balances,
+    }
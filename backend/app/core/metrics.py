@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+
+# Process-local counters, exposed to admins via GET /api/admin/metrics.
+_lock = threading.Lock()
+_counters: dict[str, int] = defaultdict(int)
+
+
+def inc(name: str, amount: int = 1) -> None:
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot() -> dict[str, int]:
+    with _lock:
+        return dict(sorted(_counters.items()))
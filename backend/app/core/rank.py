@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+# Fractional rank keys: ordering columns hold base-36 digit strings compared
+# lexicographically, and a key can always be generated strictly between two others,
+# so moving an item rewrites only that item. Lowercase digits/letters sort the same
+# under case-insensitive SQL Server collations as in Python.
+#
+# Keys never end in the smallest digit, which keeps room below every key. They grow by
+# about one character per five inserts into the same gap; scripts/compact_sort_keys.py
+# rewrites long keys, and RANK_MAX_LENGTH is the column size.
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+RANK_MAX_LENGTH = 64
+# scripts/compact_sort_keys.py respaces a scope once any key is longer than this.
+RANK_COMPACT_LENGTH = 12
+
+_BASE = len(DIGITS)
+
+
+def _midpoint(a: str, b: str | None) -> str:
+    # a < b; a may be "" (bottom), b None (top).
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    low = DIGITS.index(a[0]) if a else 0
+    high = DIGITS.index(b[0]) if b is not None else _BASE
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    # Adjacent first digits.
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[low] + _midpoint(a[1:], None)
+
+
+def key_between(a: str | None, b: str | None) -> str:
+    """A rank key strictly between `a` and `b` (None = open end)."""
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f"rank keys out of order: {a!r} >= {b!r}")
+    return _midpoint(a or "", b)
+
+
+def keys_between(a: str | None, b: str | None, n: int) -> list[str]:
+    """`n` ascending keys strictly between `a` and `b`, split evenly to keep them short."""
+    if n <= 0:
+        return []
+    if n == 1:
+        return [key_between(a, b)]
+    mid = key_between(a, b)
+    left = keys_between(a, mid, n // 2)
+    right = keys_between(mid, b, n - n // 2 - 1)
+    return [*left, mid, *right]
+
+
+def reorder_keys(current: list[str | None], max_length: int = RANK_MAX_LENGTH) -> list[str] | None:
+    """New keys for items whose desired order is `current`'s order.
+
+    Items already in ascending key order (the longest increasing run through the list)
+    keep their keys, so a single move changes one key. Returns None when a generated
+    key would exceed `max_length`; callers then respace the whole scope.
+    """
+    keep = _longest_increasing(current)
+    result: list[str | None] = [current[i] if i in keep else None for i in range(len(current))]
+
+    i = 0
+    while i < len(result):
+        if result[i] is not None:
+            i += 1
+            continue
+        j = i
+        while j < len(result) and result[j] is None:
+            j += 1
+        lower = result[i - 1] if i > 0 else None
+        upper = result[j] if j < len(result) else None
+        result[i:j] = keys_between(lower, upper, j - i)
+        i = j
+
+    if any(len(k) > max_length for k in result):
+        return None
+    return result
+
+
+def _longest_increasing(keys: list[str | None]) -> set[int]:
+    # Patience sorting; None keys (unranked rows) never take part.
+    tails: list[int] = []
+    previous: list[int] = [-1] * len(keys)
+    for i, key in enumerate(keys):
+        if key is None:
+            continue
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if keys[tails[mid]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        previous[i] = tails[lo - 1] if lo > 0 else -1
+        if lo == len(tails):
+            tails.append(i)
+        else:
+            tails[lo] = i
+
+    result: set[int] = set()
+    cursor = tails[-1] if tails else -1
+    while cursor != -1:
+        result.add(cursor)
+        cursor = previous[cursor]
+    return result
+
+
+def even_keys(n: int) -> list[str]:
+    """`n` short, evenly spaced keys, used for backfills and compaction."""
+    return keys_between(None, None, n)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from mimetypes import guess_type
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.core.compression import preferred_encodings
+from app.core.etag import etag_matches
+
+# Sibling suffix of each precompressed variant the frontend build writes.
+_PRECOMPRESSED = {"br": ".br", "gzip": ".gz"}
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that answers with a build-time `.br`/`.gz` sibling when the client accepts it.
+
+    Nothing is compressed per request. Files that have a sibling always carry
+    `Vary: Accept-Encoding`, whichever variant is sent.
+    """
+
+    def file_response(
+        self,
+        full_path: os.PathLike | str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        path = os.fspath(full_path)
+        variants: dict[str, tuple[str, os.stat_result]] = {}
+        for encoding, suffix in _PRECOMPRESSED.items():
+            try:
+                variants[encoding] = (path + suffix, os.stat(path + suffix))
+            except OSError:
+                continue
+        if not variants:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        choices = preferred_encodings(request_headers.get("accept-encoding", ""), tuple(variants))
+        headers = {"Vary": "Accept-Encoding"}
+        if choices:
+            encoding = choices[0]
+            path, stat_result = variants[encoding]
+            headers["Content-Encoding"] = encoding
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=guess_type(os.fspath(full_path))[0] or "text/plain",
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+# Vite content-hashes everything it emits, so a hashed URL never changes meaning.
+_IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _hashed_paths(root: Path) -> tuple[frozenset[str], str | None]:
+    """Hashed build outputs listed in the Vite manifest, or the assets/ prefix without one."""
+    manifest = root / ".vite" / "manifest.json"
+    try:
+        chunks = json.loads(manifest.read_text(encoding="utf-8")).values()
+    except (OSError, ValueError):
+        return frozenset(), "assets/"
+    paths: set[str] = set()
+    for chunk in chunks:
+        paths.add(chunk["file"])
+        paths.update(chunk.get("css", ()))
+        paths.update(chunk.get("assets", ()))
+    return frozenset(paths), None
+
+
+class SpaStaticFiles(PrecompressedStaticFiles):
+    """The built frontend: index.html from memory, hashed assets as immutable.
+
+    index.html (with its .br/.gz siblings) and the Vite manifest are read once at
+    construction, so restart the server after rebuilding the frontend. Any GET for a
+    path whose last segment has no extension, outside /api, is a client-side route and
+    gets the in-memory index directly instead of a disk miss and a 404.
+    """
+
+    def __init__(self, *, directory: str) -> None:
+        super().__init__(directory=directory, html=True)
+        root = Path(directory)
+        source = (root / "index.html").read_bytes()
+        digest = hashlib.sha256(source).hexdigest()[:32]
+        self._index: dict[str, tuple[bytes, str]] = {"identity": (source, f'"{digest}"')}
+        for encoding, suffix in _PRECOMPRESSED.items():
+            try:
+                self._index[encoding] = ((root / f"index.html{suffix}").read_bytes(), f'"{digest}-{encoding}"')
+            except OSError:
+                continue
+        self._hashed, self._hashed_prefix = _hashed_paths(root)
+
+    def _is_hashed(self, relative: str) -> bool:
+        if self._hashed_prefix is not None:
+            return relative.startswith(self._hashed_prefix)
+        return relative in self._hashed
+
+    def index_response(self, scope: Scope) -> Response:
+        request_headers = Headers(scope=scope)
+        encoded = tuple(encoding for encoding in self._index if encoding != "identity")
+        choices = preferred_encodings(request_headers.get("accept-encoding", ""), encoded)
+        encoding = choices[0] if choices else "identity"
+        body, etag = self._index[encoding]
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if encoded:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="text/html", headers=headers)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        relative = path.replace(os.sep, "/")
+        if scope["method"] in ("GET", "HEAD"):
+            last_segment = relative.rsplit("/", 1)[-1]
+            if relative in (".", "index.html") or (
+                "." not in last_segment and relative != "api" and not relative.startswith("api/")
+            ):
+                return self.index_response(scope)
+
+        response = await super().get_response(path, scope)
+        if self._is_hashed(relative) and response.status_code in (200, 304):
+            response.headers["Cache-Control"] = _IMMUTABLE
+        return response
@@ -1,24 +1,53 @@
 from __future__ import annotations
 
-from sqlalchemy import inspect
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
 
 from app.core.security import hash_password
+from app.db.schema_fingerprint import compute_schema_fingerprint
+from app.db.schema_version import SCHEMA_FINGERPRINT, SCHEMA_HEAD
+from app.models.base import Base
+import app.models  # noqa: F401  (full metadata for the fingerprint)
 from app.models.category import Category
 from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
+
+def check_schema_version(db: Session) -> None:
+    # One query against alembic_version instead of table reflection (slow over ODBC).
+    try:
+        version = db.scalar(text("SELECT version_num FROM alembic_version"))
+    except DBAPIError as exc:
+        db.rollback()
+        raise RuntimeError(
+            "Database schema is not initialized (no alembic_version). Run: alembic upgrade head"
+        ) from exc
+
+    if version != SCHEMA_HEAD:
+        raise RuntimeError(
+            f"Database schema version {version!r} does not match code ({SCHEMA_HEAD!r}). "
+            "Run: alembic upgrade head"
+        )
+
+    fingerprint = compute_schema_fingerprint(Base.metadata)
+    if fingerprint != SCHEMA_FINGERPRINT:
+        # Models changed without regenerating schema_version.py (usually a missing migration).
+        logger.warning(
+            "Model schema fingerprint %s differs from %s recorded for %s; "
+            "add a migration and run: python -m scripts.schema_fingerprint --write",
+            fingerprint,
+            SCHEMA_FINGERPRINT,
+            SCHEMA_HEAD,
+        )
+
 
 def ensure_seed_data(db: Session) -> None:
     # Fail fast if database schema is behind code.
-    engine = db.get_bind()
-    inspector = inspect(engine)
-    if inspector.has_table("users"):
-        cols = {c.get("name") for c in inspector.get_columns("users")}
-        if "role" not in cols:
-            raise RuntimeError(
-                "Database schema is outdated (missing column users.role). "
-                "Run: alembic upgrade head"
-            )
+    check_schema_version(db)
 
     # Create a default user when database is empty.
     user = db.query(User).first()
@@ -34,16 +63,12 @@ def ensure_seed_data(db: Session) -> None:
             db.add(user)
             db.commit()
 
-    # If migrations haven't been applied yet, don't fail startup.
-    if not inspector.has_table("categories"):
-        return
-
     has_category = db.query(Category).filter(Category.user_id == user.id).first()
     if has_category:
         return
 
-    expense_root = Category(user_id=user.id, type="expense", name="支出", parent_id=None, sort_order=0, is_active=True)
-    income_root = Category(user_id=user.id, type="income", name="收入", parent_id=None, sort_order=0, is_active=True)
+    expense_root = Category(user_id=user.id, type="expense", name="支出", parent_id=None, sort_key="i", is_active=True)
+    income_root = Category(user_id=user.id, type="income", name="收入", parent_id=None, sort_key="i", is_active=True)
     db.add_all([expense_root, income_root])
     db.commit()
     db.refresh(expense_root)
@@ -56,7 +81,7 @@ def ensure_seed_data(db: Session) -> None:
                 type="expense",
                 name="默认支出",
                 parent_id=expense_root.id,
-                sort_order=0,
+                sort_key="i",
                 is_active=True,
             ),
             Category(
@@ -64,7 +89,7 @@ def ensure_seed_data(db: Session) -> None:
                 type="income",
                 name="默认收入",
                 parent_id=income_root.id,
-                sort_order=0,
+                sort_key="i",
                 is_active=True,
             ),
         ]
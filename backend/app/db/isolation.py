@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def _level_for(db: Session | AsyncSession, level: str) -> str | None:
+    # SNAPSHOT is SQL Server specific; other backends (local SQLite) keep their default.
+    if not level or db.get_bind().dialect.name != "mssql":
+        return None
+    return level
+
+
+def use_report_isolation(db: Session) -> None:
+    # Must run before the session's first statement: the level is applied when the connection is procured.
+    level = _level_for(db, settings.db_report_isolation_level)
+    if level is not None:
+        db.connection(execution_options={"isolation_level": level})
+
+
+async def use_report_isolation_async(db: AsyncSession) -> None:
+    level = _level_for(db, settings.db_report_isolation_level)
+    if level is not None:
+        await db.connection(execution_options={"isolation_level": level})
+
+
+# Balance-checking writes get their level from app.db.session.BalanceSessionLocal, set when
+# each connection is checked out, so nothing flushed earlier in a request is ever discarded.
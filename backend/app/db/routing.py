@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import (
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    BalanceSessionLocal,
+    ReadSessionLocal,
+    SessionLocal,
+)
+
+# Key in Session.info holding the authenticated user id (set by get_current_user).
+SESSION_USER_KEY = "ibooks_user_id"
+
+# user_id -> monotonic time of the user's last committed write.
+# Process-local: the local deployment runs a single uvicorn process.
+_last_write_at: dict[int, float] = {}
+_lock = threading.Lock()
+
+
+def mark_user_write(user_id: int) -> None:
+    with _lock:
+        _last_write_at[int(user_id)] = time.monotonic()
+
+
+def recently_wrote(user_id: int) -> bool:
+    window = settings.db_read_after_write_seconds
+    if window <= 0:
+        return False
+    with _lock:
+        last = _last_write_at.get(int(user_id))
+        if last is None:
+            return False
+        if time.monotonic() - last >= window:
+            # Expired: drop it so the map only holds users inside their window.
+            _last_write_at.pop(int(user_id), None)
+            return False
+        return True
+
+
+def use_replica_for(user_id: int | None) -> bool:
+    if not settings.db_read_url:
+        return False
+    # Read-your-writes: fall back to the primary while the replica may not have caught up.
+    return user_id is None or not recently_wrote(user_id)
+
+
+def read_sessionmaker(user_id: int | None):
+    return ReadSessionLocal if use_replica_for(user_id) else SessionLocal
+
+
+def async_read_sessionmaker(user_id: int | None):
+    return AsyncReadSessionLocal if use_replica_for(user_id) else AsyncSessionLocal
+
+
+def _record_user_write(session: Session) -> None:
+    # Only write routes commit on a request session, so any commit counts as a write.
+    user_id = session.info.get(SESSION_USER_KEY)
+    if user_id is not None:
+        mark_user_write(user_id)
+
+
+for _write_sessions in (SessionLocal, BalanceSessionLocal):
+    event.listen(_write_sessions, "after_commit", _record_user_write)
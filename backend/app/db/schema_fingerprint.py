@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import hashlib
+
+from sqlalchemy import MetaData
+
+
+def compute_schema_fingerprint(metadata: MetaData) -> str:
+    # Stable digest of tables, columns (type + nullability) and indexes declared by the models.
+    lines: list[str] = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        for col in sorted(table.columns, key=lambda c: c.name):
+            lines.append(f"{table.name}.{col.name}:{col.type}:{'null' if col.nullable else 'notnull'}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            cols = ",".join(c.name for c in index.columns)
+            lines.append(f"{table.name}#{index.name}({cols}){':unique' if index.unique else ''}")
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,5 @@
+# Generated by `python -m scripts.schema_fingerprint --write`; do not edit by hand.
+# Startup compares alembic_version against SCHEMA_HEAD instead of reflecting tables.
+
+SCHEMA_HEAD = "0029_commute_reservation_window_index"
+SCHEMA_FINGERPRINT = "49b7a9e8ce779893"
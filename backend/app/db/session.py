@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 from urllib.parse import quote_plus
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
 
 def build_connection_url() -> str:
+    if settings.db_url:
+        return settings.db_url
+
     # Use ODBC connection string to avoid URL-escaping pain on Windows instance names.
     # Some .env examples may contain double backslashes (e.g. .\\SQLEXPRESS). ODBC expects .\SQLEXPRESS.
     server = settings.db_server.replace("\\\\", "\\")
@@ -31,6 +37,34 @@ def build_connection_url() -> str:
     return "mssql+pyodbc:///?odbc_connect=" + quote_plus(odbc_str)
 
 
+# Sync driver -> asyncio driver for the same database.
+_ASYNC_DRIVERS = {
+    "mssql": "mssql+aioodbc",
+    "mssql+pyodbc": "mssql+aioodbc",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def build_async_connection_url(sync_url: str | None = None) -> str:
+    url = make_url(sync_url or build_connection_url())
+    async_driver = _ASYNC_DRIVERS.get(url.drivername)
+    if async_driver is None:
+        raise ValueError(f"No asyncio driver configured for {url.drivername}")
+    return url.set(drivername=async_driver).render_as_string(hide_password=False)
+
+
+def build_read_connection_url() -> str:
+    return settings.db_read_url or build_connection_url()
+
+
+def _async_pool_kwargs(url: str) -> dict:
+    # SQLite pools are not sized (single file, no server connections to bound).
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {"pool_size": settings.db_async_pool_size, "max_overflow": settings.db_async_max_overflow}
+
+
 engine = create_engine(
     build_connection_url(),
     pool_pre_ping=True,
@@ -38,3 +72,75 @@ engine = create_engine(
 )
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+
+def _with_isolation(target: Engine, level: str) -> Engine:
+    # SERIALIZABLE/SNAPSHOT are SQL Server specific; other backends (local SQLite) keep their default.
+    if not level or target.dialect.name != "mssql":
+        return target
+    return target.execution_options(isolation_level=level)
+
+
+# Balance-checking writes. Same pool as SessionLocal, but every connection the session
+# checks out (including the fresh one after a retry's rollback) is set to the balance
+# isolation level before its first statement; the pool resets it on return.
+BalanceSessionLocal = sessionmaker(
+    bind=_with_isolation(engine, settings.db_balance_isolation_level),
+    autoflush=False,
+    autocommit=False,
+    future=True,
+)
+
+
+def _create_async_engine(sync_url: str):
+    url = build_async_connection_url(sync_url)
+    return create_async_engine(url, pool_pre_ping=True, **_async_pool_kwargs(url))
+
+
+async_engine = _create_async_engine(build_connection_url())
+
+# Used by read-only routers. expire_on_commit=False: rows are serialized after the session is done.
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Read replica. Without IBOOKS_DB_READ_URL these are the primary engines, so routing is a no-op.
+if settings.db_read_url:
+    read_engine = create_engine(build_read_connection_url(), pool_pre_ping=True, future=True)
+    async_read_engine = _create_async_engine(build_read_connection_url())
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True)
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+def _prewarm_engine(target: Engine, count: int) -> None:
+    # Hold `count` connections at once so the pool really opens that many, then return them.
+    conns = []
+    try:
+        for _ in range(count):
+            conns.append(target.connect())
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+async def _prewarm_async_engine(target: AsyncEngine, count: int) -> None:
+    conns = await asyncio.gather(*(target.connect() for _ in range(count)))
+    await asyncio.gather(*(conn.close() for conn in conns))
+
+
+def prewarm_pools(count: int) -> None:
+    if count <= 0:
+        return
+    _prewarm_engine(engine, count)
+    if read_engine is not engine:
+        _prewarm_engine(read_engine, count)
+
+
+async def prewarm_async_pools(count: int) -> None:
+    if count <= 0:
+        return
+    await _prewarm_async_engine(async_engine, count)
+    if async_read_engine is not async_engine:
+        await _prewarm_async_engine(async_read_engine, count)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, MetaData, Table, create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import DefaultClause
+
+from app.db.schema_version import SCHEMA_HEAD
+from app.models.base import Base
+import app.models  # noqa: F401  (full metadata)
+
+# Alembic migrations target SQL Server only (several use T-SQL and ALTER COLUMN, which
+# SQLite cannot run). For local and test databases the schema is created straight from
+# the models instead and stamped with SCHEMA_HEAD, so the startup version check passes.
+
+# SQLite equivalent of SYSUTCDATETIME(), in the format the DateTime type reads back.
+_SQLITE_UTC_NOW = "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+
+def _sqlite_default(column: Column) -> None:
+    default = column.server_default
+    if isinstance(default, DefaultClause) and "SYSUTCDATETIME" in str(default.arg).upper():
+        column.server_default = DefaultClause(text(_SQLITE_UTC_NOW))
+
+
+def sqlite_metadata() -> MetaData:
+    """A copy of the model metadata with SQL Server-only server defaults rewritten for SQLite."""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        copy: Table = table.to_metadata(metadata)
+        for column in copy.columns:
+            _sqlite_default(column)
+    return metadata
+
+
+def bootstrap_sqlite(target: Engine | str, *, drop_existing: bool = False) -> None:
+    """Create every table in a SQLite database and stamp alembic_version with SCHEMA_HEAD."""
+    engine = create_engine(target) if isinstance(target, str) else target
+    if engine.dialect.name != "sqlite":
+        raise ValueError(f"bootstrap_sqlite only handles SQLite, not {engine.dialect.name}; run: alembic upgrade head")
+
+    metadata = sqlite_metadata()
+    if drop_existing:
+        metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO alembic_version (version_num) VALUES (:v)"), {"v": SCHEMA_HEAD})
+    if isinstance(target, str):
+        engine.dispose()
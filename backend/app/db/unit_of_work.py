@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import random
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, TypeVar
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.bank_account import BankAccount
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# SQLSTATEs reported by pyodbc for a deadlock victim / lock timeout.
+_TRANSIENT_SQLSTATES = {"40001", "HYT00"}
+# SQL Server native errors: deadlock victim, lock request timeout, snapshot update conflict.
+_TRANSIENT_MSSQL_ERRORS = (1205, 1222, 3960)
+
+
+def is_transient_db_error(exc: DBAPIError) -> bool:
+    # Only errors that guarantee the transaction was rolled back. A dropped connection is
+    # not one: it may have gone down at or after COMMIT, and re-running a create would
+    # then insert and move balances twice.
+    orig = exc.orig
+    args = getattr(orig, "args", ())
+    if args and isinstance(args[0], str) and args[0] in _TRANSIENT_SQLSTATES:
+        return True
+    message = str(orig)
+    if any(f"({code})" in message for code in _TRANSIENT_MSSQL_ERRORS):
+        return True
+    # Local SQLite equivalent of a lock timeout.
+    return "database is locked" in message
+
+
+def _backoff_seconds(attempt: int) -> float:
+    # Full jitter: uniform in [0, base * 2^attempt].
+    base = settings.db_write_retry_base_delay_ms / 1000.0
+    return random.uniform(0, base * (2**attempt))
+
+
+def retry_on_transient_errors(func: F) -> F:
+    """Re-run a write route as one unit of work when the database reports a transient failure.
+
+    The route receives its session as the `db` keyword argument. On a deadlock
+    or timeout the session is rolled back (expiring every loaded row) and the
+    whole route body runs again, so reads and balance checks are redone against
+    fresh state.
+    """
+
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        db: Session = kwargs["db"]
+        attempts = max(1, settings.db_write_retry_attempts)
+        for attempt in range(attempts):
+            try:
+                return func(*args, **kwargs)
+            except DBAPIError as exc:
+                if not is_transient_db_error(exc):
+                    raise
+                db.rollback()
+                if attempt + 1 >= attempts:
+                    metrics.inc(f"db.write_retry_exhausted.{name}")
+                    raise HTTPException(
+                        status_code=503,
+                        detail="Database is busy, please retry",
+                        headers={"Retry-After": "1"},
+                    ) from exc
+                metrics.inc(f"db.write_retry.{name}")
+                time.sleep(_backoff_seconds(attempt))
+        raise AssertionError("unreachable")
+
+    # Routers use postponed annotations; resolve them against the route's module so
+    # FastAPI doesn't evaluate them in this module's globals.
+    wrapper.__signature__ = inspect.signature(func, eval_str=True)  # type: ignore[attr-defined]
+    return wrapper  # type: ignore[return-value]
+
+
+def _account_lock(statement):
+    return statement.with_for_update().with_hint(BankAccount, "WITH (UPDLOCK, ROWLOCK)", "mssql")
+
+
+def lock_bank_accounts(db: Session, account_ids: Iterable[int | None]) -> dict[int, BankAccount]:
+    """Load and row-lock bank accounts in ascending id order.
+
+    Every write path takes account locks through here, so two requests touching
+    the same accounts (e.g. transfers in opposite directions) always lock them in
+    the same order instead of deadlocking. Ownership checks stay with the caller.
+    """
+
+    locked: dict[int, BankAccount] = {}
+    for account_id in sorted({int(x) for x in account_ids if x is not None}):
+        row = db.scalar(
+            _account_lock(select(BankAccount).where(BankAccount.id == account_id)).execution_options(
+                populate_existing=True
+            )
+        )
+        if row is not None:
+            locked[account_id] = row
+    return locked
+
+
+def lock_bank_account_rows(connection: Connection, account_ids: Iterable[int | None]) -> None:
+    """Row-lock bank accounts in ascending id order without loading them.
+
+    For flush events, where loading the rows into the session would overwrite its
+    pending changes. Locks taken here and by lock_bank_accounts are the same.
+    """
+
+    for account_id in sorted({int(x) for x in account_ids if x is not None}):
+        connection.execute(_account_lock(select(BankAccount.id).where(BankAccount.id == account_id)))
@@ -1,20 +1,45 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
-from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.api.routers import api_router
+from app.core.audit_outbox import AuditOutboxWriter
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.static_files import SpaStaticFiles
 from app.db.init_db import ensure_seed_data
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, prewarm_async_pools, prewarm_pools
+
+_audit_outbox_writer = AuditOutboxWriter(
+    SessionLocal,
+    batch_size=settings.audit_outbox_batch_size,
+    poll_seconds=settings.audit_outbox_poll_seconds,
+)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    db = SessionLocal()
+    try:
+        ensure_seed_data(db)
+    finally:
+        db.close()
+    prewarm_pools(settings.db_prewarm_connections)
+    await prewarm_async_pools(settings.db_prewarm_connections)
+    if settings.audit_log_mode == "outbox":
+        _audit_outbox_writer.start()
+    try:
+        yield
+    finally:
+        _audit_outbox_writer.stop()
 
-app = FastAPI(title="iBooks API")
+
+app = FastAPI(title="iBooks API", lifespan=lifespan)
 
 origins = [o.strip() for o in settings.cors_origins.split(",") if o.strip()]
 app.add_middleware(
@@ -24,6 +49,7 @@ app.add_middleware(
     allow_methods=["*"] ,
     allow_headers=["*"] ,
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.response_compression_min_bytes)
 
 app.include_router(api_router, prefix="/api")
 
@@ -41,37 +67,13 @@ def _resolve_frontend_dist_dir() -> Path:
 
 _frontend_dist_dir = _resolve_frontend_dist_dir()
 
-if settings.serve_frontend and _frontend_dist_dir.exists():
-    # Mount AFTER /api so API routes win.
+# SpaStaticFiles reads index.html at construction, so a dist/ without one (e.g. a build
+# that failed halfway) must not be mounted.
+if settings.serve_frontend and (_frontend_dist_dir / "index.html").is_file():
+    # Mount AFTER /api so API routes win. Client-side routes like /ledger or /stats/xxx
+    # get index.html from SpaStaticFiles itself.
     app.mount(
         "/",
-        StaticFiles(directory=str(_frontend_dist_dir), html=True),
+        SpaStaticFiles(directory=str(_frontend_dist_dir)),
         name="frontend",
     )
-
-
-@app.exception_handler(StarletteHTTPException)
-async def spa_fallback(request, exc: StarletteHTTPException):
-    # For client-side routes like /ledger or /stats/xxx, return index.html.
-    if (
-        exc.status_code == 404
-        and settings.serve_frontend
-        and _frontend_dist_dir.exists()
-        and not request.url.path.startswith("/api")
-    ):
-        last_segment = request.url.path.rsplit("/", 1)[-1]
-        if "." not in last_segment:
-            index_file = _frontend_dist_dir / "index.html"
-            if index_file.exists():
-                return FileResponse(str(index_file))
-
-    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
-
-
-@app.on_event("startup")
-def on_startup() -> None:
-    db = SessionLocal()
-    try:
-        ensure_seed_data(db)
-    finally:
-        db.close()
@@ -10,3 +10,7 @@ from app.models.transaction_audit_log import TransactionAuditLog  # noqa: F401
 from app.models.travel_plan import TravelPlan  # noqa: F401
 from app.models.commute_card import CommuteCard  # noqa: F401
 from app.models.commute_reservation import CommuteReservation  # noqa: F401
+from app.models.transaction_audit_outbox import TransactionAuditOutbox  # noqa: F401
+from app.models.ledger_checkpoint import LedgerCheckpoint  # noqa: F401
+from app.models.bank_account_balance_checkpoint import BankAccountBalanceCheckpoint  # noqa: F401
+from app.models.credit_card_statement import CreditCardStatement  # noqa: F401
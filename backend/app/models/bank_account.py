@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -8,6 +8,7 @@ from app.models.base import Base
 
 class BankAccount(Base):
     __tablename__ = "bank_accounts"
+    __table_args__ = (Index("ix_bank_accounts_user_pinned_sort_key", "user_id", "is_pinned", "sort_key"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
@@ -19,12 +20,16 @@ class BankAccount(Base):
     # 'debit' | 'credit'
     kind: Mapped[str] = mapped_column(String(10), default="debit", index=True)
     balance_cents: Mapped[int] = mapped_column(Integer, default=0)
+    # Opening balance plus manual balance edits: the part of balance_cents that no
+    # transaction explains (see app/core/balance_reconciliation.py)
+    opening_balance_cents: Mapped[int] = mapped_column(Integer, default=0)
 
     # credit card only (1-31)
     billing_day: Mapped[int | None] = mapped_column(Integer, nullable=True)
     repayment_day: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
-    sort_order: Mapped[int] = mapped_column(Integer, default=0, index=True)
+    # Fractional rank key within the user's accounts (see app/core/rank.py)
+    sort_key: Mapped[str] = mapped_column(String(64))
     is_pinned: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
 
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
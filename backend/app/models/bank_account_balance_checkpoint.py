@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, UniqueConstraint, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class BankAccountBalanceCheckpoint(Base):
+    """Sum of an account's transaction effects before `as_of`, the anchor for balance history."""
+
+    __tablename__ = "bank_account_balance_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("bank_account_id", "as_of", name="uq_bank_account_balance_checkpoints_account_as_of"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bank_account_id: Mapped[int] = mapped_column(Integer, ForeignKey("bank_accounts.id"))
+
+    # UTC month start; covers transactions with occurred_at < as_of.
+    as_of: Mapped[datetime] = mapped_column(DateTime(timezone=False), nullable=False)
+    ledger_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        server_default=text("SYSUTCDATETIME()"),
+    )
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, UniqueConstraint, text
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -10,7 +10,10 @@ from app.models.base import Base
 
 class CommuteCard(Base):
     __tablename__ = "commute_cards"
-    __table_args__ = (UniqueConstraint("user_id", "id", name="uq_commute_cards_user_id_id"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "id", name="uq_commute_cards_user_id_id"),
+        Index("ix_commute_cards_user_expiry", "user_id", "expiry_date"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
@@ -21,4 +24,10 @@ class CommuteCard(Base):
         nullable=False,
         server_default=text("SYSUTCDATETIME()"),
         index=True,
-    )
\ No newline at end of file
+    )
+
+    # Maintained by the reservation routes: first ride date, its 30-day expiry and the
+    # number of reservations on the card. NULL dates = no reservation yet (draft).
+    effective_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    expiry_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    used_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
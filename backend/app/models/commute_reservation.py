@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, UniqueConstraint, text
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -12,6 +12,8 @@ class CommuteReservation(Base):
     __tablename__ = "commute_reservations"
     __table_args__ = (
         UniqueConstraint("user_id", "ride_date", "travel_slot", name="uq_commute_reservations_user_date_slot"),
+        # Date windows over one user's ticket (card_id IS NULL) or card reservations.
+        Index("ix_commute_reservations_user_card_ride_date", "user_id", "card_id", "ride_date"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, UniqueConstraint, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class CreditCardStatement(Base):
+    """Totals of one closed credit card billing cycle (see app/core/credit_card_statements.py)."""
+
+    __tablename__ = "credit_card_statements"
+    __table_args__ = (
+        UniqueConstraint("bank_account_id", "statement_date", name="uq_credit_card_statements_account_date"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bank_account_id: Mapped[int] = mapped_column(Integer, ForeignKey("bank_accounts.id"))
+
+    # Local dates of the owner; the cycle covers cycle_start..statement_date inclusive.
+    cycle_start: Mapped[date] = mapped_column(Date, nullable=False)
+    statement_date: Mapped[date] = mapped_column(Date, nullable=False)
+    due_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # UTC instant the cycle closed (exclusive end); transactions before it are included.
+    closes_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), nullable=False)
+
+    # Amounts owed on the card (positive = owed by the user).
+    previous_balance_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    charges_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    credits_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    payments_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    statement_balance_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        server_default=text("SYSUTCDATETIME()"),
+    )
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, UnicodeText, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class LedgerCheckpoint(Base):
+    """Materialized state of one user's ledger at `as_of`, the starting point for audit replay."""
+
+    __tablename__ = "ledger_checkpoints"
+    __table_args__ = (Index("ix_ledger_checkpoints_user_as_of", "user_id", "as_of"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+
+    # UTC instant the live tables were read at.
+    as_of: Mapped[datetime] = mapped_column(DateTime(timezone=False), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        server_default=text("SYSUTCDATETIME()"),
+    )
+
+    # JSON: {"transactions": [snapshot, ...], "accounts": [{..., "baseCents"}]}
+    payload: Mapped[str] = mapped_column(UnicodeText, nullable=False)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -10,6 +10,11 @@ from app.models.base import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    # Per-account time ranges (balance history).
+    __table_args__ = (
+        Index("ix_transactions_bank_account_occurred", "bank_account_id", "occurred_at"),
+        Index("ix_transactions_to_bank_account_occurred", "to_bank_account_id", "occurred_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, UnicodeText, text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, LargeBinary, String, Unicode, UnicodeText, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -10,6 +10,17 @@ from app.models.base import Base
 
 class TransactionAuditLog(Base):
     __tablename__ = "transaction_audit_logs"
+    # Composite indexes match the admin list filters and its (created_at, id) keyset order;
+    # they also serve the single-column lookups the old per-column indexes did.
+    __table_args__ = (
+        Index("ix_transaction_audit_logs_target_created_id", "target_user_id", "created_at", "id"),
+        Index("ix_transaction_audit_logs_transaction_created", "transaction_id", "created_at"),
+        Index("ix_transaction_audit_logs_actor_created", "actor_user_id", "created_at"),
+        Index("ix_transaction_audit_logs_amount_created", "amount_cents", "created_at"),
+        Index("ix_transaction_audit_logs_category_created", "category_id", "created_at"),
+        Index("ix_transaction_audit_logs_bank_account_created", "bank_account_id", "created_at"),
+        Index("ix_transaction_audit_logs_note_prefix_created", "note_prefix", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -24,15 +35,28 @@ class TransactionAuditLog(Base):
     action: Mapped[str] = mapped_column(String(10), index=True)
 
     # who performed the action
-    actor_user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
+    actor_user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
 
     # which user's ledger was affected (usually equals transaction.user_id)
-    target_user_id: Mapped[int] = mapped_column(Integer, index=True)
+    target_user_id: Mapped[int] = mapped_column(Integer)
 
     # Keep it without FK so logs survive transaction deletions.
-    transaction_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    transaction_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     tx_type: Mapped[str | None] = mapped_column(String(10), nullable=True, index=True)
 
+    # Searchable projections of the resulting snapshot (the deleted one for deletes).
+    amount_cents: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    category_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    bank_account_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    note_prefix: Mapped[str | None] = mapped_column(Unicode(32), nullable=True)
+
     before_json: Mapped[str | None] = mapped_column(UnicodeText, nullable=True)
     after_json: Mapped[str | None] = mapped_column(UnicodeText, nullable=True)
+    # Compact encoding (see app/core/audit_log.encode_snapshot); a row uses either *_json or *_bin.
+    before_bin: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    after_bin: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+
+    # Update rows normally store only the changed fields (old values in before_json, new in
+    # after_json); full views are rebuilt from the transaction's earlier rows on read.
+    is_delta: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("0"), default=False)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, UnicodeText, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class TransactionAuditOutbox(Base):
+    """Pending audit records, drained into transaction_audit_logs by the background writer.
+
+    Written in the request's transaction (so a record exists iff the ledger change
+    committed) but kept narrow: primary key only, no secondary indexes or FKs.
+    """
+
+    __tablename__ = "transaction_audit_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Time of the audited change; copied to transaction_audit_logs.created_at on drain.
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        server_default=text("SYSUTCDATETIME()"),
+    )
+
+    # Compact JSON of the add_transaction_audit_log arguments.
+    payload: Mapped[str] = mapped_column(UnicodeText, nullable=False)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import date
+
 from pydantic import BaseModel, Field
 
 
@@ -37,10 +39,51 @@ class BankAccountOut(BaseModel):
     balanceCents: int
     billingDay: int | None
     repaymentDay: int | None
+    # Position in the account list; sortKey is the stored fractional key
     sortOrder: int
+    sortKey: str
     isPinned: bool
     isActive: bool
 
 
 class BankAccountReorderRequest(BaseModel):
     ids: list[int] = Field(min_length=1)
+
+
+class BalanceHistoryPoint(BaseModel):
+    # First day of the bucket (the day, or the month for monthly buckets)
+    date: date
+    # Balance at the end of the bucket, and its change over the bucket
+    balanceCents: int
+    changeCents: int
+
+
+class BalanceHistoryOut(BaseModel):
+    bankAccountId: int
+    granularity: str = Field(pattern="^(day|month)$")
+    start: date
+    end: date
+    points: list[BalanceHistoryPoint]
+
+
+class CreditCardCycleOut(BaseModel):
+    # Local dates; the cycle covers cycleStart..statementDate inclusive
+    cycleStart: date
+    statementDate: date
+    dueDate: date
+    isClosed: bool
+    # Amounts owed on the card (positive = owed)
+    previousBalanceCents: int
+    chargesCents: int
+    creditsCents: int
+    paymentsCents: int
+    statementBalanceCents: int
+    minimumDueCents: int
+    # Transfers into the card between the statement date and the due date
+    paidCents: int
+    status: str = Field(pattern="^(open|no_payment_due|paid|minimum_paid|due|overdue)$")
+
+
+class CreditCardCyclesOut(BaseModel):
+    bankAccountId: int
+    cycles: list[CreditCardCycleOut]
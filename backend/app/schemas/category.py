@@ -27,7 +27,9 @@ class CategoryNodeOut(BaseModel):
     type: str
     name: str
     parentId: int | None
+    # Position among siblings; sortKey is the stored fractional key it derives from
     sortOrder: int
+    sortKey: str
     isActive: bool
     isLeaf: bool
     children: list["CategoryNodeOut"] = Field(default_factory=list)
@@ -45,6 +45,10 @@ class CommuteReservationUpdate(CommuteReservationBase):
     pass
 
 
+class CommuteReservationBatchCreate(BaseModel):
+    items: list[CommuteReservationCreate] = Field(min_length=1, max_length=40)
+
+
 class CommuteReservationOut(CommuteReservationBase):
     id: int
     card_id: int | None
@@ -52,8 +56,26 @@ class CommuteReservationOut(CommuteReservationBase):
     created_at: datetime
 
 
+class CommuteReservationBatchOut(BaseModel):
+    items: list[CommuteReservationOut]
+
+
 class TicketCommuteListOut(BaseModel):
     items: list[CommuteReservationOut]
+    # Pass as `cursor` to fetch the next page; None on the last page
+    next_cursor: str | None = None
+
+
+class TicketCommuteMonthSummaryOut(BaseModel):
+    year: int
+    month: int
+    count: int
+    am_count: int
+    pm_count: int
+
+
+class TicketCommuteSummaryOut(BaseModel):
+    items: list[TicketCommuteMonthSummaryOut]
 
 
 class CommuteCardCreate(BaseModel):
@@ -74,4 +96,6 @@ class CommuteCardOut(BaseModel):
 
 
 class CommuteCardListOut(BaseModel):
-    items: list[CommuteCardOut]
\ No newline at end of file
+    items: list[CommuteCardOut]
+    # Pass as `cursor` to fetch the next page; None on the last page
+    next_cursor: str | None = None
\ No newline at end of file
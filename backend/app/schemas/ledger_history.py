@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class LedgerAtBalanceOut(BaseModel):
+    id: int
+    bankName: str
+    alias: str
+    kind: str
+    balanceCents: int
+
+
+class LedgerAtOut(BaseModel):
+    userId: int
+    at: datetime
+
+    # Checkpoint the replay started from; null when it started from the live tables.
+    checkpointAsOf: datetime | None = None
+    replayedLogs: int
+
+    # Transaction snapshots in the audit-log format, newest occurredAt first.
+    transactions: list[dict[str, Any]] = Field(default_factory=list)
+    balances: list[LedgerAtBalanceOut] = Field(default_factory=list)
@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+
+class MetricsOut(BaseModel):
+    counters: dict[str, int] = Field(default_factory=dict)
@@ -24,4 +24,8 @@ class TransactionAuditLogOut(BaseModel):
 
 class TransactionAuditLogListOut(BaseModel):
     items: list[TransactionAuditLogOut] = Field(default_factory=list)
-    total: int
+    # Pass back as `cursor` to fetch the next page; null on the last page.
+    nextCursor: str | None = None
+    # Only filled when requested via countMode; estimated totals may be approximate or capped.
+    total: int | None = None
+    totalIsEstimate: bool = False
@@ -4,6 +4,8 @@ from datetime import date
 
 from pydantic import BaseModel, Field
 
+from app.schemas.commute_card import CommuteReservationOut
+
 
 class TravelPlanDayOut(BaseModel):
     date: date
@@ -23,3 +25,18 @@ class TravelPlanUpsert(BaseModel):
     is_rest_day: bool = False
     am: str | None = Field(default=None, max_length=500)
     pm: str | None = Field(default=None, max_length=500)
+
+
+class TravelPlanMonthUpsert(BaseModel):
+    year: int
+    month: int = Field(ge=1, le=12)
+    # Only the listed days change; a day with no rest flag and no plans is cleared.
+    items: list[TravelPlanUpsert] = Field(max_length=31)
+
+
+class ToolsCalendarOut(BaseModel):
+    year: int
+    month: int = Field(ge=1, le=12)
+    plans: list[TravelPlanDayOut]
+    rest_days: list[date]
+    reservations: list[CommuteReservationOut]
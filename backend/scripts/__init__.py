@@ -0,0 +1 @@
+# ops / benchmark scripts (run from backend/: python -m scripts.<name>)
@@ -0,0 +1,57 @@
+"""Move old transaction_audit_logs rows into compressed monthly archive segments.
+
+Archives every whole UTC month older than IBOOKS_AUDIT_RETENTION_DAYS into
+IBOOKS_AUDIT_ARCHIVE_DIR (one JSONL segment per month plus index.json), then
+deletes the archived rows in small batches. Safe to rerun after a crash: a
+month that was written but not fully deleted is merged and finished. The admin
+audit-log list reads the segments transparently. Schedule it (e.g. nightly)
+with cron or Windows Task Scheduler.
+
+Usage (from backend/):
+    python -m scripts.archive_audit_logs [--retention-days 365] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from pathlib import Path
+import sys
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from app.core.audit_archive import archive_audit_logs, archive_dir  # noqa: E402
+from app.core.audit_outbox import flush_audit_outbox  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retention-days", type=int, default=None, help="override IBOOKS_AUDIT_RETENTION_DAYS")
+    parser.add_argument("--dry-run", action="store_true", help="only list the months that would be archived")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # A delta still queued in the outbox would land after its base row was archived.
+    if not args.dry_run:
+        flush_audit_outbox(SessionLocal, batch_size=settings.audit_outbox_batch_size)
+    db = SessionLocal()
+    try:
+        segments = archive_audit_logs(db, retention_days=args.retention_days, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    if not segments:
+        print("nothing to archive")
+    for segment in segments:
+        if args.dry_run:
+            print(f"would archive {segment['month']}")
+        else:
+            print(f"{segment['month']}: {segment['rows']} rows -> {archive_dir() / segment['file']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Load benchmark: sync (threadpool) vs async read path.
+
+Replays the stats aggregation used by `/api/stats/*` against the configured
+database in two modes:
+
+- sync: each request runs on a worker thread with `SessionLocal`, capped at
+  `--threads` (Starlette/anyio default threadpool is 40), like a `def` route.
+- async: each request is a coroutine on `AsyncSessionLocal`, like an
+  `async def` route; concurrency is bounded only by the async pool size.
+
+Usage (from backend/):
+    python -m scripts.bench_read_modes --user-id 1 --requests 400 --concurrency 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import sys
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine  # noqa: E402
+from app.models.transaction import Transaction  # noqa: E402
+
+
+def _month_starts(year: int) -> list[tuple[datetime, datetime]]:
+    out: list[tuple[datetime, datetime]] = []
+    for m in range(1, 13):
+        start = datetime(year, m, 1)
+        end = datetime(year + 1, 1, 1) if m == 12 else datetime(year, m + 1, 1)
+        out.append((start, end))
+    return out
+
+
+def _month_query(user_id: int, start: datetime, end: datetime):
+    return (
+        select(Transaction.category_id, func.coalesce(func.sum(Transaction.amount_cents), 0))
+        .where(
+            Transaction.user_id == user_id,
+            Transaction.type == "expense",
+            Transaction.occurred_at >= start,
+            Transaction.occurred_at < end,
+        )
+        .group_by(Transaction.category_id)
+    )
+
+
+def _sync_request(user_id: int, months: list[tuple[datetime, datetime]]) -> float:
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        for start, end in months:
+            db.execute(_month_query(user_id, start, end)).all()
+    return time.perf_counter() - t0
+
+
+async def _async_request(user_id: int, months: list[tuple[datetime, datetime]]) -> float:
+    t0 = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for start, end in months:
+            (await db.execute(_month_query(user_id, start, end))).all()
+    return time.perf_counter() - t0
+
+
+def _report(mode: str, latencies: list[float], wall: float) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(
+        f"{mode:>5}: {len(ordered)} req in {wall:.2f}s "
+        f"({len(ordered) / wall:.1f} req/s)  "
+        f"p50={statistics.median(ordered) * 1000:.1f}ms  "
+        f"p95={p95 * 1000:.1f}ms  max={ordered[-1] * 1000:.1f}ms"
+    )
+
+
+def run_sync(user_id: int, months: list[tuple[datetime, datetime]], requests: int, threads: int) -> None:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        # Queueing time behind busy threads counts towards latency, as it does for a real request.
+        submitted = time.perf_counter()
+        futures = [pool.submit(_sync_request, user_id, months) for _ in range(requests)]
+        latencies = []
+        for f in futures:
+            f.result()
+            latencies.append(time.perf_counter() - submitted)
+    _report("sync", latencies, time.perf_counter() - t0)
+
+
+async def run_async(user_id: int, months: list[tuple[datetime, datetime]], requests: int, concurrency: int) -> None:
+    gate = asyncio.Semaphore(concurrency)
+    submitted = time.perf_counter()
+
+    async def one() -> float:
+        async with gate:
+            await _async_request(user_id, months)
+        return time.perf_counter() - submitted
+
+    t0 = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(requests)))
+    _report("async", list(latencies), time.perf_counter() - t0)
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--year", type=int, default=datetime.now().year)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100, help="in-flight requests in async mode")
+    parser.add_argument("--threads", type=int, default=40, help="worker threads in sync mode")
+    parser.add_argument("--mode", choices=("both", "sync", "async"), default="both")
+    args = parser.parse_args()
+
+    months = _month_starts(args.year)
+    print(f"{args.requests} requests x {len(months)} aggregate queries, user_id={args.user_id}, year={args.year}")
+
+    if args.mode in ("both", "sync"):
+        run_sync(args.user_id, months, args.requests, args.threads)
+        engine.dispose()
+    if args.mode in ("both", "async"):
+        asyncio.run(run_async(args.user_id, months, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Write latency under concurrent report load, per reader isolation level.
+
+Starts `--readers` threads that loop a full-year stats aggregation over
+`transactions`, while one writer repeatedly inserts and deletes a transaction
+row (as `create_transaction` / `delete_transaction` would) and times each
+commit. Run once per isolation level to compare, e.g. before/after migration
+0017_row_versioning. With --replica the readers use IBOOKS_DB_READ_URL instead,
+which shows what moving reports off the primary buys. Use a test database: rows
+are written and removed. Only SQL Server numbers mean anything; SQLite locks the
+whole file and has neither isolation level.
+
+Usage (from backend/):
+    python -m scripts.bench_write_under_reports --user-id 1 --isolation "READ COMMITTED" --isolation SNAPSHOT
+    python -m scripts.bench_write_under_reports --user-id 1 --replica
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import sys
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from sqlalchemy import delete, func, select, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db.session import BalanceSessionLocal, ReadSessionLocal, SessionLocal, engine, read_engine  # noqa: E402
+from app.models.transaction import Transaction  # noqa: E402
+
+
+def _report_loop(
+    sessions: sessionmaker, user_id: int, year: int, isolation: str | None, stop: threading.Event, counter: list[int]
+) -> None:
+    start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    stmt = (
+        select(Transaction.category_id, func.coalesce(func.sum(Transaction.amount_cents), 0))
+        .where(Transaction.user_id == user_id, Transaction.occurred_at >= start, Transaction.occurred_at < end)
+        .group_by(Transaction.category_id)
+    )
+    while not stop.is_set():
+        with sessions() as db:
+            if isolation:
+                db.connection(execution_options={"isolation_level": isolation})
+            db.execute(stmt).all()
+        counter[0] += 1
+
+
+def _write_once(user_id: int) -> float:
+    t0 = time.perf_counter()
+    # Same session factory (and isolation level) as create_transaction / delete_transaction.
+    with BalanceSessionLocal() as db:
+        row = Transaction(
+            user_id=user_id,
+            type="expense",
+            amount_cents=1,
+            occurred_at=datetime.utcnow(),
+            funding_source="cash",
+            note="__bench_write_under_reports__",
+        )
+        db.add(row)
+        db.flush()
+        # A cash row touches no account history.
+        db.execute(
+            delete(Transaction).where(Transaction.id == row.id).execution_options(history_unaffected=True)
+        )
+        db.commit()
+    return time.perf_counter() - t0
+
+
+def run(user_id: int, year: int, isolation: str | None, readers: int, writes: int, replica: bool) -> None:
+    sessions = ReadSessionLocal if replica else SessionLocal
+    stop = threading.Event()
+    counter = [0]
+    threads = [
+        threading.Thread(target=_report_loop, args=(sessions, user_id, year, isolation, stop, counter), daemon=True)
+        for _ in range(readers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.5)  # let the readers get going
+
+    latencies = [_write_once(user_id) for _ in range(writes)]
+
+    stop.set()
+    for t in threads:
+        t.join()
+
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    label = (isolation or "default") + (" on replica" if replica else "")
+    print(
+        f"{label:>27}: writes p50={statistics.median(ordered) * 1000:.1f}ms "
+        f"p95={p95 * 1000:.1f}ms max={ordered[-1] * 1000:.1f}ms  ({counter[0]} report queries)"
+    )
+
+
+def _print_db_flags() -> None:
+    if engine.dialect.name != "mssql":
+        return
+    with engine.connect() as conn:
+        rcsi, snapshot = conn.execute(
+            text(
+                "SELECT is_read_committed_snapshot_on, snapshot_isolation_state_desc "
+                "FROM sys.databases WHERE name = DB_NAME()"
+            )
+        ).one()
+    print(f"READ_COMMITTED_SNAPSHOT={'ON' if rcsi else 'OFF'}  ALLOW_SNAPSHOT_ISOLATION={snapshot}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--year", type=int, default=datetime.now().year)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument(
+        "--isolation",
+        action="append",
+        help='reader isolation level, repeatable (e.g. "READ COMMITTED", SNAPSHOT); default: engine default',
+    )
+    parser.add_argument("--replica", action="store_true", help="run the report readers on IBOOKS_DB_READ_URL")
+    args = parser.parse_args()
+    if args.replica and read_engine is engine:
+        parser.error("--replica needs IBOOKS_DB_READ_URL")
+
+    _print_db_flags()
+    for isolation in args.isolation or [None]:
+        run(args.user_id, args.year, isolation, args.readers, args.writes, args.replica)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Create a local SQLite database from the models and stamp it at the current schema head.
+
+Alembic migrations only run on SQL Server. This builds the same tables in one or more
+SQLite files so the app can start against them (startup checks alembic_version). Pass
+two paths to try read/write splitting locally: the second file is a separate database,
+not a live replica, so copy the primary over it whenever the replica should catch up.
+
+Usage (from backend/):
+    python -m scripts.bootstrap_sqlite ./ibooks.db
+    python -m scripts.bootstrap_sqlite ./primary.db ./replica.db [--force]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from app.db.schema_version import SCHEMA_HEAD  # noqa: E402
+from app.db.sqlite_bootstrap import bootstrap_sqlite  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="SQLite database files to create")
+    parser.add_argument("--force", action="store_true", help="drop and recreate tables in existing files")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if path.exists() and not args.force:
+            print(f"{path} already exists; pass --force to recreate it", file=sys.stderr)
+            sys.exit(1)
+        bootstrap_sqlite(f"sqlite:///{path.resolve().as_posix()}", drop_existing=args.force)
+        print(f"created {path} at {SCHEMA_HEAD}")
+
+
+if __name__ == "__main__":
+    main()
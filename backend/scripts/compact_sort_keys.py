@@ -0,0 +1,100 @@
+"""Respace fractional sort keys of categories and bank accounts.
+
+Moves give the moved row a key between its neighbours, so keys in a busy gap grow
+by about one character per five moves. This rewrites every sibling group (categories
+per user/type/parent, bank accounts per user) that has a key longer than
+RANK_COMPACT_LENGTH or duplicate keys, with short evenly spaced keys in the same
+order. Each group is committed on its own. Schedule it (e.g. weekly) next to the
+other maintenance scripts.
+
+Usage (from backend/):
+    python -m scripts.compact_sort_keys [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.core.rank import RANK_COMPACT_LENGTH, even_keys  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.models.bank_account import BankAccount  # noqa: E402
+from app.models.category import Category  # noqa: E402
+
+
+def _needs_compaction(keys: list[str]) -> bool:
+    return any(len(k) > RANK_COMPACT_LENGTH for k in keys) or len(set(keys)) != len(keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only report the groups that would be rewritten")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        # Find candidate groups cheaply first; only those are loaded as rows.
+        category_groups = db.execute(
+            select(Category.user_id, Category.type, Category.parent_id)
+            .group_by(Category.user_id, Category.type, Category.parent_id)
+            .having(
+                (func.max(func.char_length(Category.sort_key)) > RANK_COMPACT_LENGTH)
+                | (func.count(Category.id) != func.count(func.distinct(Category.sort_key)))
+            )
+        ).all()
+        account_users = db.scalars(
+            select(BankAccount.user_id)
+            .group_by(BankAccount.user_id)
+            .having(
+                (func.max(func.char_length(BankAccount.sort_key)) > RANK_COMPACT_LENGTH)
+                | (func.count(BankAccount.id) != func.count(func.distinct(BankAccount.sort_key)))
+            )
+        ).all()
+        db.rollback()
+
+        for user_id, type_, parent_id in category_groups:
+            rows = db.scalars(
+                select(Category)
+                .where(Category.user_id == user_id, Category.type == type_, Category.parent_id == parent_id)
+                .order_by(Category.sort_key.asc(), Category.id.asc())
+            ).all()
+            if not _needs_compaction([r.sort_key for r in rows]):
+                db.rollback()
+                continue
+            print(f"categories user={user_id} type={type_} parent={parent_id}: {len(rows)} rows")
+            if args.dry_run:
+                db.rollback()
+                continue
+            for row, key in zip(rows, even_keys(len(rows))):
+                row.sort_key = key
+            db.commit()
+
+        for user_id in account_users:
+            rows = db.scalars(
+                select(BankAccount)
+                .where(BankAccount.user_id == user_id)
+                .order_by(BankAccount.is_pinned.desc(), BankAccount.sort_key.asc(), BankAccount.id.desc())
+            ).all()
+            if not _needs_compaction([r.sort_key for r in rows]):
+                db.rollback()
+                continue
+            print(f"bank accounts user={user_id}: {len(rows)} rows")
+            if args.dry_run:
+                db.rollback()
+                continue
+            for row, key in zip(rows, even_keys(len(rows))):
+                row.sort_key = key
+            db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Re-encode stored audit snapshots between JSON text and the compact binary format.
+
+Converts transaction_audit_logs rows in id-ordered chunks, one commit per
+chunk, and reports the stored snapshot size before and after. Run with
+`--to binary` after switching IBOOKS_AUDIT_SNAPSHOT_ENCODING=binary, or
+`--to json` before downgrading past migration 0023_audit_snapshot_binary.
+
+Usage (from backend/):
+    python -m scripts.encode_audit_snapshots --to binary [--chunk-size 1000]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from sqlalchemy import select  # noqa: E402
+
+from app.core.audit_log import snapshot_columns, stored_snapshots  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.models.transaction_audit_log import TransactionAuditLog  # noqa: E402
+
+
+def _stored_size(row: TransactionAuditLog) -> int:
+    size = 0
+    for value in (row.before_json, row.after_json):
+        if value is not None:
+            size += len(value) * 2  # NVARCHAR stores UTF-16
+    for value in (row.before_bin, row.after_bin):
+        if value is not None:
+            size += len(value)
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--to", choices=("binary", "json"), required=True)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    settings.audit_snapshot_encoding = args.to
+    pending = TransactionAuditLog.after_json if args.to == "binary" else TransactionAuditLog.after_bin
+    pending_before = TransactionAuditLog.before_json if args.to == "binary" else TransactionAuditLog.before_bin
+
+    size_before = size_after = converted = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.scalars(
+                select(TransactionAuditLog)
+                .where(TransactionAuditLog.id > last_id, pending.is_not(None) | pending_before.is_not(None))
+                .order_by(TransactionAuditLog.id.asc())
+                .limit(args.chunk_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                size_before += _stored_size(row)
+                before, after = stored_snapshots(row)
+                for column, value in snapshot_columns(before, after).items():
+                    setattr(row, column, value)
+                size_after += _stored_size(row)
+            last_id = rows[-1].id
+            converted += len(rows)
+            db.commit()
+            print(f"converted {converted} rows (up to id {last_id})")
+    finally:
+        db.close()
+
+    if converted:
+        print(f"snapshot bytes: {size_before} -> {size_after} ({size_before / max(size_after, 1):.1f}x)")
+    else:
+        print("nothing to convert")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Write per-user ledger checkpoints for GET /api/admin/ledger-at.
+
+For every user whose newest checkpoint is older than
+IBOOKS_LEDGER_CHECKPOINT_INTERVAL_DAYS (or who has none), snapshot the live
+transactions and bank balances into ledger_checkpoints. Point-in-time queries
+then replay at most one interval of audit rows. Schedule it (e.g. daily) with
+cron or Windows Task Scheduler.
+
+Usage (from backend/):
+    python -m scripts.ledger_checkpoints [--user-id 1] [--force]
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.ledger_history import write_ledger_checkpoint  # noqa: E402
+from app.db.isolation import use_report_isolation  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.models.ledger_checkpoint import LedgerCheckpoint  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, action="append", help="only these users (repeatable)")
+    parser.add_argument("--force", action="store_true", help="ignore the interval and checkpoint now")
+    args = parser.parse_args()
+
+    due_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=settings.ledger_checkpoint_interval_days)
+
+    db = SessionLocal()
+    try:
+        user_ids = args.user_id or list(db.scalars(select(User.id).order_by(User.id)).all())
+        latest = dict(
+            db.execute(
+                select(LedgerCheckpoint.user_id, func.max(LedgerCheckpoint.as_of)).group_by(LedgerCheckpoint.user_id)
+            ).all()
+        )
+        db.rollback()
+    finally:
+        db.close()
+
+    for user_id in user_ids:
+        last = latest.get(user_id)
+        if not args.force and last is not None and last > due_before:
+            continue
+        # One session per user: the live read runs under report (snapshot) isolation.
+        db = SessionLocal()
+        try:
+            use_report_isolation(db)
+            row = write_ledger_checkpoint(db, user_id)
+            print(f"user {user_id}: checkpoint as of {row.as_of.isoformat()}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
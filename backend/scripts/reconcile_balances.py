@@ -0,0 +1,97 @@
+"""Check bank account balances against the ledger, optionally repairing drift.
+
+Every account's expected balance is opening_balance_cents plus its income, refunds
+and incoming transfers, minus its expenses and outgoing transfers. Accounts are read
+in chunks of consecutive ids; each chunk costs one account query and one grouped
+aggregate over its transactions, and is committed on its own. Drifted accounts are
+printed; with --repair their balance is set to the expected value and an audit row
+(no transaction id, reason "reconcile") records the correction.
+
+Exits with status 1 when drift was found and left unrepaired, so schedulers can alert.
+
+Usage (from backend/):
+    python -m scripts.reconcile_balances [--repair] [--chunk-size 500] [--user-id 1] [--actor-user-id 1]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from sqlalchemy import select  # noqa: E402
+
+from app.core.balance_reconciliation import reconcile_chunk  # noqa: E402
+from app.db.isolation import use_report_isolation  # noqa: E402
+from app.db.session import BalanceSessionLocal, SessionLocal  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def _default_actor() -> int | None:
+    db = SessionLocal()
+    try:
+        return db.scalar(select(User.id).where(User.role == User.ROLE_ADMIN).order_by(User.id.asc()).limit(1))
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="set drifted balances to the expected value")
+    parser.add_argument("--chunk-size", type=int, default=500, help="accounts per chunk")
+    parser.add_argument("--user-id", type=int, action="append", help="only these users (repeatable)")
+    parser.add_argument("--actor-user-id", type=int, help="audit actor for repairs (default: first admin)")
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+
+    actor_user_id = args.actor_user_id
+    if args.repair and actor_user_id is None:
+        actor_user_id = _default_actor()
+        if actor_user_id is None:
+            parser.error("--repair needs --actor-user-id when there is no admin user")
+
+    checked_through = 0
+    found = repaired = 0
+    while True:
+        # Repairs read and write under the balance-check level, like the ledger routes;
+        # reports only need a consistent snapshot.
+        db = BalanceSessionLocal() if args.repair else SessionLocal()
+        try:
+            if not args.repair:
+                use_report_isolation(db)
+            drifts, last_id = reconcile_chunk(
+                db,
+                after_id=checked_through,
+                limit=args.chunk_size,
+                repair=args.repair,
+                actor_user_id=actor_user_id,
+                user_ids=args.user_id,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        for drift in drifts:
+            found += 1
+            repaired += int(drift["repaired"])
+            print(
+                f"account {drift['bankAccountId']} (user {drift['userId']}): "
+                f"balance {drift['balanceCents']} expected {drift['expectedCents']} "
+                f"drift {drift['driftCents']:+d}" + (" repaired" if drift["repaired"] else "")
+            )
+        if last_id is None:
+            break
+        checked_through = last_id
+
+    print(f"{found} drifted account(s), {repaired} repaired")
+    if found > repaired:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Regenerate app/db/schema_version.py (alembic head + model fingerprint).
+
+Run after adding a migration or changing a model (from backend/):
+    python -m scripts.schema_fingerprint          # print
+    python -m scripts.schema_fingerprint --write  # update app/db/schema_version.py
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+from alembic.config import Config  # noqa: E402
+from alembic.script import ScriptDirectory  # noqa: E402
+
+from app.db.schema_fingerprint import compute_schema_fingerprint  # noqa: E402
+from app.models.base import Base  # noqa: E402
+import app.models  # noqa: E402,F401
+
+_TARGET = _BACKEND_DIR / "app" / "db" / "schema_version.py"
+
+_TEMPLATE = '''# Generated by `python -m scripts.schema_fingerprint --write`; do not edit by hand.
+# Startup compares alembic_version against SCHEMA_HEAD instead of reflecting tables.
+
+SCHEMA_HEAD = "{head}"
+SCHEMA_FINGERPRINT = "{fingerprint}"
+'''
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--write", action="store_true")
+    args = parser.parse_args()
+
+    config = Config(str(_BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(_BACKEND_DIR / "alembic"))
+    script = ScriptDirectory.from_config(config)
+    heads = script.get_heads()
+    if len(heads) != 1:
+        raise SystemExit(f"Expected a single alembic head, got {heads}")
+
+    content = _TEMPLATE.format(head=heads[0], fingerprint=compute_schema_fingerprint(Base.metadata))
+    if args.write:
+        _TARGET.write_text(content, encoding="utf-8")
+        print(f"wrote {_TARGET}")
+    else:
+        print(content)
+
+
+if __name__ == "__main__":
+    main()
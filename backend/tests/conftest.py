@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import tempfile
+
+# Settings and engines are read at import time, so point them at a scratch SQLite file
+# before anything from app/ is imported. Tests run against the primary only.
+_DB_PATH = Path(tempfile.mkdtemp(prefix="ibooks-tests-")) / "ibooks.db"
+os.environ["IBOOKS_DB_URL"] = f"sqlite:///{_DB_PATH.as_posix()}"
+os.environ["IBOOKS_DB_READ_URL"] = ""
+os.environ["IBOOKS_SERVE_FRONTEND"] = "false"
+os.environ["IBOOKS_AUDIT_LOG_MODE"] = "inline"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.db.sqlite_bootstrap import bootstrap_sqlite  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """A client logged in as the seeded admin, on a freshly created schema."""
+    bootstrap_sqlite(engine, drop_existing=True)
+    with TestClient(app) as test_client:
+        response = test_client.post("/api/auth/login", json={"username": "admin", "password": "admin"})
+        assert response.status_code == 200, response.text
+        test_client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        yield test_client
+
+
+@pytest.fixture
+def db(client: TestClient):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def ok(response) -> dict | list | None:
+    assert response.status_code < 300, (response.status_code, response.text)
+    return response.json() if response.content else None
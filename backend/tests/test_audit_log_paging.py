@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+
+from app.api.routers import transaction_audit_logs
+from tests.conftest import ok
+
+
+def _setup(client) -> tuple[int, int, int]:
+    account = ok(
+        client.post("/api/config/bank-accounts", json={"bankName": "招行", "alias": "a", "balanceCents": 100000})
+    )
+    root = ok(client.get("/api/config/categories/tree?type=expense"))[0]
+    target = ok(
+        client.post("/api/config/categories", json={"type": "expense", "name": "餐饮", "parentId": root["id"]})
+    )
+    return account["id"], root["children"][0]["id"], target["id"]
+
+
+def _edit(client, tx_id: int, note: str) -> None:
+    # Audit rows carry millisecond timestamps; keep each step clearly apart.
+    time.sleep(0.02)
+    ok(client.patch(f"/api/ledger/transactions/{tx_id}", json={"note": note}))
+
+
+def _pages(client, page_size: int, order: str = "asc") -> list[list[dict]]:
+    pages, cursor = [], None
+    while True:
+        params = {"pageSize": page_size, "order": order, **({"cursor": cursor} if cursor else {})}
+        page = ok(client.get("/api/admin/transaction-audit-logs", params=params))
+        pages.append(page["items"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return pages
+
+
+def test_delta_views_are_rebuilt_from_a_bounded_window(client, monkeypatch):
+    account_id, category_id, target_id = _setup(client)
+    tx = ok(
+        client.post(
+            "/api/ledger/transactions",
+            json={
+                "type": "expense",
+                "amountCents": 700,
+                "occurredAt": "2026-03-03T04:00:00Z",
+                "categoryId": category_id,
+                "fundingSource": "bank",
+                "bankAccountId": account_id,
+            },
+        )
+    )
+    _edit(client, tx["id"], "one")
+    time.sleep(0.02)
+    ok(client.post(f"/api/config/categories/{category_id}/merge-into/{target_id}"))
+    _edit(client, tx["id"], "two")
+    _edit(client, tx["id"], "three")
+
+    loaded: list[list[int]] = []
+    real = transaction_audit_logs.reconstruct_snapshots
+
+    def recording(history):
+        history = list(history)
+        loaded.append([int(r.id) for r in history])
+        return real(history)
+
+    monkeypatch.setattr(transaction_audit_logs, "reconstruct_snapshots", recording)
+
+    for order in ("asc", "desc"):
+        items = [item for page in _pages(client, 2, order) for item in page]
+        updates = [i for i in items if i["transactionId"] == tx["id"] and i["action"] == "update"]
+        assert [u["after"]["note"] for u in sorted(updates, key=lambda u: u["id"])] == ["one", "two", "three"]
+        for update in updates:
+            # Full views: untouched fields come from the create, the category from the merge.
+            assert update["after"]["amountCents"] == 700 and update["before"]["amountCents"] == 700
+        by_note = {u["after"]["note"]: u for u in updates}
+        assert by_note["one"]["after"]["categoryId"] == category_id
+        assert by_note["two"]["before"] == {**by_note["two"]["after"], "note": "one"}
+        assert by_note["two"]["after"]["categoryId"] == target_id
+        assert by_note["three"]["after"]["categoryId"] == target_id
+
+    # asc pages are [create, one], [merge, two], [three]: nothing after a page's last row is
+    # read, and each window starts at the create (the only full row of the transaction).
+    create_id, one_id, merge_id, two_id, three_id = sorted(i["id"] for i in items)
+    assert loaded[0] == [create_id, one_id]
+    assert loaded[1] == [create_id, one_id, merge_id, two_id]
+    assert loaded[2] == [create_id, one_id, merge_id, two_id, three_id]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+import time
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.models.transaction_audit_log import TransactionAuditLog
+from app.models.transaction_audit_outbox import TransactionAuditOutbox
+from tests.conftest import ok
+
+
+def test_queued_history_counts_for_deltas_and_replay(client, db, monkeypatch):
+    # The background writer is not running in tests, so records stay queued until flushed.
+    monkeypatch.setattr(settings, "audit_log_mode", "outbox")
+    account = ok(
+        client.post("/api/config/bank-accounts", json={"bankName": "招行", "alias": "a", "balanceCents": 100000})
+    )
+    leaf = ok(client.get("/api/config/categories/tree?type=expense"))[0]["children"][0]
+    tx = ok(
+        client.post(
+            "/api/ledger/transactions",
+            json={
+                "type": "expense",
+                "amountCents": 400,
+                "occurredAt": "2026-03-03T04:00:00Z",
+                "categoryId": leaf["id"],
+                "fundingSource": "bank",
+                "bankAccountId": account["id"],
+            },
+        )
+    )
+    time.sleep(0.02)
+    ok(client.patch(f"/api/ledger/transactions/{tx['id']}", json={"note": "queued"}))
+
+    # The create is still in the outbox, yet the update is stored as a diff on top of it.
+    payloads = db.scalars(select(TransactionAuditOutbox.payload).order_by(TransactionAuditOutbox.id))
+    queued = [json.loads(payload) for payload in payloads]
+    assert [(r["action"], r["delta"]) for r in queued] == [("create", False), ("update", True)]
+    assert queued[1]["after"] == {"note": "queued"}
+    assert db.scalar(select(func.count(TransactionAuditLog.id))) == 0
+
+    # ledger-at delivers the queue before replaying, so the edit is visible at once.
+    time.sleep(0.02)
+    at = ok(client.get("/api/admin/ledger-at", params={"userId": 1, "at": "2100-01-01T00:00:00Z"}))
+    assert [(t["id"], t["note"]) for t in at["transactions"]] == [(tx["id"], "queued")]
+    db.expire_all()
+    assert db.scalar(select(func.count(TransactionAuditOutbox.id))) == 0
+
+    logs = ok(client.get("/api/admin/transaction-audit-logs"))["items"]
+    assert [(log["action"], log["after"]["note"], log["after"]["amountCents"]) for log in logs] == [
+        ("create", None, 400),
+        ("update", "queued", 400),
+    ]
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from sqlalchemy import func, select
+
+from app.api.routers import bank_accounts
+from app.core import balance_history
+from app.models.bank_account_balance_checkpoint import BankAccountBalanceCheckpoint
+from tests.conftest import ok
+
+
+def _account(client) -> tuple[int, int]:
+    account = ok(
+        client.post("/api/config/bank-accounts", json={"bankName": "招行", "alias": "a", "balanceCents": 100000})
+    )
+    leaf = ok(client.get("/api/config/categories/tree?type=expense"))[0]["children"][0]
+    return account["id"], leaf["id"]
+
+
+def _expense(client, account_id: int, category_id: int, amount: int, occurred_at: str) -> dict:
+    return ok(
+        client.post(
+            "/api/ledger/transactions",
+            json={
+                "type": "expense",
+                "amountCents": amount,
+                "occurredAt": occurred_at,
+                "categoryId": category_id,
+                "fundingSource": "bank",
+                "bankAccountId": account_id,
+            },
+        )
+    )
+
+
+def _monthly(client, account_id: int) -> dict[str, int]:
+    history = ok(
+        client.get(f"/api/config/bank-accounts/{account_id}/balance-history?granularity=month&start=2026-01-01")
+    )
+    return {p["date"][:7]: p["balanceCents"] for p in history["points"]}
+
+
+def _checkpoints(db, account_id: int) -> list[tuple[str, int]]:
+    db.expire_all()
+    rows = db.execute(
+        select(BankAccountBalanceCheckpoint.as_of, func.count())
+        .where(BankAccountBalanceCheckpoint.bank_account_id == account_id)
+        .group_by(BankAccountBalanceCheckpoint.as_of)
+        .order_by(BankAccountBalanceCheckpoint.as_of)
+    ).all()
+    return [(as_of.strftime("%Y-%m"), count) for as_of, count in rows]
+
+
+def test_backdated_write_drops_later_checkpoints(client, db):
+    account_id, category_id = _account(client)
+    _expense(client, account_id, category_id, 1000, "2026-02-10T04:00:00Z")
+    _expense(client, account_id, category_id, 2000, "2026-05-10T04:00:00Z")
+    before = _monthly(client, account_id)
+    assert before["2026-01"] == 100000 and before["2026-02"] == 99000 and before["2026-05"] == 97000
+    assert "2026-06" in dict(_checkpoints(db, account_id))
+
+    _expense(client, account_id, category_id, 500, "2026-03-15T04:00:00Z")
+    assert all(month <= "2026-03" for month, _ in _checkpoints(db, account_id))
+
+    after = _monthly(client, account_id)
+    assert after["2026-02"] == 99000
+    assert after["2026-03"] == 98500
+    assert after["2026-05"] == 96500
+    assert after[max(after)] == 96500
+
+
+def test_delete_drops_later_checkpoints(client, db):
+    account_id, category_id = _account(client)
+    tx = _expense(client, account_id, category_id, 1000, "2026-04-01T04:00:00Z")
+    assert _monthly(client, account_id)["2026-04"] == 99000
+
+    ok(client.delete(f"/api/ledger/transactions/{tx['id']}"))
+    assert all(month <= "2026-04" for month, _ in _checkpoints(db, account_id))
+    assert set(_monthly(client, account_id).values()) == {100000}
+
+
+def test_concurrent_duplicate_fill_keeps_result(client, db, monkeypatch):
+    account_id, category_id = _account(client)
+    _expense(client, account_id, category_id, 1000, "2026-02-10T04:00:00Z")
+    expected = _monthly(client, account_id)
+    stored = _checkpoints(db, account_id)
+
+    # Replay the race: this fill reads no checkpoints, then a concurrent fill commits them,
+    # so its own insert hits uq_bank_account_balance_checkpoints_account_as_of.
+    real = balance_history._stored_checkpoints
+    calls = []
+
+    def stale_first_read(db, account_id, upto):
+        calls.append(account_id)
+        return {} if len(calls) == 1 else real(db, account_id, upto)
+
+    monkeypatch.setattr(balance_history, "_stored_checkpoints", stale_first_read)
+    assert _monthly(client, account_id) == expected
+    assert len(calls) == 2
+    assert _checkpoints(db, account_id) == stored and all(count == 1 for _, count in stored)
+
+
+def test_lagging_snapshot_replays_missing_checkpoints(client, db, monkeypatch):
+    account_id, category_id = _account(client)
+    _expense(client, account_id, category_id, 1000, "2026-02-10T04:00:00Z")
+    _expense(client, account_id, category_id, 2000, "2026-05-10T04:00:00Z")
+    expected = _monthly(client, account_id)
+
+    # A replica that never received the fill: the read session sees no checkpoints at all.
+    db.query(BankAccountBalanceCheckpoint).delete(synchronize_session=False)
+    db.commit()
+    monkeypatch.setattr(bank_accounts, "ensure_checkpoints", lambda account_id, upto: None)
+    assert _monthly(client, account_id) == expected
+    assert _checkpoints(db, account_id) == []
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from app.core import category_graph as graphs
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.bank_account_balance_checkpoint import BankAccountBalanceCheckpoint
+from app.models.category_tag import CategoryTag
+from app.models.transaction import Transaction
+from tests.conftest import ok
+
+
+def _account_with_expense(client) -> tuple[int, int]:
+    account = ok(
+        client.post("/api/config/bank-accounts", json={"bankName": "招行", "alias": "a", "balanceCents": 100000})
+    )
+    leaf = ok(client.get("/api/config/categories/tree?type=expense"))[0]["children"][0]
+    tx = ok(
+        client.post(
+            "/api/ledger/transactions",
+            json={
+                "type": "expense",
+                "amountCents": 1280,
+                "occurredAt": "2026-03-03T04:00:00Z",
+                "categoryId": leaf["id"],
+                "fundingSource": "bank",
+                "bankAccountId": account["id"],
+            },
+        )
+    )
+    return account["id"], tx["id"]
+
+
+def _checkpoint_months(db, account_id: int) -> list[str]:
+    rows = db.scalars(
+        select(BankAccountBalanceCheckpoint.as_of)
+        .where(BankAccountBalanceCheckpoint.bank_account_id == account_id)
+        .order_by(BankAccountBalanceCheckpoint.as_of)
+    ).all()
+    return [r.strftime("%Y-%m") for r in rows]
+
+
+def test_bulk_transaction_write_needs_explicit_option(client, db):
+    _, tx_id = _account_with_expense(client)
+
+    with pytest.raises(RuntimeError, match="bypasses cache invalidation"):
+        db.execute(update(Transaction).where(Transaction.id == tx_id).values(amount_cents=1))
+    db.rollback()
+
+    db.execute(
+        update(Transaction)
+        .where(Transaction.id == tx_id)
+        .values(note="bulk")
+        .execution_options(history_unaffected=True)
+    )
+    db.commit()
+    assert db.scalar(select(Transaction.note).where(Transaction.id == tx_id)) == "bulk"
+
+
+def test_async_session_write_drops_checkpoints(client, db):
+    account_id, tx_id = _account_with_expense(client)
+    history = f"/api/config/bank-accounts/{account_id}/balance-history?granularity=month"
+    ok(client.get(f"{history}&start=2026-01-01"))
+    assert "2026-04" in _checkpoint_months(db, account_id)
+
+    async def edit_amount() -> None:
+        async with AsyncSessionLocal() as session:
+            row = await session.get(Transaction, tx_id)
+            row.amount_cents = 2280
+            await session.commit()
+        await async_engine.dispose()
+
+    asyncio.run(edit_amount())
+    db.expire_all()
+    assert all(month <= "2026-03" for month in _checkpoint_months(db, account_id))
+
+    points = ok(client.get(f"{history}&start=2026-02-01"))
+    # The stored balance was not touched by the raw edit, so only the history moves.
+    assert points["points"][1]["changeCents"] == -2280
+
+
+def test_bulk_tag_insert_drops_cached_graphs(client, db):
+    root = ok(client.get("/api/config/categories/tree?type=expense"))[0]
+    user_id = 1
+    graphs.category_graph(db, user_id)
+    db.rollback()
+    assert user_id in graphs._graphs
+
+    db.execute(
+        insert(CategoryTag), [{"user_id": user_id, "category_id": root["id"], "name": "bulk", "is_active": True}]
+    )
+    assert user_id in graphs._graphs  # dropped on commit, not before
+    db.commit()
+    assert user_id not in graphs._graphs
+    assert "bulk" in {t.name for t in graphs.category_graph(db, user_id).tags.values()}
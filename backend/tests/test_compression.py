@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import gzip
+
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core.compression import CompressionMiddleware
+from app.core.static_files import PrecompressedStaticFiles
+
+_BIG = {"items": [{"id": i, "name": f"item {i}"} for i in range(200)]}
+
+
+@pytest.fixture
+def api() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/big")
+    def big() -> Response:
+        return JSONResponse(_BIG, headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    def small() -> dict:
+        return {"ok": True}
+
+    @app.get("/text")
+    def text() -> Response:
+        return PlainTextResponse("x" * 4096)
+
+    @app.get("/cached")
+    def cached() -> Response:
+        return Response(status_code=304, headers={"ETag": '"v1"'})
+
+    return TestClient(app)
+
+
+def test_large_json_is_compressed_with_the_preferred_coding(api):
+    for accept, coding in (("gzip, br", "br"), ("gzip", "gzip"), ("br;q=0.5, gzip", "gzip")):
+        response = api.get("/big", headers={"Accept-Encoding": accept})
+        assert response.headers["content-encoding"] == coding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == _BIG
+
+
+def test_compressed_etag_is_weakened(api):
+    assert api.get("/big", headers={"Accept-Encoding": "gzip"}).headers["etag"] == 'W/"v1"'
+    assert api.get("/big", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"v1"'
+
+
+def test_below_threshold_is_sent_as_is_but_varies(api):
+    response = api.get("/small", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_head_304_and_non_json_pass_through(api):
+    head = api.head("/big", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in head.headers
+    not_modified = api.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert not_modified.status_code == 304 and "content-encoding" not in not_modified.headers
+    text = api.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in text.headers and "vary" not in text.headers
+
+
+def test_precompressed_siblings_are_served(tmp_path):
+    source = b"console.log('app');" * 100
+    (tmp_path / "app.js").write_bytes(source)
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(source))
+    (tmp_path / "plain.txt").write_bytes(b"plain")
+    app = FastAPI()
+    app.mount("/", PrecompressedStaticFiles(directory=str(tmp_path)))
+    client = TestClient(app)
+
+    served = client.get("/app.js", headers={"Accept-Encoding": "br, gzip"})
+    assert served.headers["content-encoding"] == "gzip"  # no .br sibling here
+    assert served.headers["vary"] == "Accept-Encoding"
+    assert served.content == source
+
+    identity = client.get("/app.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers and identity.headers["vary"] == "Accept-Encoding"
+    assert identity.content == source
+
+    plain = client.get("/plain.txt", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers and "vary" not in plain.headers
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from sqlalchemy import func, select
+
+from app.core import credit_card_statements
+from app.models.credit_card_statement import CreditCardStatement
+from tests.conftest import ok
+
+
+def _expense_leaf(client) -> int:
+    tree = ok(client.get("/api/config/categories/tree?type=expense"))
+    return tree[0]["children"][0]["id"]
+
+
+def _card_with_history(client) -> int:
+    card = ok(
+        client.post(
+            "/api/config/bank-accounts",
+            json={"bankName": "工行", "alias": "card", "kind": "credit", "billingDay": 5, "repaymentDay": 25},
+        )
+    )
+    category_id = _expense_leaf(client)
+    charges = (("2026-05-10T04:00:00Z", 1200), ("2026-07-01T04:00:00Z", 3400), ("2026-08-20T04:00:00Z", 560))
+    for occurred_at, amount in charges:
+        ok(
+            client.post(
+                "/api/ledger/transactions",
+                json={
+                    "type": "expense",
+                    "amountCents": amount,
+                    "occurredAt": occurred_at,
+                    "categoryId": category_id,
+                    "fundingSource": "bank",
+                    "bankAccountId": card["id"],
+                },
+            )
+        )
+    return card["id"]
+
+
+def _statement_dates(db, card_id: int) -> list:
+    return db.execute(
+        select(CreditCardStatement.statement_date, func.count())
+        .where(CreditCardStatement.bank_account_id == card_id)
+        .group_by(CreditCardStatement.statement_date)
+        .order_by(CreditCardStatement.statement_date)
+    ).all()
+
+
+def test_concurrent_duplicate_fill_keeps_result(client, db, monkeypatch):
+    card_id = _card_with_history(client)
+    expected = ok(client.get(f"/api/config/bank-accounts/{card_id}/cycles?limit=24"))
+    stored = _statement_dates(db, card_id)
+    assert stored and all(count == 1 for _, count in stored)
+
+    # Replay the race: this fill reads the cache before a concurrent fill commits the same
+    # cycles, so its own insert hits uq_credit_card_statements_account_date.
+    real = credit_card_statements._cached_statements
+    calls = []
+
+    def stale_first_read(db, account_id, open_date):
+        calls.append(account_id)
+        return [] if len(calls) == 1 else real(db, account_id, open_date)
+
+    monkeypatch.setattr(credit_card_statements, "_cached_statements", stale_first_read)
+    again = ok(client.get(f"/api/config/bank-accounts/{card_id}/cycles?limit=24"))
+
+    assert len(calls) == 2  # stale read, then the re-read after the conflict
+    assert again == expected
+    assert _statement_dates(db, card_id) == stored
+
+
+def test_backdated_transaction_drops_later_statements(client, db):
+    card_id = _card_with_history(client)
+    before = ok(client.get(f"/api/config/bank-accounts/{card_id}/cycles?limit=24"))["cycles"]
+    july = next(c for c in before if c["statementDate"] == "2026-07-05")
+
+    ok(
+        client.post(
+            "/api/ledger/transactions",
+            json={
+                "type": "expense",
+                "amountCents": 1000,
+                "occurredAt": "2026-06-20T04:00:00Z",
+                "categoryId": _expense_leaf(client),
+                "fundingSource": "bank",
+                "bankAccountId": card_id,
+            },
+        )
+    )
+    remaining = [str(d) for d, _ in _statement_dates(db, card_id)]
+    assert remaining and max(remaining) < "2026-07-05"
+
+    after = ok(client.get(f"/api/config/bank-accounts/{card_id}/cycles?limit=24"))["cycles"]
+    july_after = next(c for c in after if c["statementDate"] == "2026-07-05")
+    assert july_after["chargesCents"] == july["chargesCents"] + 1000
+    assert after[0]["statementBalanceCents"] == before[0]["statementBalanceCents"] + 1000
+
+
+def test_billing_day_change_drops_every_statement(client, db):
+    card_id = _card_with_history(client)
+    ok(client.get(f"/api/config/bank-accounts/{card_id}/cycles"))
+    assert _statement_dates(db, card_id)
+
+    ok(client.patch(f"/api/config/bank-accounts/{card_id}", json={"billingDay": 10}))
+    assert _statement_dates(db, card_id) == []
+
+    cycles = ok(client.get(f"/api/config/bank-accounts/{card_id}/cycles"))["cycles"]
+    assert all(c["statementDate"].endswith("-10") for c in cycles)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from tests.conftest import ok
+
+
+def _walk(client, path: str, params: dict) -> list[list[dict]]:
+    pages, cursor = [], None
+    while True:
+        page = ok(client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}))
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_commute_cards_page_through_created_at_ties(client):
+    # Same created_at for every card: only the id tie-break keeps pages disjoint.
+    created = [
+        ok(client.post("/api/tools/commute-cards", json={"trip_count": 10, "created_at": "2026-03-01T08:00:00Z"}))["id"]
+        for _ in range(5)
+    ]
+
+    pages = _walk(client, "/api/tools/commute-cards", {"pageSize": 2})
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [card["id"] for page in pages for card in page] == sorted(created, reverse=True)
+
+
+def test_commute_cards_filter_by_status(client):
+    live = ok(client.post("/api/tools/commute-cards", json={"trip_count": 10}))
+    expired = ok(client.post("/api/tools/commute-cards", json={"trip_count": 10}))
+    ok(
+        client.post(
+            f"/api/tools/commute-cards/{expired['id']}/reservations",
+            json={"ride_date": "2026-01-05", "departure_time": "07:30", "direction": "北京南-天津"},
+        )
+    )
+
+    assert [c["id"] for c in ok(client.get("/api/tools/commute-cards"))["items"]] == [live["id"]]
+    assert [c["id"] for c in ok(client.get("/api/tools/commute-cards?status=expired"))["items"]] == [expired["id"]]
+    assert client.get("/api/tools/commute-cards?status=bogus").status_code == 400
+
+
+def test_ticket_commutes_window_and_cursor(client):
+    first = date(2026, 3, 30)
+    booked = []
+    for day in range(4):
+        ride_date = (first + timedelta(days=day)).isoformat()
+        for departure_time in ("07:30", "18:30"):
+            row = ok(
+                client.post(
+                    "/api/tools/ticket-commutes/reservations",
+                    json={"ride_date": ride_date, "departure_time": departure_time, "direction": "天津-北京南"},
+                )
+            )
+            booked.append((row["ride_date"], row["departure_time"][:5], row["id"]))
+
+    pages = _walk(client, "/api/tools/ticket-commutes", {"start": "2026-03-31", "end": "2026-04-01", "pageSize": 3})
+    seen = [(r["ride_date"], r["departure_time"][:5], r["id"]) for page in pages for r in page]
+    assert [len(p) for p in pages] == [3, 1]
+    assert seen == [b for b in booked if "2026-03-31" <= b[0] <= "2026-04-01"]
+
+    summary = ok(client.get("/api/tools/ticket-commutes/summary", params={"start": "2026-03-01", "end": "2026-04-30"}))
+    assert [(m["year"], m["month"], m["count"], m["am_count"], m["pm_count"]) for m in summary["items"]] == [
+        (2026, 3, 4, 2, 2),
+        (2026, 4, 4, 2, 2),
+    ]
+
+    assert client.get("/api/tools/ticket-commutes?cursor=not-a-cursor").status_code == 400
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.ledger_history import write_ledger_checkpoint
+from tests.conftest import ok
+
+
+def _moment() -> str:
+    # Audit rows carry millisecond timestamps; keep each step clearly apart.
+    time.sleep(0.02)
+    at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    time.sleep(0.02)
+    return at
+
+
+def _ledger_at(client, at: str) -> dict:
+    return ok(client.get("/api/admin/ledger-at", params={"userId": 1, "at": at}))
+
+
+def _setup(client) -> tuple[int, int]:
+    account = ok(
+        client.post("/api/config/bank-accounts", json={"bankName": "招行", "alias": "a", "balanceCents": 100000})
+    )
+    leaf = ok(client.get("/api/config/categories/tree?type=expense"))[0]["children"][0]
+    return account["id"], leaf["id"]
+
+
+def _expense(client, account_id: int, category_id: int, amount: int) -> dict:
+    return ok(
+        client.post(
+            "/api/ledger/transactions",
+            json={
+                "type": "expense",
+                "amountCents": amount,
+                "occurredAt": "2026-03-03T04:00:00Z",
+                "categoryId": category_id,
+                "fundingSource": "bank",
+                "bankAccountId": account_id,
+            },
+        )
+    )
+
+
+@pytest.mark.parametrize("encoding", ["json", "binary"])
+def test_replay_backward_from_live_tables(client, monkeypatch, encoding):
+    monkeypatch.setattr(settings, "audit_snapshot_encoding", encoding)
+    account_id, category_id = _setup(client)
+
+    before_create = _moment()
+    tx = _expense(client, account_id, category_id, 1000)
+    after_create = _moment()
+    edit = {"occurredAt": "2026-03-05T04:00:00Z", "note": "edited"}
+    ok(client.patch(f"/api/ledger/transactions/{tx['id']}", json=edit))
+    after_edit = _moment()
+    ok(client.delete(f"/api/ledger/transactions/{tx['id']}"))
+
+    assert _ledger_at(client, before_create)["transactions"] == []
+
+    original = _ledger_at(client, after_create)
+    assert original["checkpointAsOf"] is None
+    assert [(t["id"], t["amountCents"], t.get("note")) for t in original["transactions"]] == [(tx["id"], 1000, None)]
+    assert original["transactions"][0]["occurredAt"].startswith("2026-03-03")
+    assert {b["id"]: b["balanceCents"] for b in original["balances"]}[account_id] == 99000
+
+    edited = _ledger_at(client, after_edit)
+    assert [(t["note"], t["occurredAt"][:10]) for t in edited["transactions"]] == [("edited", "2026-03-05")]
+    assert {b["id"]: b["balanceCents"] for b in edited["balances"]}[account_id] == 99000
+
+    assert _ledger_at(client, _moment())["transactions"] == []
+
+
+def test_replay_forward_from_checkpoint(client, db):
+    account_id, category_id = _setup(client)
+    kept = _expense(client, account_id, category_id, 700)
+    write_ledger_checkpoint(db, 1)
+    just_after_checkpoint = _moment()
+    ok(client.patch(f"/api/ledger/transactions/{kept['id']}", json={"note": "later"}))
+    added = _expense(client, account_id, category_id, 50)
+    # Push "now" far enough away that the checkpoint is the closer starting point.
+    time.sleep(0.3)
+
+    snapshot = _ledger_at(client, just_after_checkpoint)
+    assert snapshot["checkpointAsOf"] is not None
+    assert [(t["id"], t.get("note")) for t in snapshot["transactions"]] == [(kept["id"], None)]
+
+    later = _ledger_at(client, _moment())
+    notes = sorted((t["id"], t.get("note")) for t in later["transactions"])
+    assert notes == [(kept["id"], "later"), (added["id"], None)]
+
+
+def test_category_merge_is_undone_before_it_happened(client):
+    account_id, category_id = _setup(client)
+    root = ok(client.get("/api/config/categories/tree?type=expense"))[0]
+    target = ok(
+        client.post("/api/config/categories", json={"type": "expense", "name": "餐饮", "parentId": root["id"]})
+    )
+    tx = _expense(client, account_id, category_id, 300)
+
+    before_merge = _moment()
+    ok(client.post(f"/api/config/categories/{category_id}/merge-into/{target['id']}"))
+
+    assert [t["categoryId"] for t in _ledger_at(client, before_merge)["transactions"]] == [category_id]
+    assert [t["categoryId"] for t in _ledger_at(client, _moment())["transactions"]] == [target["id"]]
+    assert tx["categoryId"] == category_id
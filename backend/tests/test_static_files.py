@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core.static_files import SpaStaticFiles
+
+_INDEX = b"<!doctype html><title>iBooks</title>" + b" " * 2048
+_IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _dist(root: Path, *, manifest: bool) -> Path:
+    (root / "assets").mkdir(parents=True)
+    (root / "index.html").write_bytes(_INDEX)
+    (root / "index.html.gz").write_bytes(gzip.compress(_INDEX))
+    (root / "assets" / "index-3f2a.js").write_bytes(b"console.log(1);")
+    (root / "assets" / "logo.svg").write_bytes(b"<svg/>")
+    (root / "favicon.ico").write_bytes(b"\x00")
+    if manifest:
+        (root / ".vite").mkdir()
+        (root / ".vite" / "manifest.json").write_text(
+            json.dumps({"index.html": {"file": "assets/index-3f2a.js", "css": [], "assets": []}}), encoding="utf-8"
+        )
+    return root
+
+
+def _client(root: Path) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    def ping() -> dict:
+        return {"ok": True}
+
+    app.mount("/", SpaStaticFiles(directory=str(root)), name="frontend")
+    return TestClient(app)
+
+
+@pytest.fixture
+def spa(tmp_path) -> TestClient:
+    return _client(_dist(tmp_path / "dist", manifest=True))
+
+
+def test_client_routes_get_the_index_from_memory(spa, tmp_path):
+    (tmp_path / "dist" / "index.html").write_bytes(b"changed on disk")
+    for path in ("/", "/index.html", "/ledger", "/stats/2026/03"):
+        response = spa.get(path, headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200, path
+        assert response.content == _INDEX
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_index_revalidates_per_encoding(spa):
+    plain = spa.get("/ledger", headers={"Accept-Encoding": "identity"})
+    zipped = spa.get("/ledger", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip" and zipped.content == _INDEX
+    assert plain.headers["etag"] != zipped.headers["etag"]
+
+    again = spa.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["etag"]})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == zipped.headers["etag"]
+    weak = spa.get("/", headers={"Accept-Encoding": "identity", "If-None-Match": f'W/{plain.headers["etag"]}'})
+    assert weak.status_code == 304
+    stale = spa.get("/", headers={"Accept-Encoding": "identity", "If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+
+def test_only_hashed_outputs_are_immutable(spa, tmp_path):
+    assert spa.get("/assets/index-3f2a.js").headers["cache-control"] == _IMMUTABLE
+    # Not in the manifest: cached by validators only.
+    assert "cache-control" not in spa.get("/assets/logo.svg").headers
+    assert "cache-control" not in spa.get("/favicon.ico").headers
+
+    without_manifest = _client(_dist(tmp_path / "plain", manifest=False))
+    assert without_manifest.get("/assets/logo.svg").headers["cache-control"] == _IMMUTABLE
+    assert "cache-control" not in without_manifest.get("/favicon.ico").headers
+
+
+def test_missing_files_and_api_paths_are_404(spa):
+    assert spa.get("/api/ping").json() == {"ok": True}
+    for path in ("/api", "/api/unknown", "/assets/missing.js", "/robots.txt"):
+        response = spa.get(path)
+        assert response.status_code == 404, path
+        assert response.content != _INDEX
+
+
+def test_dist_without_index_is_not_mounted(tmp_path):
+    dist = tmp_path / "dist"
+    (dist / "assets").mkdir(parents=True)
+    env = {
+        **os.environ,
+        "IBOOKS_DB_URL": f"sqlite:///{(tmp_path / 'app.db').as_posix()}",
+        "IBOOKS_SERVE_FRONTEND": "true",
+        "IBOOKS_FRONTEND_DIST_DIR": str(dist),
+    }
+    script = "from app.main import app; print(any(getattr(r, 'name', None) == 'frontend' for r in app.routes))"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from sqlalchemy.exc import DBAPIError
+
+from app.db.unit_of_work import is_transient_db_error
+
+
+class _OdbcError(Exception):
+    pass
+
+
+def _error(*args, invalidated: bool = False) -> DBAPIError:
+    return DBAPIError("INSERT", None, _OdbcError(*args), connection_invalidated=invalidated)
+
+
+def test_rolled_back_errors_are_retried():
+    assert is_transient_db_error(_error("40001", "[40001] Transaction was deadlocked (1205)"))
+    assert is_transient_db_error(_error("HYT00", "[HYT00] Lock request time out period exceeded. (1222)"))
+    assert is_transient_db_error(_error("42000", "Snapshot isolation transaction aborted (3960)"))
+    assert is_transient_db_error(_error("database is locked"))
+
+
+def test_dropped_connection_is_not_retried():
+    # The first attempt may have committed; re-running a create would apply it twice.
+    assert not is_transient_db_error(_error("08S01", "Communication link failure", invalidated=True))
+    assert not is_transient_db_error(_error("HYT01", "Connection timeout expired"))
+    assert not is_transient_db_error(_error("23000", "Violation of UNIQUE KEY constraint (2627)"))
@@ -1,5 +1,5 @@
 import { useQuery } from '@tanstack/react-query';
-import { Card, DatePicker, Select, Space, Table, Tag } from 'antd';
+import { Button, Card, DatePicker, Select, Space, Table, Tag } from 'antd';
 import type { ColumnsType } from 'antd/es/table';
 import { useMemo, useState } from 'react';
 import dayjs, { type Dayjs } from 'dayjs';
@@ -24,7 +24,9 @@ type AuditLogRow = {
 
 type ListOut = {
   items: AuditLogRow[];
-  total: number;
+  nextCursor: string | null;
+  total: number | null;
+  totalIsEstimate: boolean;
 };
 
 type UserRow = {
@@ -49,7 +51,8 @@ function typeLabel(v: TxType | null): string {
 export function TransactionAuditLogPage() {
   const auth = useAuth();
 
-  const [page, setPage] = useState(1);
+  // Cursors of the pages visited so far; the last entry is the current page (null = first page).
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
   const [pageSize, setPageSize] = useState(50);
   const [dateRange, setDateRange] = useState<[Dayjs | null, Dayjs | null]>([null, null]);
   const [txType, setTxType] = useState<TxType | 'all'>('all');
@@ -70,14 +73,16 @@ export function TransactionAuditLogPage() {
 
   const queryString = useMemo(() => {
     const params = new URLSearchParams();
-    params.set('page', String(page));
+    const cursor = cursors[cursors.length - 1];
+    if (cursor) params.set('cursor', cursor);
     params.set('pageSize', String(pageSize));
     params.set('order', 'asc');
+    params.set('countMode', 'estimated');
     if (txType !== 'all') params.set('txType', txType);
     if (startIso) params.set('start', startIso);
     if (endIso) params.set('end', endIso);
     return params.toString();
-  }, [page, pageSize, txType, startIso, endIso]);
+  }, [cursors, pageSize, txType, startIso, endIso]);
 
   const listQuery = useQuery({
     queryKey: ['transactionAuditLogs', queryString],
@@ -146,7 +151,7 @@ export function TransactionAuditLogPage() {
             allowClear
             format="YYYY-MM-DD"
             onChange={(v) => {
-              setPage(1);
+              setCursors([null]);
               setDateRange(v ?? [null, null]);
             }}
           />
@@ -163,7 +168,7 @@ export function TransactionAuditLogPage() {
               { value: 'refund', label: '退款' }
             ]}
             onChange={(v) => {
-              setPage(1);
+              setCursors([null]);
               setTxType(v);
             }}
           />
@@ -175,15 +180,7 @@ export function TransactionAuditLogPage() {
         loading={listQuery.isLoading}
         dataSource={listQuery.data?.items ?? []}
         columns={columns}
-        pagination={{
-          current: page,
-          pageSize,
-          total: listQuery.data?.total ?? 0,
-          onChange: (nextPage, nextSize) => {
-            setPage(nextPage);
-            if (typeof nextSize === 'number' && nextSize !== pageSize) setPageSize(nextSize);
-          }
-        }}
+        pagination={false}
         expandable={{
           expandedRowRender: (row) => {
             const before = row.before ? JSON.stringify(row.before, null, 2) : '-';
@@ -207,6 +204,39 @@ export function TransactionAuditLogPage() {
           }
         }}
       />
+
+      <div style={{ marginTop: 12, display: 'flex', justifyContent: 'flex-end' }}>
+        <Space wrap>
+          {listQuery.data?.total != null ? (
+            <span>
+              共{listQuery.data.totalIsEstimate ? '约 ' : ' '}
+              {listQuery.data.total} 条
+            </span>
+          ) : null}
+          <span>第 {cursors.length} 页</span>
+          <Button disabled={cursors.length <= 1} onClick={() => setCursors((prev) => prev.slice(0, -1))}>
+            上一页
+          </Button>
+          <Button
+            disabled={!listQuery.data?.nextCursor}
+            onClick={() => {
+              const next = listQuery.data?.nextCursor;
+              if (next) setCursors((prev) => [...prev, next]);
+            }}
+          >
+            下一页
+          </Button>
+          <Select
+            value={pageSize}
+            style={{ width: 110 }}
+            options={[20, 50, 100, 200].map((n) => ({ value: n, label: `${n} 条/页` }))}
+            onChange={(v) => {
+              setCursors([null]);
+              setPageSize(v);
+            }}
+          />
+        </Space>
+      </div>
     </Card>
   );
 }
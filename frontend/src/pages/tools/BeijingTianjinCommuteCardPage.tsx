@@ -22,6 +22,7 @@ import { getApiErrorMessage } from '../../lib/api';
 
 import {
   type CommuteCard,
+  type CommuteCardFilter,
   type CommuteReservation,
   type TripCount,
   getCommuteReservationSlot,
@@ -54,6 +55,12 @@ type DecoratedCard = CommuteCard & {
   status: 'draft' | 'active' | 'expired' | 'used-up';
 };
 
+const CARD_FILTER_OPTIONS: Array<{ label: string; value: CommuteCardFilter }> = [
+  { label: '生效中 / 待首次预约', value: 'live' },
+  { label: '已过期', value: 'expired' },
+  { label: '已用完', value: 'used-up' }
+];
+
 const TRIP_COUNT_OPTIONS: Array<{ label: string; value: TripCount }> = [
   { label: '10次', value: 10 },
   { label: '20次', value: 20 },
@@ -137,6 +144,11 @@ function RequiredLabel(props: { text: string }) {
 export function BeijingTianjinCommuteCardPage() {
   const {
     cards,
+    cardFilter,
+    setCardFilter,
+    hasMoreCards,
+    isLoadingMoreCards,
+    loadMoreCards,
     reservations,
     addCard,
     createReservation,
@@ -318,9 +330,17 @@ export function BeijingTianjinCommuteCardPage() {
         <Typography.Title level={3} className="commuteCardPage__title">
           京津通勤卡
         </Typography.Title>
-        <Button type="primary" icon={<PlusOutlined />} onClick={openCreateCardModal}>
-          添加通勤卡
-        </Button>
+        <Space>
+          <Select<CommuteCardFilter>
+            value={cardFilter}
+            style={{ width: 180 }}
+            onChange={setCardFilter}
+            options={CARD_FILTER_OPTIONS}
+          />
+          <Button type="primary" icon={<PlusOutlined />} onClick={openCreateCardModal}>
+            添加通勤卡
+          </Button>
+        </Space>
       </div>
 
       <div className="commuteCardPage__cards">
@@ -375,15 +395,27 @@ export function BeijingTianjinCommuteCardPage() {
           })
         ) : (
           <div className="commuteCardPage__blankState">
-            <Empty description="还没有通勤卡">
-              <Button type="primary" icon={<PlusOutlined />} onClick={openCreateCardModal}>
-                添加第一张通勤卡
-              </Button>
-            </Empty>
+            {cardFilter === 'live' ? (
+              <Empty description="没有生效中的通勤卡">
+                <Button type="primary" icon={<PlusOutlined />} onClick={openCreateCardModal}>
+                  添加通勤卡
+                </Button>
+              </Empty>
+            ) : (
+              <Empty description={cardFilter === 'expired' ? '没有已过期的通勤卡' : '没有已用完的通勤卡'} />
+            )}
           </div>
         )}
       </div>
 
+      {hasMoreCards ? (
+        <div className="commuteCardPage__loadMore">
+          <Button loading={isLoadingMoreCards} onClick={loadMoreCards}>
+            加载更多
+          </Button>
+        </div>
+      ) : null}
+
       <Drawer
         title={managingCard ? `${managingCard.tripCount}次卡` : '预约管理'}
         placement="right"
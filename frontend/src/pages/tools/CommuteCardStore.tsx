@@ -1,6 +1,6 @@
 import dayjs from 'dayjs';
-import { useQuery, useQueryClient } from '@tanstack/react-query';
-import { createContext, useContext, useMemo } from 'react';
+import { useInfiniteQuery, useQueryClient } from '@tanstack/react-query';
+import { createContext, useContext, useMemo, useState } from 'react';
 
 import { useAuth } from '../../auth/useAuth';
 import { api } from '../../lib/api';
@@ -8,6 +8,10 @@ import { api } from '../../lib/api';
 export type TripCount = 10 | 20 | 30 | 40;
 export type Direction = '北京南-天津' | '天津-北京南';
 export type CommuteSlot = 'am' | 'pm';
+// Live cards (draft or active) are the default; the others load only when chosen.
+export type CommuteCardFilter = 'live' | 'expired' | 'used-up';
+// Inclusive ride_date bounds (YYYY-MM-DD) of the ticket reservations to load.
+export type TicketCommuteWindow = { start?: string; end?: string };
 
 export type CommuteCard = {
   id: number;
@@ -29,7 +33,17 @@ export type CommuteReservation = {
 
 type CommuteCardStoreValue = {
   cards: CommuteCard[];
+  cardFilter: CommuteCardFilter;
+  setCardFilter: (filter: CommuteCardFilter) => void;
+  hasMoreCards: boolean;
+  isLoadingMoreCards: boolean;
+  loadMoreCards: () => void;
   ticketReservations: CommuteReservation[];
+  ticketWindow: TicketCommuteWindow;
+  setTicketWindow: (window: TicketCommuteWindow) => void;
+  hasMoreTickets: boolean;
+  isLoadingMoreTickets: boolean;
+  loadMoreTickets: () => void;
   reservations: CommuteReservation[];
   addCard: (input: { tripCount: TripCount; createdAt: string }) => Promise<CommuteCard>;
   createReservation: (input: {
@@ -65,7 +79,7 @@ type CommuteCardStoreValue = {
 
 const CommuteCardStoreContext = createContext<CommuteCardStoreValue | null>(null);
 
-type CommuteReservationApi = {
+export type CommuteReservationApi = {
   id: number;
   card_id: number | null;
   ride_date: string;
@@ -91,10 +105,12 @@ type CommuteCardApi = {
 
 type CommuteCardListApi = {
   items: CommuteCardApi[];
+  next_cursor?: string | null;
 };
 
 type TicketCommuteListApi = {
   items: CommuteReservationApi[];
+  next_cursor?: string | null;
 };
 
 function normalizeUtcNaiveTimestamp(dateTimeLike: string): string {
@@ -104,7 +120,7 @@ function normalizeUtcNaiveTimestamp(dateTimeLike: string): string {
   return /(?:Z|[+-]\d{2}:\d{2})$/i.test(normalized) ? normalized : `${normalized}Z`;
 }
 
-function mapReservation(apiReservation: CommuteReservationApi): CommuteReservation {
+export function mapReservation(apiReservation: CommuteReservationApi): CommuteReservation {
   return {
     id: apiReservation.id,
     cardId: apiReservation.card_id,
@@ -139,34 +155,64 @@ export function CommuteCardStoreProvider(props: { children: React.ReactNode }) {
   const auth = useAuth();
   const queryClient = useQueryClient();
 
-  const overviewQuery = useQuery({
-    queryKey: ['tools', 'commute-cards'],
+  const [cardFilter, setCardFilter] = useState<CommuteCardFilter>('live');
+
+  // One page per request; further pages only when the user asks for more.
+  const cardsQuery = useInfiniteQuery({
+    queryKey: ['tools', 'commute-cards', cardFilter],
     enabled: !!auth.user,
-    queryFn: () => api.get<CommuteCardListApi>('/tools/commute-cards', { token: auth.token })
+    initialPageParam: null as string | null,
+    queryFn: ({ pageParam }) => {
+      const params = new URLSearchParams();
+      if (cardFilter !== 'live') params.set('status', cardFilter);
+      if (pageParam) params.set('cursor', pageParam);
+      const query = params.toString();
+      return api.get<CommuteCardListApi>(`/tools/commute-cards${query ? `?${query}` : ''}`, { token: auth.token });
+    },
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? null
   });
 
-  const ticketCommutesQuery = useQuery({
-    queryKey: ['tools', 'ticket-commutes'],
+  const { fetchNextPage: fetchMoreCards, hasNextPage: hasMoreCards, isFetchingNextPage: isLoadingMoreCards } = cardsQuery;
+  const cardItems = useMemo(() => (cardsQuery.data?.pages ?? []).flatMap((page) => page.items), [cardsQuery.data]);
+
+  const [ticketWindow, setTicketWindow] = useState<TicketCommuteWindow>(() => ({ start: dayjs().format('YYYY-MM-DD') }));
+
+  // Only the window the ticket page shows, one page at a time, oldest first.
+  const ticketCommutesQuery = useInfiniteQuery({
+    queryKey: ['tools', 'ticket-commutes', ticketWindow.start ?? null, ticketWindow.end ?? null],
     enabled: !!auth.user,
-    queryFn: () => api.get<TicketCommuteListApi>('/tools/ticket-commutes', { token: auth.token })
+    initialPageParam: null as string | null,
+    queryFn: ({ pageParam }) => {
+      const params = new URLSearchParams();
+      if (ticketWindow.start) params.set('start', ticketWindow.start);
+      if (ticketWindow.end) params.set('end', ticketWindow.end);
+      if (pageParam) params.set('cursor', pageParam);
+      const query = params.toString();
+      return api.get<TicketCommuteListApi>(`/tools/ticket-commutes${query ? `?${query}` : ''}`, { token: auth.token });
+    },
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? null
   });
 
-  const cards = useMemo(
-    () => (overviewQuery.data?.items ?? []).map((item) => mapCard(item)),
-    [overviewQuery.data]
+  const { fetchNextPage: fetchMoreTickets, hasNextPage: hasMoreTickets, isFetchingNextPage: isLoadingMoreTickets } =
+    ticketCommutesQuery;
+  const ticketItems = useMemo(
+    () => (ticketCommutesQuery.data?.pages ?? []).flatMap((page) => page.items),
+    [ticketCommutesQuery.data]
   );
 
+  const cards = useMemo(() => cardItems.map((item) => mapCard(item)), [cardItems]);
+
   const reservations = useMemo(
     () =>
       [
-        ...(overviewQuery.data?.items ?? []).flatMap((item) => item.reservations),
-        ...(ticketCommutesQuery.data?.items ?? [])
+        ...cardItems.flatMap((item) => item.reservations),
+        ...ticketItems
       ]
         .map((item) => mapReservation(item))
         .sort((left, right) =>
           `${left.rideDate} ${left.departureTime}`.localeCompare(`${right.rideDate} ${right.departureTime}`)
         ),
-    [overviewQuery.data, ticketCommutesQuery.data]
+    [cardItems, ticketItems]
   );
 
   const ticketReservations = useMemo(
@@ -177,7 +223,21 @@ export function CommuteCardStoreProvider(props: { children: React.ReactNode }) {
   const value = useMemo<CommuteCardStoreValue>(
     () => ({
       cards,
+      cardFilter,
+      setCardFilter,
+      hasMoreCards,
+      isLoadingMoreCards,
+      loadMoreCards: () => {
+        void fetchMoreCards();
+      },
       ticketReservations,
+      ticketWindow,
+      setTicketWindow,
+      hasMoreTickets,
+      isLoadingMoreTickets,
+      loadMoreTickets: () => {
+        void fetchMoreTickets();
+      },
       reservations,
       addCard: async (input) => {
         const created = await api.post<CommuteCardApi>(
@@ -202,6 +262,7 @@ export function CommuteCardStoreProvider(props: { children: React.ReactNode }) {
           { token: auth.token }
         );
         await queryClient.invalidateQueries({ queryKey: ['tools', 'commute-cards'] });
+        await queryClient.invalidateQueries({ queryKey: ['tools', 'calendar'] });
         return mapReservation(created);
       },
       createTicketReservation: async (input) => {
@@ -218,6 +279,7 @@ export function CommuteCardStoreProvider(props: { children: React.ReactNode }) {
           { token: auth.token }
         );
         await queryClient.invalidateQueries({ queryKey: ['tools', 'ticket-commutes'] });
+        await queryClient.invalidateQueries({ queryKey: ['tools', 'calendar'] });
         return mapReservation(created);
       },
       updateReservation: async (input) => {
@@ -238,6 +300,7 @@ export function CommuteCardStoreProvider(props: { children: React.ReactNode }) {
           { token: auth.token }
         );
         await queryClient.invalidateQueries({ queryKey: ['tools', input.cardId === null ? 'ticket-commutes' : 'commute-cards'] });
+        await queryClient.invalidateQueries({ queryKey: ['tools', 'calendar'] });
         return mapReservation(updated);
       },
       deleteReservation: async (reservationId) => {
@@ -248,13 +311,28 @@ export function CommuteCardStoreProvider(props: { children: React.ReactNode }) {
             : `/tools/commute-cards/reservations/${reservationId}`;
         await api.delete(path, { token: auth.token });
         await queryClient.invalidateQueries({ queryKey: ['tools', reservation?.cardId === null ? 'ticket-commutes' : 'commute-cards'] });
+        await queryClient.invalidateQueries({ queryKey: ['tools', 'calendar'] });
       },
       deleteCard: async (cardId) => {
         await api.delete(`/tools/commute-cards/${cardId}`, { token: auth.token });
         await queryClient.invalidateQueries({ queryKey: ['tools', 'commute-cards'] });
       }
     }),
-    [auth.token, cards, queryClient, reservations, ticketReservations]
+    [
+      auth.token,
+      cardFilter,
+      cards,
+      fetchMoreCards,
+      fetchMoreTickets,
+      hasMoreCards,
+      hasMoreTickets,
+      isLoadingMoreCards,
+      isLoadingMoreTickets,
+      queryClient,
+      reservations,
+      ticketReservations,
+      ticketWindow
+    ]
   );
 
   return <CommuteCardStoreContext.Provider value={value}>{props.children}</CommuteCardStoreContext.Provider>;
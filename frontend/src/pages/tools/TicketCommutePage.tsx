@@ -1,14 +1,16 @@
 import {
   Button,
   Card,
+  DatePicker,
   Modal,
   Select,
+  Space,
   Typography,
   message
 } from 'antd';
 import { PlusOutlined } from '@ant-design/icons';
 import dayjs from 'dayjs';
-import { useMemo, useState } from 'react';
+import { useEffect, useMemo, useState } from 'react';
 
 import { getApiErrorMessage } from '../../lib/api';
 import {
@@ -33,6 +35,10 @@ export function TicketCommutePage() {
   const {
     reservations,
     ticketReservations,
+    setTicketWindow,
+    hasMoreTickets,
+    isLoadingMoreTickets,
+    loadMoreTickets,
     createTicketReservation,
     updateReservation,
     deleteReservation
@@ -42,8 +48,18 @@ export function TicketCommutePage() {
   const [editingReservationId, setEditingReservationId] = useState<number | null>(null);
   const [isReservationModalOpen, setIsReservationModalOpen] = useState(false);
   const [travelFilter, setTravelFilter] = useState<ReservationTravelFilter>('upcoming');
+  // Past trips are browsed one month at a time; upcoming ones start today.
+  const [month, setMonth] = useState(() => dayjs().startOf('month'));
   const [reservationDraft, setReservationDraft] = useState<ReservationDraft>(createReservationDraft('天津-北京南', dayjs()));
 
+  useEffect(() => {
+    setTicketWindow(
+      travelFilter === 'upcoming'
+        ? { start: dayjs().format('YYYY-MM-DD') }
+        : { start: month.startOf('month').format('YYYY-MM-DD'), end: month.endOf('month').format('YYYY-MM-DD') }
+    );
+  }, [month, setTicketWindow, travelFilter]);
+
   const sortedReservations = useMemo(
     () =>
       [...ticketReservations].sort((left, right) =>
@@ -65,9 +81,9 @@ export function TicketCommutePage() {
 
   const emptyDescription =
     travelFilter === 'completed'
-      ? '当前没有已出行的购票通勤预约'
+      ? `${month.format('YYYY年M月')}没有已出行的购票通勤预约`
       : travelFilter === 'all'
-        ? '当前还没有购票通勤预约'
+        ? `${month.format('YYYY年M月')}没有购票通勤预约`
         : '当前没有未出行的购票通勤预约';
 
   const openCreateModal = () => {
@@ -174,16 +190,26 @@ export function TicketCommutePage() {
       <Card>
         <div className="commuteCardPage__toolbar commuteCardPage__toolbar--inner">
           <Typography.Text type="secondary">默认只显示未出行预约</Typography.Text>
-          <Select<ReservationTravelFilter>
-            value={travelFilter}
-            style={{ width: 160 }}
-            onChange={setTravelFilter}
-            options={[
-              { label: '未出行', value: 'upcoming' },
-              { label: '已出行', value: 'completed' },
-              { label: '全部', value: 'all' }
-            ]}
-          />
+          <Space>
+            {travelFilter !== 'upcoming' ? (
+              <DatePicker
+                picker="month"
+                allowClear={false}
+                value={month}
+                onChange={(value) => setMonth((value ?? dayjs()).startOf('month'))}
+              />
+            ) : null}
+            <Select<ReservationTravelFilter>
+              value={travelFilter}
+              style={{ width: 160 }}
+              onChange={setTravelFilter}
+              options={[
+                { label: '未出行', value: 'upcoming' },
+                { label: '已出行', value: 'completed' },
+                { label: '全部', value: 'all' }
+              ]}
+            />
+          </Space>
         </div>
 
         <CommuteReservationList
@@ -194,6 +220,14 @@ export function TicketCommutePage() {
           onEdit={openEditModal}
           onDelete={removeTicketReservation}
         />
+
+        {hasMoreTickets ? (
+          <div className="commuteCardPage__loadMore">
+            <Button loading={isLoadingMoreTickets} onClick={loadMoreTickets}>
+              加载更多
+            </Button>
+          </div>
+        ) : null}
       </Card>
 
       <CommuteReservationModal
@@ -8,9 +8,10 @@ import { useAuth } from '../../auth/useAuth';
 import { api, getApiErrorMessage } from '../../lib/api';
 import {
   type CommuteReservation,
+  type CommuteReservationApi,
   formatCommuteReservationTime,
   getCommuteReservationSlot,
-  useCommuteCardStore
+  mapReservation
 } from './CommuteCardStore';
 
 import './travel-planner.css';
@@ -88,7 +89,6 @@ function getTabSuggestedValue(slot: 'am' | 'pm') {
 export function TravelPlannerPage() {
   const auth = useAuth();
   const queryClient = useQueryClient();
-  const { reservations } = useCommuteCardStore();
   const [messageApi, contextHolder] = message.useMessage();
 
   const todayKey = dayjs().format('YYYY-MM-DD');
@@ -106,7 +106,9 @@ export function TravelPlannerPage() {
   type MonthOut = {
     year: number;
     month: number;
-    items: Array<{ date: string; is_rest_day: boolean; am: string | null; pm: string | null }>;
+    plans: Array<{ date: string; is_rest_day: boolean; am: string | null; pm: string | null }>;
+    rest_days: string[];
+    reservations: CommuteReservationApi[];
   };
 
   const { leading, daysInMonth, cells } = useMemo(() => buildMonthCells(viewMonth), [viewMonth]);
@@ -127,26 +129,26 @@ export function TravelPlannerPage() {
   const nextMonth = useMemo(() => viewMonth.add(1, 'month').startOf('month'), [viewMonth]);
 
   const monthQuery = useQuery({
-    queryKey: ['tools', 'travel-plans', year, monthIndex + 1],
+    queryKey: ['tools', 'calendar', year, monthIndex + 1],
     queryFn: () =>
-      api.get<MonthOut>(`/tools/travel-plans?year=${year}&month=${monthIndex + 1}`, {
+      api.get<MonthOut>(`/tools/calendar?year=${year}&month=${monthIndex + 1}`, {
         token: auth.token
       })
   });
 
   const prevMonthQuery = useQuery({
-    queryKey: ['tools', 'travel-plans', prevMonth.year(), prevMonth.month() + 1],
+    queryKey: ['tools', 'calendar', prevMonth.year(), prevMonth.month() + 1],
     queryFn: () =>
-      api.get<MonthOut>(`/tools/travel-plans?year=${prevMonth.year()}&month=${prevMonth.month() + 1}`, {
+      api.get<MonthOut>(`/tools/calendar?year=${prevMonth.year()}&month=${prevMonth.month() + 1}`, {
         token: auth.token
       }),
     enabled: leading > 0
   });
 
   const nextMonthQuery = useQuery({
-    queryKey: ['tools', 'travel-plans', nextMonth.year(), nextMonth.month() + 1],
+    queryKey: ['tools', 'calendar', nextMonth.year(), nextMonth.month() + 1],
     queryFn: () =>
-      api.get<MonthOut>(`/tools/travel-plans?year=${nextMonth.year()}&month=${nextMonth.month() + 1}`, {
+      api.get<MonthOut>(`/tools/calendar?year=${nextMonth.year()}&month=${nextMonth.month() + 1}`, {
         token: auth.token
       }),
     enabled: trailing > 0
@@ -162,7 +164,7 @@ export function TravelPlannerPage() {
       console.error(err);
     },
     onSuccess: async () => {
-      await queryClient.invalidateQueries({ queryKey: ['tools', 'travel-plans', year, monthIndex + 1] });
+      await queryClient.invalidateQueries({ queryKey: ['tools', 'calendar', year, monthIndex + 1] });
     }
   });
 
@@ -170,9 +172,9 @@ export function TravelPlannerPage() {
     // Populate local cache from server when relevant months load.
     // This allows out-of-month dates (grey cells) to still display their plans.
     const items = [
-      ...(prevMonthQuery.data?.items ?? []),
-      ...(monthQuery.data?.items ?? []),
-      ...(nextMonthQuery.data?.items ?? [])
+      ...(prevMonthQuery.data?.plans ?? []),
+      ...(monthQuery.data?.plans ?? []),
+      ...(nextMonthQuery.data?.plans ?? [])
     ];
 
     const next: PlanMap = {};
@@ -220,6 +222,16 @@ export function TravelPlannerPage() {
 
   const weekHeaders = ['一', '二', '三', '四', '五', '六', '日'];
 
+  const reservations = useMemo<CommuteReservation[]>(
+    () =>
+      [
+        ...(prevMonthQuery.data?.reservations ?? []),
+        ...(monthQuery.data?.reservations ?? []),
+        ...(nextMonthQuery.data?.reservations ?? [])
+      ].map((item) => mapReservation(item)),
+    [monthQuery.data, nextMonthQuery.data, prevMonthQuery.data]
+  );
+
   const reservationMap = useMemo<ReservationMap>(() => {
     const next: ReservationMap = {};
 
@@ -357,16 +369,23 @@ export function TravelPlannerPage() {
         return next;
       });
 
-      // Persist (sequentially, to keep server load predictable)
-      for (const it of changed) {
-        const is_rest_day = !!it.next.isRestDay;
-        const am = is_rest_day ? null : (it.next.am ?? '').trim() || null;
-        const pm = is_rest_day ? null : (it.next.pm ?? '').trim() || null;
-        // Use direct API call (avoid invalidating per-row via mutation callbacks)
-        await api.put('/tools/travel-plans', { date: it.dateKey, is_rest_day, am, pm }, { token: auth.token });
-      }
-
-      await queryClient.invalidateQueries({ queryKey: ['tools', 'travel-plans', year, monthIndex + 1] });
+      // Persist the whole diff in one request.
+      await api.put(
+        '/tools/travel-plans/month',
+        {
+          year,
+          month: monthIndex + 1,
+          items: changed.map((it) => {
+            const is_rest_day = !!it.next.isRestDay;
+            const am = is_rest_day ? null : (it.next.am ?? '').trim() || null;
+            const pm = is_rest_day ? null : (it.next.pm ?? '').trim() || null;
+            return { date: it.dateKey, is_rest_day, am, pm };
+          })
+        },
+        { token: auth.token }
+      );
+
+      await queryClient.invalidateQueries({ queryKey: ['tools', 'calendar', year, monthIndex + 1] });
     } catch (err) {
       // eslint-disable-next-line no-console
       console.error(getApiErrorMessage(err));
@@ -416,18 +435,17 @@ export function TravelPlannerPage() {
         return next;
       });
 
-      for (const item of changed) {
-        const is_rest_day = !!item.next?.isRestDay;
-        const am = is_rest_day ? null : null;
-        const pm = is_rest_day ? null : null;
-        await api.put(
-          '/tools/travel-plans',
-          { date: item.dateKey, is_rest_day, am, pm },
-          { token: auth.token }
-        );
-      }
-
-      await queryClient.invalidateQueries({ queryKey: ['tools', 'travel-plans', year, monthIndex + 1] });
+      await api.put(
+        '/tools/travel-plans/month',
+        {
+          year,
+          month: monthIndex + 1,
+          items: changed.map((item) => ({ date: item.dateKey, is_rest_day: !!item.next?.isRestDay, am: null, pm: null }))
+        },
+        { token: auth.token }
+      );
+
+      await queryClient.invalidateQueries({ queryKey: ['tools', 'calendar', year, monthIndex + 1] });
     } catch (err) {
       // eslint-disable-next-line no-console
       console.error(getApiErrorMessage(err));
@@ -1,8 +1,50 @@
-import { defineConfig } from 'vite';
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs';
+import { join } from 'node:path';
+import { brotliCompressSync, constants as zlibConstants, gzipSync } from 'node:zlib';
+
+import { defineConfig, type Plugin } from 'vite';
 import react from '@vitejs/plugin-react';
 
+// Writes .br/.gz siblings next to every compressible file in dist, once per build;
+// the backend serves them as-is (app/core/static_files.py).
+function precompress(): Plugin {
+  const compressible = /\.(?:js|mjs|css|html|svg|json|txt|map)$/;
+  const minBytes = 1024;
+  let outDir = 'dist';
+
+  const walk = (dir: string): string[] =>
+    readdirSync(dir).flatMap((name) => {
+      const path = join(dir, name);
+      return statSync(path).isDirectory() ? walk(path) : [path];
+    });
+
+  return {
+    name: 'ibooks-precompress',
+    apply: 'build',
+    configResolved(config) {
+      outDir = join(config.root, config.build.outDir);
+    },
+    closeBundle() {
+      for (const path of walk(outDir)) {
+        if (!compressible.test(path)) continue;
+        const source = readFileSync(path);
+        if (source.length < minBytes) continue;
+        writeFileSync(`${path}.gz`, gzipSync(source, { level: 9 }));
+        writeFileSync(
+          `${path}.br`,
+          brotliCompressSync(source, { params: { [zlibConstants.BROTLI_PARAM_QUALITY]: 11 } })
+        );
+      }
+    }
+  };
+}
+
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), precompress()],
+  build: {
+    // dist/.vite/manifest.json tells the backend which files are content-hashed.
+    manifest: true
+  },
   server: {
     port: 5173,
     proxy: {